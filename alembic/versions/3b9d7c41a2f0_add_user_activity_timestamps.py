@@ -0,0 +1,30 @@
+"""Add last_login_at and last_seen_at to users
+
+Revision ID: 3b9d7c41a2f0
+Revises: e2f5e01e66be
+Create Date: 2026-10-19 10:12:40.118532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9d7c41a2f0'
+down_revision: Union[str, None] = 'e2f5e01e66be'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('last_login_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('users', sa.Column('last_seen_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'last_seen_at')
+    op.drop_column('users', 'last_login_at')
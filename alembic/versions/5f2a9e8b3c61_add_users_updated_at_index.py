@@ -0,0 +1,28 @@
+"""Add index on users.updated_at
+
+Revision ID: 5f2a9e8b3c61
+Revises: 8c1e4f52d7a9
+Create Date: 2026-10-19 13:21:05.274417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2a9e8b3c61'
+down_revision: Union[str, None] = '8c1e4f52d7a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_users_updated_at'), 'users', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_updated_at'), table_name='users')
@@ -0,0 +1,32 @@
+"""Add soft delete to users
+
+Revision ID: 8c1e4f52d7a9
+Revises: 3b9d7c41a2f0
+Create Date: 2026-10-19 11:04:27.530914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1e4f52d7a9'
+down_revision: Union[str, None] = '3b9d7c41a2f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('is_deleted', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.add_column('users', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_users_deleted_at', 'users', ['deleted_at'], unique=False, postgresql_where=sa.text('is_deleted = true'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_deleted_at', table_name='users')
+    op.drop_column('users', 'deleted_at')
+    op.drop_column('users', 'is_deleted')
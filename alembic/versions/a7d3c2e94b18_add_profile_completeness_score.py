@@ -0,0 +1,42 @@
+"""Add completeness_score to profiles
+
+Revision ID: a7d3c2e94b18
+Revises: 5f2a9e8b3c61
+Create Date: 2026-10-19 15:02:48.661093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3c2e94b18'
+down_revision: Union[str, None] = '5f2a9e8b3c61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COMPLETENESS_FIELDS = ('first_name', 'last_name', 'bio', 'avatar_url')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('profiles', sa.Column('completeness_score', sa.SmallInteger(), server_default='0', nullable=False))
+
+    # Backfill: та же формула, что и Profile.compute_completeness
+    filled = ' + '.join(
+        f"(CASE WHEN trim(coalesce({field}, '')) <> '' THEN 1 ELSE 0 END)"
+        for field in COMPLETENESS_FIELDS
+    )
+    op.execute(
+        f"UPDATE profiles SET completeness_score = ({filled}) * 100 / {len(COMPLETENESS_FIELDS)}"
+    )
+
+    op.create_index(op.f('ix_profiles_completeness_score'), 'profiles', ['completeness_score'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_profiles_completeness_score'), table_name='profiles')
+    op.drop_column('profiles', 'completeness_score')
@@ -0,0 +1,25 @@
+"""
+Продакшн-запуск: python -m app [--host 0.0.0.0] [--port 8000] [--workers N]
+
+Остальные параметры - в настройках SERVER_* и WEB_CONCURRENCY.
+"""
+
+import argparse
+import logging
+
+from app.core.server import run
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--workers", type=int, help="По умолчанию - по числу CPU")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    run(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
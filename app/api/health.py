@@ -0,0 +1,23 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from app.core.warmup import warmup
+
+router = APIRouter()
+
+
+@router.get("/live")
+async def liveness():
+    """
+    Проверка, что процесс жив и обрабатывает запросы
+    """
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def readiness():
+    """
+    Готовность воркера: 503, пока не завершен прогрев
+    """
+    code = status.HTTP_200_OK if warmup.ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(warmup.status(), status_code=code)
@@ -0,0 +1,142 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.memory import live_object_counts, memory_diagnostics
+from app.core.security import get_current_user
+from app.models.user import User
+from app.schemas.memory import AllocationDiff, AllocationSite, LiveObjects, MemoryStatus
+
+router = APIRouter()
+
+SnapshotName = Path(..., pattern=r"^[\w.-]{1,64}$", description="Имя снимка")
+GroupBy = Query("lineno", description="Группировка: строка, файл или стек")
+
+
+def _snapshot_not_found(name: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND, detail=f"Снимок {name} не найден"
+    )
+
+
+@router.get("/", response_model=MemoryStatus)
+async def get_memory_status(current_user: User = Depends(get_current_user)):
+    """
+    Состояние tracemalloc, RSS процесса и имена снимков
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
+        )
+
+    return memory_diagnostics.status()
+
+
+@router.post("/start", response_model=MemoryStatus)
+async def start_tracing(
+    frames: int = Query(1, ge=1, le=50, description="Глубина стека выделений"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Запустить tracemalloc (замедляет выделение памяти, пока включен)
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
+        )
+
+    memory_diagnostics.start(frames)
+    return memory_diagnostics.status()
+
+
+@router.post("/stop", response_model=MemoryStatus)
+async def stop_tracing(current_user: User = Depends(get_current_user)):
+    """
+    Остановить tracemalloc и удалить снимки
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
+        )
+
+    memory_diagnostics.stop()
+    return memory_diagnostics.status()
+
+
+@router.post("/snapshots/{name}", response_model=MemoryStatus)
+async def take_snapshot(
+    name: str = SnapshotName, current_user: User = Depends(get_current_user)
+):
+    """
+    Снять именованный снимок памяти
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
+        )
+
+    if not memory_diagnostics.tracing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="tracemalloc не запущен"
+        )
+    await run_in_threadpool(memory_diagnostics.take_snapshot, name)
+    return memory_diagnostics.status()
+
+
+@router.get("/snapshots/{name}", response_model=list[AllocationSite])
+async def get_snapshot_top(
+    name: str = SnapshotName,
+    limit: int = Query(20, ge=1, le=500),
+    group_by: Literal["lineno", "filename", "traceback"] = GroupBy,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Места, выделившие больше всего памяти, по снимку
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
+        )
+
+    try:
+        return await run_in_threadpool(memory_diagnostics.top, name, limit, group_by)
+    except KeyError:
+        raise _snapshot_not_found(name)
+
+
+@router.get("/snapshots/{name}/diff/{base}", response_model=list[AllocationDiff])
+async def get_snapshot_diff(
+    name: str = SnapshotName,
+    base: str = Path(..., pattern=r"^[\w.-]{1,64}$", description="Исходный снимок"),
+    limit: int = Query(20, ge=1, le=500),
+    group_by: Literal["lineno", "filename", "traceback"] = GroupBy,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Рост памяти по местам выделения от снимка base к снимку name
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
+        )
+
+    try:
+        return await run_in_threadpool(
+            memory_diagnostics.diff, name, base, limit, group_by
+        )
+    except KeyError as exc:
+        raise _snapshot_not_found(exc.args[0])
+
+
+@router.get("/objects", response_model=LiveObjects)
+async def get_live_objects(current_user: User = Depends(get_current_user)):
+    """
+    Число живых User, Profile, сессий и записей в их identity map
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
+        )
+
+    return await run_in_threadpool(live_object_counts)
@@ -0,0 +1,104 @@
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.activity import activity_buffer
+from app.core.config import settings
+from app.core.database import engine
+from app.core.email_filter import email_filter
+from app.core.metrics import CallbackMetric, registry
+from app.core.warmup import warmup
+from app.repositories import get_repository_manager
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _pool_stats():
+    pool = engine.sync_engine.pool
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            yield (name,), method()
+
+
+def _cache_stats(field: str):
+    def collect():
+        for name, stats in get_repository_manager().get_cache_stats().items():
+            yield (name,), stats[field]
+
+    return collect
+
+
+def _subsystems():
+    yield ("warmup_ready",), int(warmup.ready)
+    yield ("email_filter_ready",), int(email_filter.ready)
+    yield ("activity_buffer_pending",), len(activity_buffer)
+
+
+registry.register(
+    CallbackMetric(
+        "db_pool_connections", "Состояние пула соединений", ("state",), _pool_stats
+    )
+)
+registry.register(
+    CallbackMetric(
+        "cache_hits_total",
+        "Попадания read-through кеша",
+        ("repository",),
+        _cache_stats("hits"),
+        type="counter",
+    )
+)
+registry.register(
+    CallbackMetric(
+        "cache_misses_total",
+        "Промахи read-through кеша",
+        ("repository",),
+        _cache_stats("misses"),
+        type="counter",
+    )
+)
+registry.register(
+    CallbackMetric(
+        "cache_hit_ratio",
+        "Доля попаданий кеша",
+        ("repository",),
+        _cache_stats("hit_ratio"),
+    )
+)
+registry.register(
+    CallbackMetric(
+        "subsystem_state", "Состояние фоновых подсистем", ("name",), _subsystems
+    )
+)
+
+
+def require_scrape_access(request: Request) -> None:
+    """Доступ к /metrics: адрес из METRICS_ALLOWED_IPS или Bearer METRICS_TOKEN"""
+    if (
+        request.client is not None
+        and request.client.host in settings.METRICS_ALLOWED_IPS
+    ):
+        return
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get("authorization", "")
+    if token and hmac.compare_digest(
+        authorization.encode(), f"Bearer {token}".encode()
+    ):
+        return
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
+    )
+
+
+@router.get(
+    "/metrics", include_in_schema=False, dependencies=[Depends(require_scrape_access)]
+)
+async def metrics():
+    """
+    Метрики в текстовом формате Prometheus
+    """
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,30 +1,93 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import FileResponse
 from typing import Optional
 
 from app.core.dependencies import Deps
+from app.core.fast_json import FIELDS_DESCRIPTION, RowSerializer, parse_fields
+from app.core.http_cache import Validators, etag_matches
 from app.core.security import get_current_user
-from app.models.user import User
-from app.schemas.user import ProfileResponse, ProfileUpdate
+from app.models.user import Profile, User
+from app.schemas.user import (
+    CompletenessDistribution,
+    ProfileResponse,
+    ProfileUpdate,
+)
+from app.services.avatar_service import MEDIA_TYPES, avatar_storage
 
 router = APIRouter()
 
+# Сериализатор списков профилей из плоских строк
+profile_rows = RowSerializer(ProfileResponse, Profile)
 
-@router.get("/me", response_model=ProfileResponse)
-async def get_current_user_profile(
-    current_user: User = Depends(get_current_user),
-    deps: Deps = Depends(),
+
+async def _get_profile_conditionally(
+    request: Request,
+    response: Response,
+    deps: Deps,
+    user_id: int,
+    fields: Optional[str] = None,
 ):
     """
-    Получение профиля текущего пользователя
+    Отдать профиль с ETag / Last-Modified.
+
+    Сначала читаются только отметки времени; полный профиль загружается
+    лишь если у клиента нет актуальной версии. С fields= читаются только
+    колонки запрошенных полей.
     """
-    profile = await deps.repos.profiles.get_by_user_id(deps.db, current_user.id)
+    projection = profile_rows.project(parse_fields(fields))
+    version = await deps.repos.profiles.get_version_by_user_id(deps.db, user_id)
 
-    if not profile:
+    if not version:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Профиль не найден"
         )
 
-    return profile
+    validators = Validators(
+        "profile",
+        version.id,
+        version.created_at,
+        version.updated_at,
+        variant=projection.key,
+    )
+
+    if validators.is_not_modified(request):
+        return validators.not_modified_response()
+
+    if projection is not profile_rows:
+        row = await deps.repos.profiles.get_row(deps.db, projection.columns, version.id)
+        response = projection.response_one(row)
+        validators.apply(response)
+        return response
+
+    validators.apply(response)
+    return await deps.repos.profiles.get_by_id(deps.db, version.id)
+
+
+@router.get("/me", response_model=ProfileResponse)
+async def get_current_user_profile(
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    current_user: User = Depends(get_current_user),
+    deps: Deps = Depends(),
+):
+    """
+    Получение профиля текущего пользователя
+    """
+    return await _get_profile_conditionally(
+        request, response, deps, current_user.id, fields
+    )
 
 
 @router.put("/me", response_model=ProfileResponse)
@@ -55,6 +118,69 @@ async def update_current_user_profile(
     return profile
 
 
+@router.post("/me/avatar", response_model=ProfileResponse)
+async def upload_current_user_avatar(
+    file: UploadFile = File(..., description="Изображение PNG, JPEG, GIF или WebP"),
+    current_user: User = Depends(get_current_user),
+    deps: Deps = Depends(),
+):
+    """
+    Загрузка аватара текущего пользователя в локальное хранилище
+    """
+    return await deps.services.profiles.upload_avatar(
+        deps.db, current_user.id, file
+    )
+
+
+@router.get("/avatars/{filename}")
+async def get_avatar(
+    filename: str,
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Раздача загруженного аватара.
+
+    Адрес файла определяется его содержимым, поэтому ответ можно кешировать
+    навсегда, а ETag совпадает с именем файла.
+    """
+    path = avatar_storage.path_for(filename)
+
+    if path is None or not path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Аватар не найден"
+        )
+
+    headers = {
+        "ETag": f'"{filename.rsplit(".", 1)[0]}"',
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+
+    if if_none_match and etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return FileResponse(
+        path,
+        media_type=MEDIA_TYPES[filename.rsplit(".", 1)[1]],
+        headers=headers,
+    )
+
+
+@router.get("/completeness/distribution", response_model=CompletenessDistribution)
+async def get_completeness_distribution(
+    current_user: User = Depends(get_current_user),
+    deps: Deps = Depends(),
+):
+    """
+    Распределение профилей по заполненности (только для суперпользователей)
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
+        )
+
+    return await deps.services.profiles.get_completeness_distribution(deps.db)
+
+
 @router.get("/search", response_model=list[ProfileResponse])
 async def search_profiles(
     first_name: Optional[str] = Query(None, description="Поиск по имени"),
@@ -86,20 +212,16 @@ async def search_profiles(
 @router.get("/{user_id}", response_model=ProfileResponse)
 async def get_user_profile(
     user_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     current_user: User = Depends(get_current_user),
     deps: Deps = Depends(),
 ):
     """
     Получение профиля пользователя по ID
     """
-    profile = await deps.repos.profiles.get_by_user_id(deps.db, user_id)
-
-    if not profile:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Профиль не найден"
-        )
-
-    return profile
+    return await _get_profile_conditionally(request, response, deps, user_id, fields)
 
 
 @router.get("/", response_model=list[ProfileResponse])
@@ -108,6 +230,7 @@ async def get_all_profiles(
     limit: int = Query(
         100, ge=1, le=1000, description="Максимальное количество записей"
     ),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     current_user: User = Depends(get_current_user),
     deps: Deps = Depends(),
 ):
@@ -119,5 +242,8 @@ async def get_all_profiles(
             status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
         )
 
-    profiles = await deps.repos.profiles.get_multi(deps.db, skip=skip, limit=limit)
-    return profiles
+    projection = profile_rows.project(parse_fields(fields))
+    rows = await deps.repos.profiles.get_rows(
+        deps.db, projection.columns, skip=skip, limit=limit
+    )
+    return projection.response(rows)
@@ -0,0 +1,112 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+
+from app.core.config import settings
+from app.core.profiling import PROFILE_TOKEN_HEADER, issue_token, request_profiler
+from app.core.security import get_current_user
+from app.models.user import User
+from app.schemas.profiling import (
+    ProfileFile,
+    ProfilingSettings,
+    ProfilingStatus,
+    ProfilingToken,
+)
+
+router = APIRouter()
+
+
+@router.get("/", response_model=ProfilingStatus)
+async def get_profiling_status(current_user: User = Depends(get_current_user)):
+    """
+    Настройки профилирования и объем сохраненных профилей
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
+        )
+
+    return request_profiler.status()
+
+
+@router.put("/", response_model=ProfilingStatus)
+async def update_profiling_settings(
+    profiling_in: ProfilingSettings,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Изменить долю профилируемых запросов и формат профилей (в этом воркере)
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
+        )
+
+    request_profiler.sample_rate = profiling_in.sample_rate
+    request_profiler.format = profiling_in.format
+    return request_profiler.status()
+
+
+@router.post("/token", response_model=ProfilingToken)
+async def create_profiling_token(
+    ttl: int = Query(
+        settings.PROFILING_TOKEN_TTL, ge=1, le=3600, description="Время жизни, секунды"
+    ),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Подписанный токен: запросы с заголовком X-Profile-Token профилируются
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
+        )
+
+    return ProfilingToken(
+        header=PROFILE_TOKEN_HEADER, token=issue_token(ttl), expires_in=ttl
+    )
+
+
+@router.get("/profiles", response_model=list[ProfileFile])
+async def list_profiles(
+    route: str = Query(None, description="Подстрока маршрута в имени файла"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Сохраненные профили, новые первыми
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
+        )
+
+    return [
+        ProfileFile(
+            name=item["name"],
+            size=item["size"],
+            created_at=datetime.fromtimestamp(item["created_at"]),
+        )
+        for item in request_profiler.list()
+        if not route or route in item["name"]
+    ]
+
+
+@router.get("/profiles/{filename}")
+async def download_profile(
+    filename: str, current_user: User = Depends(get_current_user)
+):
+    """
+    Скачать профиль (pstats или collapsed stacks для flamegraph)
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
+        )
+
+    path = request_profiler.path(filename)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Профиль не найден"
+        )
+    return FileResponse(path, media_type="application/octet-stream", filename=filename)
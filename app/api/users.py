@@ -1,19 +1,84 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
 
 from app.core.dependencies import Deps
-from app.core.security import get_current_user, get_password_hash
-from app.models.user import User
-from app.schemas.user import UserResponse, UserUpdate
+from app.core.email_filter import email_filter
+from app.core.fast_json import (
+    FIELDS_DESCRIPTION,
+    RowSerializer,
+    parse_expand,
+    parse_fields,
+)
+from app.core.http_cache import Validators
+from app.core.security import get_current_user, get_password_hash_async
+from app.models.user import Profile, User
+from app.schemas.user import ProfileResponse, UserResponse, UserUpdate
 
 router = APIRouter()
 
+# Сериализаторы пользователей из плоских строк: с профилем и без него
+user_rows = RowSerializer(
+    UserResponse, User, profile=RowSerializer(ProfileResponse, Profile)
+)
+user_rows_without_profile = RowSerializer(UserResponse, User, collapsed=("profile",))
+
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    current_user: User = Depends(get_current_user),
+    deps: Deps = Depends(),
+):
     """
     Получение информации о текущем пользователе
+
+    Поддерживает If-None-Match / If-Modified-Since: при совпадении версии
+    ответ 304 строится без загрузки профиля и сериализации.
+    С fields= поля пользователя берутся из уже загруженного current_user,
+    из БД читаются только запрошенные колонки профиля.
     """
-    return current_user
+    projection = user_rows.project(parse_fields(fields))
+    profile_version = await deps.repos.profiles.get_version_by_user_id(
+        deps.db, current_user.id
+    )
+    # Отметки активности (last_login_at, last_seen_at) в версию не входят:
+    # их обновляет каждый запрос, и опрос клиента сам сбивал бы ETag
+    validators = Validators(
+        "user",
+        current_user.id,
+        current_user.created_at,
+        current_user.updated_at,
+        *(profile_version[1:] if profile_version else ()),
+        variant=projection.key,
+    )
+
+    if validators.is_not_modified(request):
+        return validators.not_modified_response()
+
+    if projection is not user_rows:
+        profile_row = None
+        if projection.nested:
+            profile_row = await deps.repos.profiles.get_row_by_user_id(
+                deps.db, projection.nested_columns, current_user.id
+            )
+        row = projection.row_from(current_user, profile_row)
+        response = projection.response_one(row)
+        validators.apply(response)
+        return response
+
+    validators.apply(response)
+    return await deps.repos.users.get_by_id_with_profile(deps.db, current_user.id)
 
 
 @router.put("/me", response_model=UserResponse)
@@ -27,7 +92,9 @@ async def update_current_user(
     """
     # Проверка email на уникальность если он был изменен
     if user_update.email and user_update.email != current_user.email:
-        existing_user = await deps.repos.users.get_by_email(deps.db, user_update.email)
+        existing_user = await deps.repos.users.get_by_email(
+            deps.db, user_update.email, include_deleted=True
+        )
 
         if existing_user:
             raise HTTPException(
@@ -40,12 +107,15 @@ async def update_current_user(
 
     # Хеширование пароля если он был предоставлен
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        update_data["hashed_password"] = await get_password_hash_async(
+            update_data.pop("password")
+        )
 
     # Обновление пользователя через репозиторий
     updated_user = await deps.repos.users.update(
         deps.db, db_obj=current_user, obj_in=update_data
     )
+    email_filter.add(updated_user.email)
 
     # Получение обновленного пользователя с профилем
     return await deps.repos.users.get_by_id_with_profile(deps.db, updated_user.id)
@@ -56,23 +126,35 @@ async def get_users(
     skip: int = 0,
     limit: int = 100,
     active_only: bool = True,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    expand: Optional[str] = Query(
+        None, description="Связи для загрузки вместе со списком: profile"
+    ),
     current_user: User = Depends(get_current_user),
     deps: Deps = Depends(),
 ):
     """
     Получение списка пользователей (только для суперпользователей)
+
+    Профиль загружается только с expand=profile (тем же запросом через
+    внешнее соединение), иначе в ответе profile = null. Число запросов
+    к БД не зависит от размера страницы.
     """
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
         )
 
-    if active_only:
-        users = await deps.repos.users.get_active_users(deps.db, skip=skip, limit=limit)
-    else:
-        users = await deps.repos.users.get_multi(deps.db, skip=skip, limit=limit)
-
-    return users
+    serializer = (
+        user_rows
+        if "profile" in parse_expand(expand, ["profile"])
+        else user_rows_without_profile
+    )
+    projection = serializer.project(parse_fields(fields))
+    rows = await deps.repos.users.get_rows_with_profile(
+        deps.db, projection.columns, skip=skip, limit=limit, active_only=active_only
+    )
+    return projection.response(rows)
 
 
 @router.patch("/{user_id}/deactivate", response_model=UserResponse)
@@ -103,3 +185,53 @@ async def deactivate_user(
         )
 
     return user
+
+
+@router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_user(
+    user_id: int,
+    current_user: User = Depends(get_current_user),
+    deps: Deps = Depends(),
+):
+    """
+    Мягкое удаление пользователя (только для суперпользователей)
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
+        )
+
+    user = await deps.services.users.soft_delete_user(
+        deps.db, user_id, current_user.id
+    )
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Пользователь не найден"
+        )
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post("/{user_id}/restore", response_model=UserResponse)
+async def restore_user(
+    user_id: int,
+    current_user: User = Depends(get_current_user),
+    deps: Deps = Depends(),
+):
+    """
+    Восстановление мягко удаленного пользователя (только для суперпользователей)
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав доступа"
+        )
+
+    user = await deps.services.users.restore_user(deps.db, user_id)
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Пользователь не найден"
+        )
+
+    return user
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    bindparam,
+    cast,
+    column,
+    func,
+    update,
+    values,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# (last_login_at, last_seen_at) для одного пользователя
+ActivityEntry = Tuple[Optional[datetime], Optional[datetime]]
+
+
+class ActivityBuffer:
+    """
+    Буфер отложенной записи last_login_at / last_seen_at.
+
+    Отметки копятся в памяти по user_id (последняя побеждает) и сбрасываются
+    одним UPDATE ... FROM (VALUES ...) по таймеру или при заполнении. Буфер
+    держит не больше max_size пользователей: пока БД недоступна, отметки
+    новых пользователей сверх лимита отбрасываются (счетчик dropped).
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        flush_interval: float = settings.ACTIVITY_FLUSH_INTERVAL_SECONDS,
+        max_size: int = settings.ACTIVITY_BUFFER_MAX_SIZE,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self._pending: Dict[int, ActivityEntry] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def record_login(self, user_id: int) -> None:
+        """Отметить успешный вход (заодно и активность)"""
+        now = datetime.now(timezone.utc)
+        self._put(user_id, now, now)
+
+    def record_seen(self, user_id: int) -> None:
+        """Отметить обращение пользователя к API"""
+        self._put(user_id, None, datetime.now(timezone.utc))
+
+    def _put(
+        self, user_id: int, login_at: Optional[datetime], seen_at: datetime
+    ) -> None:
+        prev = self._pending.get(user_id)
+        if prev is None and len(self._pending) >= self.max_size:
+            self.dropped += 1
+            return
+        self._pending[user_id] = (login_at or (prev[0] if prev else None), seen_at)
+
+        if len(self._pending) >= self.max_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _requeue(self, batch: Dict[int, ActivityEntry]) -> None:
+        """Вернуть несохраненный пакет, не затирая более свежие отметки"""
+        for user_id, entry in batch.items():
+            if user_id in self._pending:
+                continue
+            if len(self._pending) >= self.max_size:
+                self.dropped += 1
+                continue
+            self._pending[user_id] = entry
+
+    async def flush(self) -> int:
+        """Записать накопленные отметки в БД, вернуть число пользователей"""
+        if not self._pending:
+            return 0
+
+        batch, self._pending = self._pending, {}
+        rows = [(user_id, login, seen) for user_id, (login, seen) in batch.items()]
+
+        try:
+            async with self.session_factory() as db:
+                await self._write(db, rows)
+                await db.commit()
+        except Exception:
+            logger.exception("Не удалось сбросить буфер активности")
+            self._requeue(batch)
+            return 0
+        except BaseException:
+            # Отмена посреди записи: пакет остается в буфере для следующего сброса
+            self._requeue(batch)
+            raise
+
+        return len(rows)
+
+    async def _write(
+        self,
+        db: AsyncSession,
+        rows: List[Tuple[int, Optional[datetime], Optional[datetime]]],
+    ) -> None:
+        users = User.__table__
+
+        if db.bind.dialect.name == "postgresql":
+            activity = values(
+                column("id", Integer),
+                column("last_login_at", DateTime(timezone=True)),
+                column("last_seen_at", DateTime(timezone=True)),
+                name="activity",
+            ).data(rows)
+            # NULL в VALUES без явного приведения PostgreSQL типизирует как text
+            login_at = cast(activity.c.last_login_at, DateTime(timezone=True))
+            seen_at = cast(activity.c.last_seen_at, DateTime(timezone=True))
+            stmt = (
+                update(users)
+                .where(users.c.id == activity.c.id)
+                .values(
+                    last_login_at=func.coalesce(login_at, users.c.last_login_at),
+                    last_seen_at=func.coalesce(seen_at, users.c.last_seen_at),
+                    # Не трогаем updated_at: активность не меняет данные
+                    updated_at=users.c.updated_at,
+                )
+            )
+            await db.execute(stmt)
+            return
+
+        # Диалекты без UPDATE ... FROM (VALUES) - один executemany
+        stmt = (
+            update(users)
+            .where(users.c.id == bindparam("b_id"))
+            .values(
+                last_login_at=func.coalesce(
+                    bindparam("b_login", type_=DateTime(timezone=True)),
+                    users.c.last_login_at,
+                ),
+                last_seen_at=func.coalesce(
+                    bindparam("b_seen", type_=DateTime(timezone=True)),
+                    users.c.last_seen_at,
+                ),
+                updated_at=users.c.updated_at,
+            )
+        )
+        await db.execute(
+            stmt,
+            [
+                {"b_id": user_id, "b_login": login, "b_seen": seen}
+                for user_id, login, seen in rows
+            ],
+        )
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        """Запустить периодический сброс в текущем event loop"""
+        if self._task is not None:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Остановить фоновую задачу и сбросить остаток буфера.
+
+        Задача не отменяется, а завершается сама: начатая запись пакета
+        доходит до конца, затем остаток сбрасывается здесь.
+        """
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+            self._wakeup = None
+
+        await self.flush()
+
+
+# Глобальный буфер активности
+activity_buffer = ActivityBuffer()
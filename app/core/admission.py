@@ -0,0 +1,223 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import CallbackMetric, Counter, Histogram, registry
+
+# Маршруты с bcrypt: хеширование и проверка пароля занимают потоки bcrypt
+_CPU_ROUTES = {
+    ("POST", "/api/auth/login"),
+    ("POST", "/api/auth/register"),
+    ("POST", "/api/auth/change-password"),
+}
+# PUT /me попадает в класс cpu, только если в теле есть пароль
+_PASSWORD_UPDATE_ROUTE = ("PUT", "/api/users/me")
+# Проверки живости и сбор метрик должны отвечать и под перегрузкой
+_EXEMPT_PREFIXES = ("/health", "/metrics")
+
+
+class AdmissionRejected(Exception):
+    """Запрос отклонен: очередь класса заполнена или ожидание истекло"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class ConcurrencyLimiter:
+    """
+    Ограничение одновременных запросов класса с ограниченной очередью.
+
+    Свободное место передается первому ожидающему напрямую (FIFO), поэтому
+    новые запросы не обгоняют очередь.
+    """
+
+    def __init__(self, limit: int, queue_size: int, timeout: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            raise AdmissionRejected("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.done() and not waiter.cancelled():
+                # Место уже передано - возвращаем его следующему
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(exc, asyncio.TimeoutError):
+                raise AdmissionRejected("timeout") from None
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Место переходит ожидающему, active не меняется
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionController:
+    """Лимитеры по классам маршрутов: cpu (bcrypt) и default (остальное)"""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[int, int]]] = None,
+        timeout: float = settings.ADMISSION_QUEUE_TIMEOUT,
+        retry_after: int = settings.ADMISSION_RETRY_AFTER,
+    ):
+        if limits is None:
+            limits = {
+                "cpu": (settings.ADMISSION_CPU_LIMIT, settings.ADMISSION_CPU_QUEUE),
+                "default": (
+                    settings.ADMISSION_DEFAULT_LIMIT,
+                    settings.ADMISSION_DEFAULT_QUEUE,
+                ),
+            }
+        self.retry_after = retry_after
+        self.limiters = {
+            name: ConcurrencyLimiter(limit, queue_size, timeout)
+            for name, (limit, queue_size) in limits.items()
+        }
+
+    def collect(self) -> Iterable[Tuple[Tuple[str, str], float]]:
+        for name, limiter in self.limiters.items():
+            yield (name, "limit"), limiter.limit
+            yield (name, "queue_size"), limiter.queue_size
+            yield (name, "active"), limiter.active
+            yield (name, "queued"), limiter.queued
+
+
+# Глобальный контроль допуска запросов
+admission_controller = AdmissionController()
+
+registry.register(
+    CallbackMetric(
+        "admission_requests",
+        "Лимиты, занятые места и очередь по классам маршрутов",
+        ("class", "state"),
+        lambda: admission_controller.collect(),
+    )
+)
+admission_rejected_total = registry.register(
+    Counter(
+        "admission_rejected_total",
+        "Запросы, отклоненные с 503 из-за перегрузки",
+        ("class", "reason"),
+    )
+)
+admission_wait_seconds = registry.register(
+    Histogram(
+        "admission_wait_seconds",
+        "Время ожидания места в очереди класса",
+        ("class",),
+        buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    )
+)
+
+
+async def _read_body(receive: Receive) -> List[Message]:
+    messages = []
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request" or not message.get("more_body", False):
+            return messages
+
+
+def _has_password(messages: List[Message]) -> bool:
+    body = b"".join(message.get("body", b"") for message in messages)
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return False
+    return isinstance(data, dict) and data.get("password") is not None
+
+
+def _replay(messages: List[Message], receive: Receive) -> Receive:
+    pending = deque(messages)
+
+    async def replay() -> Message:
+        if pending:
+            return pending.popleft()
+        return await receive()
+
+    return replay
+
+
+class AdmissionMiddleware:
+    """
+    ASGI-middleware: допуск запроса по классу маршрута.
+
+    Каждый класс ограничен своим числом одновременных запросов и очередью,
+    поэтому поток логинов не занимает места дешевых чтений и наоборот. При
+    заполненной очереди или долгом ожидании сразу отдается 503 с Retry-After.
+    """
+
+    def __init__(
+        self, app: ASGIApp, controller: AdmissionController = admission_controller
+    ):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(_EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        key = (scope["method"], scope["path"].rstrip("/") or "/")
+        request_class = "cpu" if key in _CPU_ROUTES else "default"
+        if key == _PASSWORD_UPDATE_ROUTE:
+            # Тело небольшое: читаем заранее и отдаем приложению заново
+            messages = await _read_body(receive)
+            if _has_password(messages):
+                request_class = "cpu"
+            receive = _replay(messages, receive)
+
+        limiter = self.controller.limiters.get(request_class)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await limiter.acquire()
+        except AdmissionRejected as exc:
+            admission_rejected_total.inc(request_class, exc.reason)
+            response = JSONResponse(
+                {"detail": "Сервер перегружен, повторите запрос позже"},
+                status_code=503,
+                headers={"Retry-After": str(self.controller.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        admission_wait_seconds.observe(time.perf_counter() - started, request_class)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
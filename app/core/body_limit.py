@@ -0,0 +1,75 @@
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Запас на заголовки частей multipart/form-data сверх размера файла
+MULTIPART_OVERHEAD = 64 * 1024
+
+_DETAIL = "Тело запроса слишком большое"
+
+
+def upload_limits() -> Dict[str, int]:
+    """Маршруты загрузки файлов и допустимый размер тела запроса"""
+    return {
+        "/api/profiles/me/avatar": settings.AVATAR_MAX_BYTES + MULTIPART_OVERHEAD,
+    }
+
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI-middleware: ограничение размера тела запросов на загрузку.
+
+    Запрос с Content-Length больше лимита отклоняется с 413 до чтения тела;
+    без Content-Length (chunked) тело считается по мере чтения, и 413
+    отдается, как только прочитано больше лимита.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.limits = upload_limits() if limits is None else limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = self._content_length(scope)
+        if content_length is not None and content_length > limit:
+            response = JSONResponse(
+                {"detail": _DETAIL},
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # HTTPException проходит через разбор формы FastAPI как есть
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=_DETAIL,
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    def _content_length(scope: Scope) -> Optional[int]:
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    return int(value)
+                except ValueError:
+                    return None
+        return None
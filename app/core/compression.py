@@ -0,0 +1,251 @@
+import zlib
+from typing import Callable, Dict, List, Optional, Sequence
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - необязательная зависимость
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - необязательная зависимость
+    zstandard = None
+
+# Типы, которые уже сжаты и повторно не сжимаются
+_INCOMPRESSIBLE_PREFIXES = ("image/", "audio/", "video/", "application/zip")
+_INCOMPRESSIBLE_EXCEPTIONS = ("image/svg+xml",)
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_encodings() -> Dict[str, Callable[[], object]]:
+    """Фабрики компрессоров для установленных библиотек"""
+    encodings: Dict[str, Callable[[], object]] = {
+        "gzip": lambda: _GzipCompressor(settings.COMPRESSION_GZIP_LEVEL)
+    }
+    if brotli is not None:
+        encodings["br"] = lambda: _BrotliCompressor(settings.COMPRESSION_BROTLI_QUALITY)
+    if zstandard is not None:
+        encodings["zstd"] = lambda: _ZstdCompressor(settings.COMPRESSION_ZSTD_LEVEL)
+    return encodings
+
+
+def negotiate_encoding(
+    accept_encoding: str, preference: Sequence[str]
+) -> Optional[str]:
+    """
+    Выбрать кодировку по Accept-Encoding.
+
+    Побеждает наибольший q; при равенстве - порядок preference (сервера).
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in preference:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """
+    ASGI-middleware сжатия ответов (gzip, а также br/zstd, если установлены).
+
+    Ответы меньше minimum_size, уже закодированные (Content-Encoding) и
+    несжимаемых типов проходят без изменений. Потоковые ответы
+    (StreamingResponse) сжимаются по частям со сбросом буфера после
+    каждой части. Сжатие больших частей (от offload_size) выполняется
+    в пуле потоков, чтобы не блокировать цикл событий.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = settings.COMPRESSION_MIN_SIZE,
+        offload_size: int = settings.COMPRESSION_OFFLOAD_SIZE,
+        encodings: Sequence[str] = settings.COMPRESSION_ENCODINGS,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        factories = available_encodings()
+        self.factories = {
+            name: factories[name] for name in encodings if name in factories
+        }
+        self.preference: List[str] = list(self.factories)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), self.preference
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, send, encoding)
+        await self.app(scope, receive, responder)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, send: Send, encoding: str):
+        self.middleware = middleware
+        self.send = send
+        self.encoding = encoding
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+        # None - решение еще не принято, False - ответ идет как есть
+        self.compressing: Optional[bool] = None
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressing is None:
+            self.compressing = self._should_compress(body, more_body)
+            if not self.compressing:
+                await self.send(self.start_message)
+            elif not more_body:
+                await self._send_whole(body)
+                return
+            else:
+                await self._start_stream()
+
+        if not self.compressing:
+            await self.send(message)
+            return
+
+        # Потоковый ответ: сжимаем часть и сбрасываем буфер компрессора
+        if more_body:
+            chunk = await self._run(
+                lambda: self.compressor.compress(body) + self.compressor.flush(), body
+            )
+        else:
+            chunk = await self._run(
+                lambda: self.compressor.compress(body) + self.compressor.finish(), body
+            )
+        await self.send(
+            {"type": "http.response.body", "body": chunk, "more_body": more_body}
+        )
+
+    def _should_compress(self, body: bytes, more_body: bool) -> bool:
+        headers = Headers(raw=self.start_message["headers"])
+        if "content-encoding" in headers:
+            return False
+        if self.start_message["status"] in (204, 206, 304):
+            return False
+
+        content_type = headers.get("content-type", "")
+        if content_type.startswith(
+            _INCOMPRESSIBLE_PREFIXES
+        ) and not content_type.startswith(_INCOMPRESSIBLE_EXCEPTIONS):
+            return False
+
+        # Для потоковых ответов размер заранее неизвестен
+        return more_body or len(body) >= self.middleware.minimum_size
+
+    def _prepare_headers(self) -> MutableHeaders:
+        headers = MutableHeaders(raw=list(self.start_message["headers"]))
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # ETag относится к несжатому представлению
+        if "etag" in headers and not headers["etag"].startswith("W/"):
+            headers["ETag"] = f"W/{headers['etag']}"
+        self.start_message["headers"] = headers.raw
+        return headers
+
+    async def _send_whole(self, body: bytes) -> None:
+        compressor = self.middleware.factories[self.encoding]()
+        compressed = await self._run(
+            lambda: compressor.compress(body) + compressor.finish(), body
+        )
+
+        headers = self._prepare_headers()
+        headers["Content-Length"] = str(len(compressed))
+        self.start_message["headers"] = headers.raw
+        await self.send(self.start_message)
+        await self.send({"type": "http.response.body", "body": compressed})
+
+    async def _start_stream(self) -> None:
+        self.compressor = self.middleware.factories[self.encoding]()
+        headers = self._prepare_headers()
+        if "content-length" in headers:
+            del headers["Content-Length"]
+        self.start_message["headers"] = headers.raw
+        await self.send(self.start_message)
+
+    async def _run(self, fn: Callable[[], bytes], body: bytes) -> bytes:
+        if len(body) >= self.middleware.offload_size:
+            return await run_in_threadpool(fn)
+        return fn()
@@ -28,5 +28,178 @@ class Settings:
         os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
     )
 
+    # Буфер отложенной записи last_login_at / last_seen_at
+    ACTIVITY_FLUSH_INTERVAL_SECONDS: float = float(
+        os.getenv("ACTIVITY_FLUSH_INTERVAL_SECONDS", "5")
+    )
+    ACTIVITY_BUFFER_MAX_SIZE: int = int(os.getenv("ACTIVITY_BUFFER_MAX_SIZE", "1000"))
+
+    # Фоновая очистка мягко удаленных пользователей
+    SOFT_DELETE_RETENTION_DAYS: int = int(os.getenv("SOFT_DELETE_RETENTION_DAYS", "30"))
+    PURGE_BATCH_SIZE: int = int(os.getenv("PURGE_BATCH_SIZE", "500"))
+    PURGE_INTERVAL_SECONDS: float = float(os.getenv("PURGE_INTERVAL_SECONDS", "3600"))
+
+    # Прогрев воркера при старте
+    WARMUP_POOL_CONNECTIONS: int = int(os.getenv("WARMUP_POOL_CONNECTIONS", "5"))
+    # Повтор шагов с БД при ошибке: задержка удваивается до максимума
+    WARMUP_RETRY_DELAY: float = float(os.getenv("WARMUP_RETRY_DELAY", "1"))
+    WARMUP_RETRY_MAX_DELAY: float = float(os.getenv("WARMUP_RETRY_MAX_DELAY", "30"))
+
+    # Read-through кеш репозиториев: none | memory | shared. memory при
+    # нескольких воркерах требует INVALIDATION_TRANSPORT, shared с CACHE_URL -
+    # пакет redis (extra "redis")
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "none")
+    CACHE_URL: Optional[str] = os.getenv("CACHE_URL")
+    CACHE_TTL_SECONDS: float = float(os.getenv("CACHE_TTL_SECONDS", "60"))
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+
+    # Фильтр Блума для email существующих пользователей
+    EMAIL_FILTER_CAPACITY: int = int(os.getenv("EMAIL_FILTER_CAPACITY", "1000000"))
+    EMAIL_FILTER_ERROR_RATE: float = float(os.getenv("EMAIL_FILTER_ERROR_RATE", "0.001"))
+    EMAIL_FILTER_MAX_STALENESS_SECONDS: float = float(
+        os.getenv("EMAIL_FILTER_MAX_STALENESS_SECONDS", "0.5")
+    )
+
+    # Шина инвалидации кешей между воркерами: none | postgres | unix
+    INVALIDATION_TRANSPORT: str = os.getenv("INVALIDATION_TRANSPORT", "none")
+    INVALIDATION_CHANNEL: str = os.getenv("INVALIDATION_CHANNEL", "cache_invalidation")
+    INVALIDATION_SOCKET_DIR: str = os.getenv(
+        "INVALIDATION_SOCKET_DIR", "/tmp/api-user-system-invalidation"
+    )
+    INVALIDATION_COALESCE_MS: int = int(os.getenv("INVALIDATION_COALESCE_MS", "20"))
+
+    # Локальное хранилище аватаров
+    MEDIA_ROOT: str = os.getenv("MEDIA_ROOT", "media")
+    AVATAR_MAX_BYTES: int = int(os.getenv("AVATAR_MAX_BYTES", str(5 * 1024 * 1024)))
+    AVATAR_THUMBNAIL_SIZE: int = int(os.getenv("AVATAR_THUMBNAIL_SIZE", "128"))
+    AVATAR_THUMBNAIL_WORKERS: int = int(os.getenv("AVATAR_THUMBNAIL_WORKERS", "2"))
+
+    # Сжатие ответов
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_OFFLOAD_SIZE: int = int(
+        os.getenv("COMPRESSION_OFFLOAD_SIZE", str(256 * 1024))
+    )
+    # Порядок предпочтения; br и zstd используются, если установлены brotli / zstandard
+    COMPRESSION_ENCODINGS: list = os.getenv(
+        "COMPRESSION_ENCODINGS", "zstd,br,gzip"
+    ).split(",")
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    COMPRESSION_ZSTD_LEVEL: int = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+    # Заголовок Server-Timing с разбивкой запроса по фазам
+    SERVER_TIMING_ENABLED: bool = (
+        os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"
+    )
+    SERVER_TIMING_LOG: bool = os.getenv("SERVER_TIMING_LOG", "false").lower() == "true"
+
+    # Эндпоинт /metrics и сбор метрик запросов
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # /metrics отдается только с этих адресов или с заголовком
+    # Authorization: Bearer METRICS_TOKEN
+    METRICS_ALLOWED_IPS: list = os.getenv(
+        "METRICS_ALLOWED_IPS", "127.0.0.1,::1"
+    ).split(",")
+    METRICS_TOKEN: Optional[str] = os.getenv("METRICS_TOKEN")
+
+    # Счетчик SQL-запросов на запрос: бюджет и порог повторов (N+1)
+    QUERY_COUNTER_ENABLED: bool = (
+        os.getenv("QUERY_COUNTER_ENABLED", "true").lower() == "true"
+    )
+    QUERY_BUDGET: int = int(os.getenv("QUERY_BUDGET", "15"))
+    QUERY_REPEAT_THRESHOLD: int = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+
+    # Профилирование запросов по выборке или подписанному заголовку
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "true").lower() == "true"
+    PROFILING_DIR: str = os.getenv("PROFILING_DIR", "profiles")
+    # Начальная доля профилируемых запросов; меняется через /api/admin/profiling
+    PROFILING_SAMPLE_RATE: float = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+    # pstats (cProfile) или collapsed (стеки для flamegraph)
+    PROFILING_FORMAT: str = os.getenv("PROFILING_FORMAT", "pstats")
+    PROFILING_MAX_FILES: int = int(os.getenv("PROFILING_MAX_FILES", "200"))
+    PROFILING_MAX_BYTES: int = int(
+        os.getenv("PROFILING_MAX_BYTES", str(100 * 1024 * 1024))
+    )
+    PROFILING_TOKEN_TTL: int = int(os.getenv("PROFILING_TOKEN_TTL", "300"))
+
+    # Диагностика памяти (tracemalloc) для администраторов; по умолчанию выключена
+    MEMORY_DIAGNOSTICS_ENABLED: bool = (
+        os.getenv("MEMORY_DIAGNOSTICS_ENABLED", "false").lower() == "true"
+    )
+    MEMORY_MAX_SNAPSHOTS: int = int(os.getenv("MEMORY_MAX_SNAPSHOTS", "10"))
+
+    # Запуск сервера (python -m app)
+    SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
+    SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8000"))
+    # 0 - по числу доступных CPU, но не больше SERVER_MAX_WORKERS
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "0"))
+    SERVER_MAX_WORKERS: int = int(os.getenv("SERVER_MAX_WORKERS", "8"))
+    SERVER_BACKLOG: int = int(os.getenv("SERVER_BACKLOG", "2048"))
+    SERVER_KEEPALIVE: int = int(os.getenv("SERVER_KEEPALIVE", "5"))
+    # Сколько ждать завершения запросов в обработке после SIGTERM
+    SERVER_GRACEFUL_TIMEOUT: int = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+
+    # Сторож цикла событий: метрика задержки и стек блокирующего кода
+    LOOP_MONITOR_ENABLED: bool = (
+        os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+    )
+    LOOP_MONITOR_INTERVAL: float = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.1"))
+    # Порог выше одного раунда bcrypt (~0.3 с), чтобы случайная синхронная
+    # проверка пароля не засоряла лог
+    LOOP_LAG_THRESHOLD: float = float(os.getenv("LOOP_LAG_THRESHOLD", "0.5"))
+    # Стек с одного и того же места пишется в лог не чаще раза за интервал
+    LOOP_LAG_LOG_INTERVAL: float = float(os.getenv("LOOP_LAG_LOG_INTERVAL", "60"))
+
+    # Трассировка по слоям api / service / repository / db в локальный файл
+    TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+    TRACING_SAMPLE_RATE: float = float(os.getenv("TRACING_SAMPLE_RATE", "0.1"))
+    TRACING_FILE: str = os.getenv("TRACING_FILE", "traces.jsonl")
+    # jsonl (строка на span) или otlp (строка на трассу в формате OTLP JSON)
+    TRACING_FORMAT: str = os.getenv("TRACING_FORMAT", "jsonl")
+    # Флаг выборки из входящего traceparent учитывается только от этих адресов
+    TRACING_TRUSTED_PEERS: list = os.getenv(
+        "TRACING_TRUSTED_PEERS", "127.0.0.1,::1"
+    ).split(",")
+    # Файл трасс переименовывается в TRACING_FILE.1 при превышении размера
+    TRACING_MAX_BYTES: int = int(
+        os.getenv("TRACING_MAX_BYTES", str(100 * 1024 * 1024))
+    )
+    # Трассы сверх очереди на запись отбрасываются
+    TRACING_QUEUE_SIZE: int = int(os.getenv("TRACING_QUEUE_SIZE", "1000"))
+
+    # Потоки для bcrypt в процессе (хеширование освобождает GIL)
+    PASSWORD_HASH_THREADS: int = int(
+        os.getenv("PASSWORD_HASH_THREADS", str(os.cpu_count() or 1))
+    )
+
+    # Контроль допуска: лимит одновременных запросов и очередь на класс маршрутов
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    # cpu - маршруты с bcrypt (вход, регистрация, смена пароля). По умолчанию
+    # вдвое больше потоков bcrypt: пока одни запросы хешируют, другие идут в БД;
+    # очередь - примерно на ADMISSION_QUEUE_TIMEOUT работы потоков
+    ADMISSION_CPU_LIMIT: int = int(
+        os.getenv("ADMISSION_CPU_LIMIT", str(2 * PASSWORD_HASH_THREADS))
+    )
+    ADMISSION_CPU_QUEUE: int = int(
+        os.getenv("ADMISSION_CPU_QUEUE", str(16 * PASSWORD_HASH_THREADS))
+    )
+    ADMISSION_DEFAULT_LIMIT: int = int(os.getenv("ADMISSION_DEFAULT_LIMIT", "100"))
+    ADMISSION_DEFAULT_QUEUE: int = int(os.getenv("ADMISSION_DEFAULT_QUEUE", "200"))
+    # Сколько запрос может ждать в очереди до отказа с 503
+    ADMISSION_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+    ADMISSION_RETRY_AFTER: int = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+
+    # Idempotency-Key для регистрации и смены пароля (хранилище в памяти
+    # процесса, поэтому только при одном воркере)
+    IDEMPOTENCY_ENABLED: bool = (
+        os.getenv("IDEMPOTENCY_ENABLED", "false").lower() == "true"
+    )
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600"))
+    IDEMPOTENCY_MAX_ENTRIES: int = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+    # Сколько повтор ждет одновременный первый запрос до ответа 409
+    IDEMPOTENCY_WAIT_TIMEOUT: float = float(
+        os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "10")
+    )
+
 
 settings = Settings()
@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Запас на расхождение часов приложения и БД при догрузке по updated_at
+_CLOCK_SKEW = timedelta(seconds=5)
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+class BloomFilter:
+    """Фильтр Блума на bytearray с двойным хешированием"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class EmailFilter:
+    """
+    Фильтр Блума нормализованных email всех пользователей.
+
+    Ответ "точно нет" позволяет не ходить в БД при регистрации и входе.
+    Пока фильтр не построен, он всегда отвечает "возможно есть". Перед
+    отрицательным ответом фильтр догружает email, появившиеся с последнего
+    обновления (в том числе в других воркерах); догрузки ограничены по
+    частоте и объединяются между конкурентными запросами.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        capacity: int = settings.EMAIL_FILTER_CAPACITY,
+        error_rate: float = settings.EMAIL_FILTER_ERROR_RATE,
+        max_staleness: float = settings.EMAIL_FILTER_MAX_STALENESS_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.max_staleness = max_staleness
+        self._filter: Optional[BloomFilter] = None
+        self._max_id = 0
+        self._refreshed_at: Optional[datetime] = None
+        self._refreshed_monotonic = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._filter is not None
+
+    def add(self, email: str) -> None:
+        """Добавить email (после создания пользователя или смены email)"""
+        if self._filter is not None:
+            self._filter.add(normalize_email(email))
+
+    async def build(self) -> None:
+        """Построить фильтр потоковым чтением всех email"""
+        started_at = datetime.now(timezone.utc)
+
+        async with self.session_factory() as db:
+            count = await db.scalar(select(func.count(User.id)))
+            bloom = BloomFilter(max(self.capacity, 2 * (count or 0)), self.error_rate)
+            max_id = 0
+
+            result = await db.stream(
+                select(User.id, User.email).execution_options(yield_per=1000)
+            )
+            async for user_id, email in result:
+                bloom.add(normalize_email(email))
+                max_id = max(max_id, user_id)
+
+        self._filter = bloom
+        self._max_id = max_id
+        self._mark_refreshed(started_at)
+        logger.info("Фильтр email построен: %s адресов", count)
+
+    async def might_exist(self, email: str) -> bool:
+        """False - пользователя с таким email точно нет"""
+        if self._filter is None:
+            return True
+
+        normalized = normalize_email(email)
+        if normalized in self._filter:
+            return True
+
+        if time.monotonic() - self._refreshed_monotonic >= self.max_staleness:
+            await self._refresh()
+
+        return normalized in self._filter
+
+    async def _refresh(self) -> None:
+        # Конкурентные запросы ждут одну и ту же догрузку
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.ensure_future(self._catch_up())
+        task = self._refresh_task
+        try:
+            await asyncio.shield(task)
+        except Exception:
+            logger.exception("Не удалось обновить фильтр email")
+        finally:
+            if self._refresh_task is task and task.done():
+                self._refresh_task = None
+
+    async def _catch_up(self) -> None:
+        started_at = datetime.now(timezone.utc)
+        since = self._refreshed_at - _CLOCK_SKEW
+
+        async with self.session_factory() as db:
+            stmt = select(User.id, User.email).where(
+                or_(User.id > self._max_id, User.updated_at > since)
+            )
+            rows = (await db.execute(stmt)).all()
+
+        for user_id, email in rows:
+            self._filter.add(normalize_email(email))
+            self._max_id = max(self._max_id, user_id)
+        self._mark_refreshed(started_at)
+
+    def _mark_refreshed(self, started_at: datetime) -> None:
+        self._refreshed_at = started_at
+        self._refreshed_monotonic = time.monotonic()
+
+
+# Глобальный фильтр email
+email_filter = EmailFilter()
@@ -0,0 +1,177 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Type
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+from app.core.timing import timed
+
+# Ограничение числа закешированных проекций на один сериализатор
+_MAX_PROJECTIONS = 256
+
+FIELDS_DESCRIPTION = "Поля ответа через запятую, например id,email,profile.first_name"
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Разобрать параметр fields=a,b,profile.c; None - все поля"""
+    if fields is None:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    return names or None
+
+
+def parse_expand(expand: Optional[str], allowed: Iterable[str]) -> Set[str]:
+    """Разобрать параметр expand=a,b; неизвестные связи - 400"""
+    names = set(parse_fields(expand) or ())
+    unknown = names - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестные связи в expand: {', '.join(sorted(unknown))}",
+        )
+    return names
+
+
+class RowSerializer:
+    """
+    Сериализатор строк результата запроса в JSON по полям схемы ответа.
+
+    Схема разбирается один раз при создании: порядок полей, колонки модели
+    и вложенные схемы. Строки (кортежи колонок) превращаются в словари без
+    повторной валидации pydantic и сразу кодируются в байты. Данные
+    приходят из БД, поэтому проверка типов на каждом поле не нужна.
+
+    Перед колонками вложенной схемы выбирается скрытый первичный ключ ее
+    модели: null отдается, только когда связанной строки нет, а не когда
+    все запрошенные поля пустые.
+    """
+
+    def __init__(
+        self,
+        schema: Type[BaseModel],
+        model: Any,
+        include: Optional[Iterable[str]] = None,
+        collapsed: Iterable[str] = (),
+        **nested: "RowSerializer",
+    ):
+        self.schema = schema
+        self.model = model
+        self.nested = nested
+        # Вложенные схемы, которые не загружаются и отдаются как null
+        self.collapsed = tuple(collapsed)
+        names = [
+            name
+            for name in schema.model_fields
+            if name not in nested and name not in self.collapsed
+        ]
+        if include is not None:
+            include = set(include)
+            names = [name for name in names if name in include]
+        self.fields = tuple(names)
+        # Колонки для select(): сначала свои, затем вложенных схем по порядку,
+        # каждая со скрытым первичным ключом впереди
+        self.columns = [getattr(model, name) for name in self.fields]
+        for serializer in nested.values():
+            self.columns.append(serializer.model.id)
+            self.columns.extend(serializer.columns)
+        self.width = len(self.columns)
+        self.key = ""
+        self._projections: Dict[str, "RowSerializer"] = {}
+
+    @property
+    def nested_columns(self) -> List[Any]:
+        """Колонки вложенных схем (со скрытыми ключами) после собственных"""
+        return self.columns[len(self.fields) :]
+
+    def row_from(self, obj: Any, nested_row: Optional[Sequence[Any]]) -> tuple:
+        """Строка из уже загруженного объекта и строки nested_columns"""
+        own = tuple(getattr(obj, name) for name in self.fields)
+        if not self.nested:
+            return own
+        return own + (
+            tuple(nested_row) if nested_row else (None,) * (self.width - len(own))
+        )
+
+    def project(self, fields: Optional[List[str]]) -> "RowSerializer":
+        """
+        Сериализатор только для запрошенных полей (sparse fieldset).
+
+        Вложенные поля задаются через точку (profile.first_name), имя
+        вложенной схемы целиком включает все ее поля. Неизвестные поля - 400.
+        """
+        if not fields:
+            return self
+
+        key = ",".join(sorted(set(fields)))
+        projection = self._projections.get(key)
+        if projection is not None:
+            return projection
+
+        own, nested, unknown = set(), {}, []
+        for name in fields:
+            head, _, tail = name.partition(".")
+            if head in self.collapsed:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Поле {head} доступно только с expand={head}",
+                )
+            if head in self.nested:
+                if not tail:
+                    # Схема целиком поглощает отдельные поля: profile,profile.bio
+                    nested[head] = None
+                elif nested.get(head, []) is not None:
+                    nested.setdefault(head, []).append(tail)
+            elif not tail and head in self.schema.model_fields:
+                own.add(head)
+            else:
+                unknown.append(name)
+
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Неизвестные поля: {', '.join(unknown)}",
+            )
+
+        projection = RowSerializer(
+            self.schema,
+            self.model,
+            include=own,
+            **{
+                name: serializer.project(nested[name])
+                for name, serializer in self.nested.items()
+                if name in nested
+            },
+        )
+        projection.key = key
+        if len(self._projections) < _MAX_PROJECTIONS:
+            self._projections[key] = projection
+        return projection
+
+    def _to_dict(self, row: Sequence[Any], offset: int = 0) -> Dict[str, Any]:
+        end = offset + len(self.fields)
+        item = dict(zip(self.fields, row[offset:end]))
+        for name in self.collapsed:
+            item[name] = None
+        for name, serializer in self.nested.items():
+            # Внешнее соединение без пары дает NULL в первичном ключе
+            if row[end] is None:
+                item[name] = None
+            else:
+                item[name] = serializer._to_dict(row, end + 1)
+            end += 1 + serializer.width
+        return item
+
+    def dumps(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        """JSON-массив объектов схемы из строк"""
+        with timed("serialize"):
+            return to_json([self._to_dict(row) for row in rows])
+
+    def response(self, rows: Sequence[Sequence[Any]]) -> Response:
+        """Готовый ответ, минуя response_model эндпоинта"""
+        return Response(self.dumps(rows), media_type="application/json")
+
+    def response_one(self, row: Sequence[Any]) -> Response:
+        """Ответ с одним объектом"""
+        with timed("serialize"):
+            body = to_json(self._to_dict(row))
+        return Response(body, media_type="application/json")
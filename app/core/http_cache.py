@@ -0,0 +1,75 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite возвращает наивные datetime - считаем их UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Совпадает ли ETag со списком из If-None-Match: слабое сравнение
+    (W/ не учитывается), "*" совпадает с любым ETag (RFC 9110).
+    """
+    etag = etag.removeprefix("W/")
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class Validators:
+    """ETag и Last-Modified ресурса, вычисленные по id и отметкам времени"""
+
+    def __init__(
+        self, kind: str, id: int, *timestamps: Optional[datetime], variant: str = ""
+    ):
+        stamps = [_as_utc(ts) for ts in timestamps if ts is not None]
+        version = "|".join(ts.isoformat() for ts in stamps)
+        # variant различает представления одного ресурса (например, набор полей)
+        if variant:
+            version = f"{variant}|{version}"
+        digest = hashlib.md5(version.encode()).hexdigest()[:16]
+
+        self.etag = f'"{kind}-{id}-{digest}"'
+        self.last_modified = max(stamps).replace(microsecond=0) if stamps else None
+
+    def apply(self, response: Response) -> None:
+        """Проставить заголовки валидаторов в ответ"""
+        response.headers["ETag"] = self.etag
+        if self.last_modified is not None:
+            response.headers["Last-Modified"] = format_datetime(
+                self.last_modified, usegmt=True
+            )
+
+    def is_not_modified(self, request: Request) -> bool:
+        """Проверить If-None-Match / If-Modified-Since запроса"""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            # If-None-Match имеет приоритет над If-Modified-Since (RFC 9110)
+            return etag_matches(if_none_match, self.etag)
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since is None or self.last_modified is None:
+            return False
+
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+        return self.last_modified <= _as_utc(since)
+
+    def not_modified_response(self) -> Response:
+        """Пустой ответ 304 с теми же валидаторами"""
+        response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+        self.apply(response)
+        return response
@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import Counter, registry
+
+# Маршруты, которые клиенты повторяют по таймауту
+IDEMPOTENT_ROUTES = {
+    ("POST", "/api/auth/register"),
+    ("POST", "/api/auth/change-password"),
+}
+
+# Ограничение длины значения Idempotency-Key
+_MAX_KEY_LENGTH = 255
+
+idempotency_requests_total = registry.register(
+    Counter(
+        "idempotency_requests_total",
+        "Запросы с Idempotency-Key по результату",
+        ("result",),
+    )
+)
+
+
+class StoredResponse:
+    """Сохраненный ответ: статус, заголовки и тело"""
+
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "expires_at", "done", "response")
+
+    def __init__(self, fingerprint: str, expires_at: float):
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+        # Ставится, когда первый запрос завершился (с ответом или без)
+        self.done = asyncio.Event()
+        self.response: Optional[StoredResponse] = None
+
+
+class IdempotencyStore:
+    """
+    Хранилище ключей идемпотентности в памяти процесса: TTL и LRU-вытеснение.
+
+    Запись создается при первом запросе с ключом и ждет его ответа;
+    повторы с тем же ключом получают этот ответ или ждут его.
+    """
+
+    def __init__(
+        self,
+        ttl: float = settings.IDEMPOTENCY_TTL_SECONDS,
+        max_entries: int = settings.IDEMPOTENCY_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic() and entry.done.is_set():
+            del self._entries[key]
+            return None
+        return entry
+
+    def begin(self, key: str, fingerprint: str) -> _Entry:
+        entry = _Entry(fingerprint, time.monotonic() + self.ttl)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            _, oldest = next(iter(self._entries.items()))
+            if not oldest.done.is_set():
+                # Запросы в обработке не вытесняем
+                break
+            self._entries.popitem(last=False)
+        return entry
+
+    def complete(self, key: str, response: Optional[StoredResponse]) -> None:
+        """Сохранить ответ; None - ответа нет, запись удаляется для повтора"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        if response is None:
+            del self._entries[key]
+        else:
+            entry.response = response
+        entry.done.set()
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Глобальное хранилище ключей идемпотентности
+idempotency_store = IdempotencyStore()
+
+
+def _header(scope: Scope, name: bytes) -> bytes:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return b""
+
+
+def _digest(*parts: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def _error(status_code: int, detail: str) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status_code)
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI-middleware: заголовок Idempotency-Key для регистрации и смены пароля.
+
+    Ключ действует в пределах маршрута и заголовка Authorization. Повтор с тем
+    же ключом и телом получает исходный ответ (Idempotent-Replayed: true) без
+    повторного bcrypt и записи в БД; одновременный повтор ждет первый запрос.
+    Тот же ключ с другим телом - 422. Ответы 5xx не сохраняются.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: IdempotencyStore = idempotency_store,
+        wait_timeout: float = settings.IDEMPOTENCY_WAIT_TIMEOUT,
+    ):
+        self.app = app
+        self.store = store
+        self.wait_timeout = wait_timeout
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or (scope["method"], scope["path"]) not in IDEMPOTENT_ROUTES
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        idempotency_key = _header(scope, b"idempotency-key")
+        if not idempotency_key:
+            await self.app(scope, receive, send)
+            return
+        if len(idempotency_key) > _MAX_KEY_LENGTH:
+            await _error(400, "Слишком длинный Idempotency-Key")(scope, receive, send)
+            return
+
+        messages = []
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request" or not message.get("more_body"):
+                break
+        body = b"".join(message.get("body", b"") for message in messages)
+
+        # Middleware стоит внутри CompressionMiddleware: сохраняется несжатое
+        # тело, и Accept-Encoding повтора на ключ не влияет
+        key = _digest(
+            scope["path"].encode(),
+            _header(scope, b"authorization"),
+            idempotency_key,
+        )
+        fingerprint = _digest(scope.get("query_string", b""), body)
+
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            entry = self.store.get(key)
+            if entry is None:
+                break
+            if entry.fingerprint != fingerprint:
+                idempotency_requests_total.inc("mismatch")
+                response = _error(
+                    422, "Idempotency-Key уже использован с другим запросом"
+                )
+                await response(scope, receive, send)
+                return
+            if not entry.done.is_set():
+                try:
+                    await asyncio.wait_for(
+                        entry.done.wait(), max(0.0, deadline - time.monotonic())
+                    )
+                except asyncio.TimeoutError:
+                    idempotency_requests_total.inc("conflict")
+                    response = _error(
+                        409, "Запрос с этим Idempotency-Key еще выполняется"
+                    )
+                    await response(scope, receive, send)
+                    return
+            if entry.response is not None:
+                idempotency_requests_total.inc("replayed")
+                await self._replay(entry.response, send)
+                return
+            # Первый запрос завершился без ответа - выполняем сами
+
+        idempotency_requests_total.inc("new")
+        self.store.begin(key, fingerprint)
+        await self._run(scope, messages, receive, send, key)
+
+    async def _run(
+        self,
+        scope: Scope,
+        messages: List[Message],
+        receive: Receive,
+        send: Send,
+        key: str,
+    ) -> None:
+        pending = list(messages)
+
+        async def replay_receive() -> Message:
+            if pending:
+                return pending.pop(0)
+            return await receive()
+
+        status = 0
+        headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+
+        async def capture(message: Message) -> None:
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        stored = None
+        try:
+            await self.app(scope, replay_receive, capture)
+            if 0 < status < 500:
+                stored = StoredResponse(status, headers, b"".join(chunks))
+        finally:
+            self.store.complete(key, stored)
+
+    @staticmethod
+    async def _replay(response: StoredResponse, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status,
+                "headers": response.headers + [(b"idempotent-replayed", b"true")],
+            }
+        )
+        await send({"type": "http.response.body", "body": response.body})
@@ -0,0 +1,279 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Обработчик пачки событий: {"user": [1, 2], ...}
+EventHandler = Callable[[Dict[str, List[int]]], Awaitable[None]]
+# Обработчик потери событий (переподключение): сбросить кеши целиком
+ResetHandler = Callable[[], Awaitable[None]]
+
+# Ограничение размера одного сообщения (NOTIFY - до 8000 байт)
+_MAX_IDS_PER_MESSAGE = 500
+
+
+class PostgresTransport:
+    """Транспорт через LISTEN/NOTIFY на отдельном соединении asyncpg"""
+
+    def __init__(self, dsn: str, channel: str = settings.INVALIDATION_CHANNEL):
+        self.dsn = dsn
+        self.channel = channel
+        self._connection = None
+        self._lost: Optional[asyncio.Event] = None
+
+    async def connect(self, on_message: Callable[[str], None]) -> None:
+        import asyncpg
+
+        self._lost = asyncio.Event()
+        self._connection = await asyncpg.connect(self.dsn)
+        self._connection.add_termination_listener(lambda _: self._lost.set())
+        await self._connection.add_listener(
+            self.channel, lambda *args: on_message(args[-1])
+        )
+
+    async def wait_closed(self) -> None:
+        await self._lost.wait()
+
+    async def send(self, payload: str) -> None:
+        await self._connection.execute(
+            "SELECT pg_notify($1, $2)", self.channel, payload
+        )
+
+    async def close(self) -> None:
+        if self._connection is not None and not self._connection.is_closed():
+            await self._connection.close()
+        self._connection = None
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, on_message: Callable[[str], None]):
+        self.on_message = on_message
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.on_message(data.decode("utf-8"))
+
+
+class UnixSocketTransport:
+    """
+    Транспорт для одного хоста: у каждого воркера свой датаграммный сокет
+    в общем каталоге, рассылка идет всем сокетам каталога.
+    """
+
+    def __init__(self, directory: str = settings.INVALIDATION_SOCKET_DIR):
+        self.directory = Path(directory)
+        self.path = self.directory / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._sender: Optional[socket.socket] = None
+        self._closed: Optional[asyncio.Event] = None
+
+    async def connect(self, on_message: Callable[[str], None]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DatagramProtocol(on_message),
+            local_addr=str(self.path),
+            family=socket.AF_UNIX,
+        )
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+        self._closed = asyncio.Event()
+
+    async def wait_closed(self) -> None:
+        await self._closed.wait()
+
+    async def send(self, payload: str) -> None:
+        data = payload.encode("utf-8")
+        for peer in self.directory.glob("*.sock"):
+            if peer == self.path:
+                continue
+            try:
+                self._sender.sendto(data, str(peer))
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Сокет завершившегося воркера
+                peer.unlink(missing_ok=True)
+            except BlockingIOError:
+                logger.warning("Очередь воркера %s переполнена", peer.name)
+
+    async def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self._sender is not None:
+            self._sender.close()
+            self._sender = None
+        if self._closed is not None:
+            self._closed.set()
+        self.path.unlink(missing_ok=True)
+
+
+class InvalidationBus:
+    """
+    Шина инвалидации кешей между воркерами.
+
+    События "сущность X изменилась" копятся и раз в INVALIDATION_COALESCE_MS
+    уходят одним сообщением. Свои сообщения воркер игнорирует (локальный
+    кеш он сбросил сам). После (пере)подключения подписчики сбрасывают
+    кеши целиком, так как события за время разрыва могли потеряться.
+    """
+
+    def __init__(
+        self,
+        transport_factory: Optional[Callable[[], object]] = None,
+        coalesce: float = settings.INVALIDATION_COALESCE_MS / 1000,
+        reconnect_delay: float = 1.0,
+    ):
+        self.transport_factory = transport_factory
+        self.coalesce = coalesce
+        self.reconnect_delay = reconnect_delay
+        self.origin = uuid.uuid4().hex
+        self._handlers: List[EventHandler] = []
+        self._reset_handlers: List[ResetHandler] = []
+        self._pending: Dict[str, Set[int]] = {}
+        self._transport = None
+        self._connected: Optional[asyncio.Event] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._tasks)
+
+    def subscribe(
+        self, on_event: EventHandler, on_reset: Optional[ResetHandler] = None
+    ) -> None:
+        self._handlers.append(on_event)
+        if on_reset is not None:
+            self._reset_handlers.append(on_reset)
+
+    def publish(self, kind: str, id: int) -> None:
+        """Сообщить другим воркерам, что сущность изменилась"""
+        if not self.enabled:
+            return
+        self._pending.setdefault(kind, set()).add(id)
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        if self.transport_factory is None or self._tasks:
+            return
+        self._connected = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._supervise()),
+            asyncio.create_task(self._send_loop()),
+        ]
+
+    async def stop(self) -> None:
+        # Отправляем накопленное, пока транспорт еще доступен
+        if self._pending and self._connected is not None and self._connected.is_set():
+            await self._send_pending()
+
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+        if self._transport is not None:
+            await self._transport.close()
+            self._transport = None
+
+    async def _supervise(self) -> None:
+        while True:
+            transport = self.transport_factory()
+            try:
+                await transport.connect(self._on_message)
+                self._transport = transport
+                self._connected.set()
+                await self._reset()
+                await transport.wait_closed()
+                logger.warning("Шина инвалидации потеряла соединение")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Не удалось подключить шину инвалидации")
+            finally:
+                self._connected.clear()
+
+            await transport.close()
+            self._transport = None
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _send_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            # Даем набраться пачке событий
+            await asyncio.sleep(self.coalesce)
+            self._wakeup.clear()
+            await self._connected.wait()
+            await self._send_pending()
+
+    async def _send_pending(self) -> None:
+        pending, self._pending = self._pending, {}
+        try:
+            for events in self._chunk(pending):
+                await self._transport.send(
+                    json.dumps({"origin": self.origin, "events": events})
+                )
+        except Exception:
+            logger.exception("Не удалось отправить события инвалидации")
+            # Повторим после переподключения
+            for kind, ids in pending.items():
+                self._pending.setdefault(kind, set()).update(ids)
+            self._wakeup.set()
+
+    @staticmethod
+    def _chunk(pending: Dict[str, Set[int]]):
+        for kind, ids in pending.items():
+            ids = sorted(ids)
+            for start in range(0, len(ids), _MAX_IDS_PER_MESSAGE):
+                yield {kind: ids[start : start + _MAX_IDS_PER_MESSAGE]}
+
+    def _on_message(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("Некорректное сообщение шины инвалидации")
+            return
+
+        if message.get("origin") == self.origin:
+            return
+
+        asyncio.ensure_future(self._dispatch(message.get("events", {})))
+
+    async def _dispatch(self, events: Dict[str, List[int]]) -> None:
+        for handler in self._handlers:
+            try:
+                await handler(events)
+            except Exception:
+                logger.exception("Ошибка обработчика инвалидации")
+
+    async def _reset(self) -> None:
+        for handler in self._reset_handlers:
+            try:
+                await handler()
+            except Exception:
+                logger.exception("Ошибка сброса кеша")
+
+
+def create_transport_factory() -> Optional[Callable[[], object]]:
+    """Фабрика транспорта согласно INVALIDATION_TRANSPORT"""
+    if settings.INVALIDATION_TRANSPORT == "postgres":
+        return lambda: PostgresTransport(settings.DATABASE_URL)
+    if settings.INVALIDATION_TRANSPORT == "unix":
+        return UnixSocketTransport
+    return None
+
+
+# Глобальная шина инвалидации
+invalidation_bus = InvalidationBus(create_transport_factory())
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import CallbackMetric, Histogram, registry
+
+logger = logging.getLogger(__name__)
+
+event_loop_lag_seconds = registry.register(
+    Histogram(
+        "event_loop_lag_seconds",
+        "Задержка пробуждения периодической задачи цикла событий",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    )
+)
+
+
+class LoopLagMonitor:
+    """
+    Сторож цикла событий.
+
+    Задача в цикле каждые interval секунд отмечает пульс и измеряет, на
+    сколько опоздала (метрика event_loop_lag_seconds). Поток-наблюдатель
+    проверяет пульс: если его нет дольше threshold, цикл занят синхронным
+    кодом - блокировка считается в blocked (метрика event_loop_blocked_total),
+    а стек потока цикла пишется в лог не чаще раза в log_interval для одного
+    места в коде.
+
+    Счетчик и журнал мест меняет только поток-наблюдатель: метрики реестра
+    обновляются из потока цикла, поэтому blocked отдается через CallbackMetric.
+    """
+
+    def __init__(
+        self,
+        interval: float = settings.LOOP_MONITOR_INTERVAL,
+        threshold: float = settings.LOOP_LAG_THRESHOLD,
+        log_interval: float = settings.LOOP_LAG_LOG_INTERVAL,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.log_interval = log_interval
+        self.max_lag = 0.0
+        self.blocked = 0
+        # Место блокировки (файл, строка) -> время последней записи в лог
+        self._logged_at: Dict[Tuple[str, int], float] = {}
+        self._last_beat = 0.0
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Запустить пульс в текущем event loop и поток-наблюдатель"""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._run())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-lag-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Остановить пульс и наблюдатель"""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=self.interval * 2)
+            self._watchdog = None
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._last_beat = now
+            self.max_lag = max(self.max_lag, lag)
+            event_loop_lag_seconds.observe(lag)
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stopped.wait(self.interval / 2):
+            last_beat = self._last_beat
+            stalled = time.monotonic() - last_beat - self.interval
+            if stalled > self.threshold and reported_beat != last_beat:
+                reported_beat = last_beat
+                self.blocked += 1
+                self._report(stalled)
+
+    def _report(self, stalled: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is not None:
+            site = (frame.f_code.co_filename, frame.f_lineno)
+            now = time.monotonic()
+            logged_at = self._logged_at.get(site)
+            if logged_at is not None and now - logged_at < self.log_interval:
+                return
+            # Места, чей интервал истек, больше не нужны - журнал не растет
+            self._logged_at = {
+                key: at
+                for key, at in self._logged_at.items()
+                if now - at < self.log_interval
+            }
+            self._logged_at[site] = now
+        logger.warning(
+            "Цикл событий заблокирован дольше %.0f мс:\n%s",
+            stalled * 1000,
+            self._format_stack(frame),
+        )
+
+    @staticmethod
+    def _format_stack(frame) -> str:
+        if frame is None:
+            return "<стек недоступен>"
+        return "".join(traceback.format_stack(frame))
+
+    def loop_stack(self) -> str:
+        """Текущий стек потока цикла событий"""
+        return self._format_stack(sys._current_frames().get(self._loop_thread_id))
+
+
+# Глобальный сторож цикла событий
+loop_monitor = LoopLagMonitor()
+
+registry.register(
+    CallbackMetric(
+        "event_loop_blocked_total",
+        "Блокировки цикла событий дольше порога",
+        (),
+        lambda: [((), loop_monitor.blocked)],
+        type="counter",
+    )
+)
@@ -0,0 +1,137 @@
+import gc
+import os
+import tracemalloc
+from collections import OrderedDict
+from typing import Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import Profile, User
+
+# Кадры служебного кода, которые не интересны в отчетах
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _site(stat) -> str:
+    frame = stat.traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def rss_bytes() -> int:
+    """Текущий RSS процесса (0, если /proc недоступен)"""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class MemoryDiagnostics:
+    """
+    tracemalloc по запросу администратора: именованные снимки, топ мест
+    выделения памяти и разница между снимками.
+
+    Пока трассировка не запущена, ничего не стоит; хранится не более
+    max_snapshots снимков (самые старые вытесняются).
+    """
+
+    def __init__(self, max_snapshots: int = settings.MEMORY_MAX_SNAPSHOTS):
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        """Остановить трассировку; снимки удаляются вместе с ней"""
+        tracemalloc.stop()
+        self._snapshots.clear()
+
+    def take_snapshot(self, name: str) -> tracemalloc.Snapshot:
+        """Снять снимок (блокирующий вызов); имя перезаписывает старый снимок"""
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        self._snapshots.pop(name, None)
+        self._snapshots[name] = snapshot
+        while len(self._snapshots) > self.max_snapshots:
+            self._snapshots.popitem(last=False)
+        return snapshot
+
+    def get(self, name: str) -> tracemalloc.Snapshot:
+        """Снимок по имени; KeyError, если его нет"""
+        return self._snapshots[name]
+
+    def names(self) -> List[str]:
+        return list(self._snapshots)
+
+    def top(
+        self, name: str, limit: int = 20, group_by: str = "lineno"
+    ) -> List[Dict[str, object]]:
+        stats = self.get(name).statistics(group_by)
+        return [
+            {"site": _site(stat), "size": stat.size, "count": stat.count}
+            for stat in stats[:limit]
+        ]
+
+    def diff(
+        self, name: str, base: str, limit: int = 20, group_by: str = "lineno"
+    ) -> List[Dict[str, object]]:
+        """Места с наибольшим ростом памяти от снимка base к снимку name"""
+        stats = self.get(name).compare_to(self.get(base), group_by)
+        return [
+            {
+                "site": _site(stat),
+                "size": stat.size,
+                "size_diff": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            }
+            for stat in stats[:limit]
+        ]
+
+    def status(self) -> Dict[str, object]:
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "tracing": self.tracing,
+            "frames": tracemalloc.get_traceback_limit() if self.tracing else 0,
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "rss_bytes": rss_bytes(),
+            "snapshots": self.names(),
+        }
+
+
+def live_object_counts() -> Dict[str, int]:
+    """
+    Живые User, Profile и сессии, а также суммарный размер identity map
+    открытых сессий. Обходит все объекты gc - дорого, только по запросу.
+    """
+    counts = {"User": 0, "Profile": 0, "Session": 0, "AsyncSession": 0}
+    identity_map = 0
+    for obj in gc.get_objects():
+        if isinstance(obj, User):
+            counts["User"] += 1
+        elif isinstance(obj, Profile):
+            counts["Profile"] += 1
+        elif isinstance(obj, AsyncSession):
+            counts["AsyncSession"] += 1
+        elif isinstance(obj, Session):
+            counts["Session"] += 1
+            identity_map += len(obj.identity_map)
+    counts["identity_map_entries"] = identity_map
+    return counts
+
+
+# Глобальная диагностика памяти
+memory_diagnostics = MemoryDiagnostics()
@@ -0,0 +1,257 @@
+import cProfile
+import hashlib
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+# Заголовок запроса с подписанным токеном и ответа с именем файла профиля
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_FILE_HEADER = "X-Profile"
+_TOKEN_HEADER = PROFILE_TOKEN_HEADER.lower().encode()
+
+# Интервал снятия стеков для формата collapsed (секунды)
+_SAMPLE_INTERVAL = 0.002
+
+_FILENAME = re.compile(r"^[\w.-]+\.(pstats|collapsed)$")
+
+
+def _sign(expires: int) -> str:
+    message = f"profile:{expires}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def issue_token(ttl: int = settings.PROFILING_TOKEN_TTL) -> str:
+    """Токен для заголовка X-Profile-Token: профилировать запрос до истечения"""
+    expires = int(time.time()) + ttl
+    return f"{expires}.{_sign(expires)}"
+
+
+def verify_token(token: str) -> bool:
+    expires, _, signature = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _sign(int(expires)))
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Сэмплер стеков потока цикла событий для flamegraph (collapsed stacks).
+
+    В стеки попадают и корутины других запросов, выполнявшиеся в это время.
+    """
+
+    def __init__(self, thread_id: int, interval: float = _SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+class RequestProfiler:
+    """
+    Профилирование доли запросов или запросов с подписанным заголовком.
+
+    Одновременно профилируется один запрос на процесс (cProfile работает
+    на весь поток); остальные в это время выполняются без профиля. Файлы
+    пишутся в directory и ротируются по числу и суммарному размеру.
+    Доля и формат - состояние процесса: у каждого воркера свои.
+    """
+
+    def __init__(
+        self,
+        directory: str = settings.PROFILING_DIR,
+        sample_rate: float = settings.PROFILING_SAMPLE_RATE,
+        format: str = settings.PROFILING_FORMAT,
+        max_files: int = settings.PROFILING_MAX_FILES,
+        max_bytes: int = settings.PROFILING_MAX_BYTES,
+    ):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.format = format
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.active = False
+        self._lock = threading.Lock()
+
+    def wants(self, scope: Scope) -> bool:
+        """Профилировать ли запрос (подписанный заголовок или выборка)"""
+        for name, value in scope["headers"]:
+            if name == _TOKEN_HEADER:
+                return verify_token(value.decode("latin-1"))
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def acquire(self) -> bool:
+        with self._lock:
+            if self.active:
+                return False
+            self.active = True
+            return True
+
+    def release(self) -> None:
+        self.active = False
+
+    def filename(self, scope: Scope) -> str:
+        route = re.sub(r"[^A-Za-z0-9]+", "_", route_template(scope)).strip("_")
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        suffix = os.urandom(3).hex()
+        return f"{stamp}-{scope['method']}-{route or 'root'}-{suffix}.{self.format}"
+
+    def path(self, filename: str) -> Optional[str]:
+        """Путь к файлу профиля; None для чужих имен и отсутствующих файлов"""
+        if not _FILENAME.match(filename):
+            return None
+        path = os.path.join(self.directory, filename)
+        return path if os.path.isfile(path) else None
+
+    def list(self) -> List[Dict[str, object]]:
+        """Профили на диске, новые первыми"""
+        if not os.path.isdir(self.directory):
+            return []
+        items = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and _FILENAME.match(entry.name):
+                stat = entry.stat()
+                items.append(
+                    {
+                        "name": entry.name,
+                        "size": stat.st_size,
+                        "created_at": stat.st_mtime,
+                    }
+                )
+        items.sort(key=lambda item: item["created_at"], reverse=True)
+        return items
+
+    def save(self, collector, filename: str) -> None:
+        """Записать профиль и удалить старые файлы сверх лимитов (блокирующий вызов)"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, filename)
+        if isinstance(collector, cProfile.Profile):
+            collector.dump_stats(path)
+        else:
+            collector.dump(path)
+        self.rotate()
+
+    def rotate(self) -> None:
+        items = self.list()
+        total = sum(item["size"] for item in items)
+        while items and (len(items) > self.max_files or total > self.max_bytes):
+            oldest = items.pop()
+            total -= oldest["size"]
+            try:
+                os.remove(os.path.join(self.directory, oldest["name"]))
+            except FileNotFoundError:
+                pass
+
+    def status(self) -> Dict[str, object]:
+        items = self.list()
+        return {
+            "sample_rate": self.sample_rate,
+            "format": self.format,
+            "active": self.active,
+            "files": len(items),
+            "bytes": sum(item["size"] for item in items),
+            "max_files": self.max_files,
+            "max_bytes": self.max_bytes,
+        }
+
+
+# Глобальный профилировщик запросов
+request_profiler = RequestProfiler()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI-middleware: профилирует выбранные запросы и сохраняет профиль
+    в файл; имя файла возвращается в заголовке X-Profile. Корутины других
+    запросов, выполнявшиеся на том же цикле событий, тоже попадают в профиль.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: RequestProfiler = request_profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not self.profiler.wants(scope)
+            or not self.profiler.acquire()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        filename = None
+
+        async def send_with_profile(message: Message) -> None:
+            nonlocal filename
+            if message["type"] == "http.response.start":
+                # К началу ответа маршрут уже известен
+                filename = self.profiler.filename(scope)
+                MutableHeaders(scope=message).append(PROFILE_FILE_HEADER, filename)
+            await send(message)
+
+        if self.profiler.format == "collapsed":
+            collector = StackSampler(threading.get_ident())
+            collector.start()
+        else:
+            collector = cProfile.Profile()
+            collector.enable()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            if isinstance(collector, cProfile.Profile):
+                collector.disable()
+            else:
+                collector.stop()
+            self.profiler.release()
+            try:
+                await run_in_threadpool(
+                    self.profiler.save,
+                    collector,
+                    filename or self.profiler.filename(scope),
+                )
+            except OSError:
+                logger.exception("Не удалось сохранить профиль запроса")
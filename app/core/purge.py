@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.repositories import get_repository_manager
+
+logger = logging.getLogger(__name__)
+
+
+class SoftDeletePurger:
+    """
+    Фоновая очистка мягко удаленных пользователей.
+
+    Строки старше срока хранения удаляются небольшими пачками, каждая в своей
+    транзакции, чтобы не держать длинных блокировок.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        retention: timedelta = timedelta(days=settings.SOFT_DELETE_RETENTION_DAYS),
+        batch_size: int = settings.PURGE_BATCH_SIZE,
+        interval: float = settings.PURGE_INTERVAL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.retention = retention
+        self.batch_size = batch_size
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> int:
+        """Удалить все просроченные записи пачками, вернуть их количество"""
+        users = get_repository_manager().users
+        deleted_before = datetime.now(timezone.utc) - self.retention
+        total = 0
+
+        while True:
+            async with self.session_factory() as db:
+                purged = await users.purge_deleted(
+                    db, deleted_before, limit=self.batch_size
+                )
+            total += purged
+
+            if purged < self.batch_size:
+                return total
+
+            # Отдаем управление event loop между пачками
+            await asyncio.sleep(0)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                purged = await self.run_once()
+                if purged:
+                    logger.info("Очищено удаленных пользователей: %s", purged)
+            except Exception:
+                logger.exception("Ошибка очистки удаленных пользователей")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Запустить периодическую очистку в текущем event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить периодическую очистку"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# Глобальная задача очистки
+soft_delete_purger = SoftDeletePurger()
@@ -0,0 +1,143 @@
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.sql_events import add_sql_hook
+
+logger = logging.getLogger(__name__)
+
+# Статистика SQL текущего запроса; None - вне запроса
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+# Длина "формы" запроса в отчетах
+_SHAPE_LENGTH = 200
+
+
+def statement_shape(statement: str) -> str:
+    """Текст запроса без лишних пробелов: параметры уже вынесены в плейсхолдеры"""
+    return " ".join(statement.split())[:_SHAPE_LENGTH]
+
+
+class QueryStats:
+    """Число SQL-запросов, их суммарное время и повторяющиеся формы"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.duration += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int = 2) -> List[Tuple[str, int]]:
+        """Формы, выполненные не менее threshold раз (кандидаты в N+1)"""
+        return [
+            (shape, count)
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+    def report(self) -> str:
+        lines = [f"{self.count} SQL-запросов за {self.duration * 1000:.1f} мс"]
+        lines.extend(
+            f"  {count}x {shape}" for shape, count in self.shapes.most_common()
+        )
+        return "\n".join(lines)
+
+
+# Активные capture_queries (запросы приходят из потоков TestClient)
+_captures: List[QueryStats] = []
+_captures_lock = threading.Lock()
+
+
+def _after_sql(conn, cursor, statement, elapsed: float) -> None:
+    # Фоновые задачи (прогрев, сброс буфера активности) не учитываются
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    # capture_queries считает независимо от middleware
+    for capture in list(_captures):
+        capture.record(statement, elapsed)
+
+
+def install_query_counter() -> None:
+    """Подписаться на события выполнения SQL всех движков"""
+    add_sql_hook(after=_after_sql)
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    """
+    Считать SQL-запросы, выполненные внутри блока в любом потоке, в том
+    числе без QueryCounterMiddleware (QUERY_COUNTER_ENABLED=false).
+
+    Для тестов: TestClient обрабатывает запрос в другом потоке, куда
+    ContextVar теста не попадает.
+    """
+    install_query_counter()
+    stats = QueryStats()
+    with _captures_lock:
+        _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        with _captures_lock:
+            _captures.remove(stats)
+
+
+class QueryCounterMiddleware:
+    """
+    ASGI-middleware: считает SQL-запросы и время БД на каждый запрос.
+
+    Запросы сверх budget пишутся в лог вместе с повторяющимися формами SQL;
+    форма, повторенная repeat_threshold раз, помечается как вероятный N+1.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        budget: int = settings.QUERY_BUDGET,
+        repeat_threshold: int = settings.QUERY_REPEAT_THRESHOLD,
+    ):
+        self.app = app
+        self.budget = budget
+        self.repeat_threshold = repeat_threshold
+        install_query_counter()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+            self._check(scope, stats)
+
+    def _check(self, scope: Scope, stats: QueryStats) -> None:
+        request = f"{scope['method']} {scope['path']}"
+        repeated = stats.repeated(self.repeat_threshold)
+        if repeated:
+            logger.warning(
+                "Вероятный N+1 в %s:\n%s",
+                request,
+                "\n".join(f"  {count}x {shape}" for shape, count in repeated),
+            )
+        if stats.count > self.budget:
+            logger.warning(
+                "%s превысил бюджет запросов (%s): %s",
+                request,
+                self.budget,
+                stats.report(),
+            )
@@ -1,6 +1,8 @@
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 
+import anyio
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -8,8 +10,16 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from app.core.activity import activity_buffer
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.metrics import (
+    CallbackMetric,
+    password_hash_duration_seconds,
+    registry,
+    track_password_hash,
+)
+from app.core.timing import timed
 from app.models.user import User
 from app.schemas.token import TokenData
 
@@ -19,15 +29,98 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # Настройка OAuth2 для получения токена из заголовков
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# Потоки для bcrypt: хеширование освобождает GIL и идет параллельно,
+# не занимая цикл событий
+password_hash_limiter = anyio.CapacityLimiter(settings.PASSWORD_HASH_THREADS)
+
+
+def _hash_thread_stats():
+    stats = password_hash_limiter.statistics()
+    yield ("limit",), stats.total_tokens
+    yield ("busy",), stats.borrowed_tokens
+    yield ("waiting",), stats.tasks_waiting
+
+
+registry.register(
+    CallbackMetric(
+        "password_hash_threads",
+        "Потоки bcrypt: лимит, занятые и ожидающие операции",
+        ("state",),
+        _hash_thread_stats,
+    )
+)
+
 
 def verify_password(plain_password, hashed_password):
     """Проверяет соответствие пароля хешу"""
-    return pwd_context.verify(plain_password, hashed_password)
+    with timed("bcrypt"), track_password_hash("verify"):
+        return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password):
     """Создает хеш пароля"""
-    return pwd_context.hash(password)
+    with timed("bcrypt"), track_password_hash("hash"):
+        return pwd_context.hash(password)
+
+
+_dummy_password_hash: Optional[str] = None
+
+
+def _verify_dummy(plain_password) -> bool:
+    global _dummy_password_hash
+    if _dummy_password_hash is None:
+        _dummy_password_hash = pwd_context.hash("dummy-password")
+    pwd_context.verify(plain_password, _dummy_password_hash)
+    return False
+
+
+def dummy_verify_password(plain_password) -> bool:
+    """
+    Проверяет пароль против фиктивного хеша и всегда возвращает False.
+
+    Нужна, чтобы ответ для несуществующего email занимал столько же времени,
+    сколько проверка настоящего пароля.
+    """
+    with timed("bcrypt"), track_password_hash("verify"):
+        return _verify_dummy(plain_password)
+
+
+async def _in_hash_thread(operation: str, func, *args):
+    """
+    Выполнить bcrypt в отдельном потоке (не больше PASSWORD_HASH_THREADS
+    одновременно). Замер запроса включает ожидание потока, гистограмма
+    password_hash_duration_seconds - только само хеширование.
+    """
+
+    def run():
+        started = time.perf_counter()
+        result = func(*args)
+        return result, time.perf_counter() - started
+
+    with timed("bcrypt"):
+        result, elapsed = await anyio.to_thread.run_sync(
+            run, limiter=password_hash_limiter
+        )
+    # Метрики обновляются только из потока цикла событий
+    password_hash_duration_seconds.observe(elapsed, operation)
+    return result
+
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    """verify_password без блокировки цикла событий"""
+    return await _in_hash_thread(
+        "verify", pwd_context.verify, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password) -> str:
+    """get_password_hash без блокировки цикла событий"""
+    return await _in_hash_thread("hash", pwd_context.hash, password)
+
+
+async def dummy_verify_password_async(plain_password) -> bool:
+    """dummy_verify_password без блокировки цикла событий"""
+    return await _in_hash_thread("verify", _verify_dummy, plain_password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -45,9 +138,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
 
     # Создание JWT токена
-    encoded_jwt = jwt.encode(
-        to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
-    )
+    with timed("jwt"):
+        encoded_jwt = jwt.encode(
+            to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
+        )
 
     return encoded_jwt
 
@@ -64,9 +158,10 @@ async def get_current_user(
 
     try:
         # Декодирование токена
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        with timed("jwt"):
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
         email: str = payload.get("sub")
         user_id: int = payload.get("user_id")
 
@@ -78,7 +173,7 @@ async def get_current_user(
         raise credentials_exception
 
     # Получение пользователя из базы данных
-    stmt = select(User).where(User.id == token_data.user_id)
+    stmt = select(User).where(User.id == token_data.user_id, User.is_deleted == False)
     result = await db.execute(stmt)
     user = result.scalar_one_or_none()
 
@@ -90,4 +185,7 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN, detail="Пользователь неактивен"
         )
 
+    # Отметка активности уходит в буфер, а не отдельным UPDATE
+    activity_buffer.record_seen(user.id)
+
     return user
@@ -0,0 +1,107 @@
+import importlib.util
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+APP_PATH = "app.main:app"
+
+
+def available_cpus() -> int:
+    """CPU, доступные процессу (с учетом affinity контейнера)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def worker_count(requested: Optional[int] = None) -> int:
+    """
+    Число воркеров: явно заданное (аргумент или WEB_CONCURRENCY), иначе
+    по одному на CPU - воркер асинхронный, больше процессов на ядро не нужно.
+    """
+    requested = requested or settings.WEB_CONCURRENCY
+    if requested > 0:
+        return requested
+    return max(1, min(available_cpus(), settings.SERVER_MAX_WORKERS))
+
+
+def check_workers_config(workers: int) -> None:
+    """
+    Настройки, несовместимые с несколькими воркерами: кеш в памяти процесса
+    без шины инвалидации отдавал бы устаревшие данные после записи в другом
+    воркере, а ключи идемпотентности в памяти процесса не видны повтору,
+    попавшему в другой воркер.
+    """
+    if workers < 2:
+        return
+    if settings.CACHE_BACKEND == "memory" and settings.INVALIDATION_TRANSPORT == "none":
+        raise RuntimeError(
+            "CACHE_BACKEND=memory при нескольких воркерах требует "
+            "INVALIDATION_TRANSPORT (postgres или unix) или CACHE_BACKEND=shared"
+        )
+    if settings.IDEMPOTENCY_ENABLED:
+        raise RuntimeError(
+            "IDEMPOTENCY_ENABLED хранит ключи в памяти процесса и требует "
+            "одного воркера (WEB_CONCURRENCY=1)"
+        )
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def server_options(
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Параметры uvicorn.run для продакшн-запуска"""
+    return {
+        "host": host or settings.SERVER_HOST,
+        "port": port or settings.SERVER_PORT,
+        "workers": worker_count(workers),
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        "backlog": settings.SERVER_BACKLOG,
+        "timeout_keep_alive": settings.SERVER_KEEPALIVE,
+        # SIGTERM: сервер перестает принимать соединения, ждет запросы в
+        # обработке, затем lifespan сбрасывает буферы и останавливает задачи
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_TIMEOUT,
+        "proxy_headers": True,
+        "server_header": False,
+    }
+
+
+def run(
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> None:
+    """
+    Запустить uvicorn.
+
+    Приложение импортируется в главном процессе до старта воркеров: ошибки
+    конфигурации видны сразу, а при одном воркере он обслуживает уже
+    загруженное приложение. Несколько воркеров uvicorn запускает отдельными
+    процессами, и каждый импортирует приложение по APP_PATH.
+    """
+    import uvicorn
+
+    options = server_options(host, port, workers)
+    check_workers_config(options["workers"])
+
+    from app.main import app
+
+    logger.info(
+        "Запуск %s: %s:%s, воркеров %s, loop=%s, http=%s",
+        APP_PATH,
+        options["host"],
+        options["port"],
+        options["workers"],
+        options["loop"],
+        options["http"],
+    )
+    uvicorn.run(app if options["workers"] == 1 else APP_PATH, **options)
@@ -0,0 +1,59 @@
+import time
+from typing import Callable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Обработчики событий выполнения SQL: одна пара слушателей SQLAlchemy на все
+# подсистемы (Server-Timing, счетчик запросов, трассировка)
+_before: List[Callable] = []
+_after: List[Callable] = []
+_error: List[Callable] = []
+_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("sql_started", []).append(time.perf_counter())
+    for hook in _before:
+        hook(conn, statement)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stack = conn.info.get("sql_started")
+    if not stack:
+        return
+    elapsed = time.perf_counter() - stack.pop()
+    for hook in _after:
+        hook(conn, cursor, statement, elapsed)
+
+
+def _handle_error(exception_context) -> None:
+    conn = exception_context.connection
+    stack = conn.info.get("sql_started") if conn is not None else None
+    if stack:
+        stack.pop()
+    for hook in _error:
+        hook(exception_context)
+
+
+def add_sql_hook(
+    before: Optional[Callable] = None,
+    after: Optional[Callable] = None,
+    error: Optional[Callable] = None,
+) -> None:
+    """
+    Подключить обработчики выполнения SQL всех движков.
+
+    before(conn, statement) - перед запросом; after(conn, cursor, statement,
+    elapsed) - после, с длительностью в секундах; error(exception_context) -
+    при ошибке драйвера.
+    """
+    global _installed
+    if not _installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+        _installed = True
+    for hooks, hook in ((_before, before), (_after, after), (_error, error)):
+        if hook is not None and hook not in hooks:
+            hooks.append(hook)
@@ -0,0 +1,166 @@
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.sql_events import add_sql_hook
+
+logger = logging.getLogger(__name__)
+
+# Замеры текущего запроса; None - замер выключен или вне запроса
+_current: ContextVar[Optional["RequestTimings"]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+class RequestTimings:
+    """Суммарные длительности и число вызовов по фазам одного запроса"""
+
+    __slots__ = ("phases", "started")
+
+    def __init__(self):
+        self.phases: Dict[str, List[float]] = {}
+        self.started = time.perf_counter()
+
+    def add(self, name: str, seconds: float) -> None:
+        phase = self.phases.get(name)
+        if phase is None:
+            self.phases[name] = [seconds, 1]
+        else:
+            phase[0] += seconds
+            phase[1] += 1
+
+    def header(self, total: float) -> str:
+        """Значение заголовка Server-Timing (длительности в мс)"""
+        parts = [
+            f'{name};dur={seconds * 1000:.2f};desc="x{count}"'
+            for name, (seconds, count) in self.phases.items()
+        ]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+    def as_dict(self, total: float) -> Dict[str, object]:
+        return {
+            "total_ms": round(total * 1000, 2),
+            "phases": {
+                name: {"ms": round(seconds * 1000, 2), "count": count}
+                for name, (seconds, count) in self.phases.items()
+            },
+        }
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+class timed:
+    """
+    Контекст замера фазы: with timed("bcrypt"): ...
+
+    Вне запроса с включенным Server-Timing стоит одно чтение ContextVar.
+    """
+
+    __slots__ = ("name", "timings", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> "timed":
+        self.timings = _current.get()
+        if self.timings is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.timings is not None:
+            self.timings.add(self.name, time.perf_counter() - self.started)
+
+
+def _after_sql(conn, cursor, statement, elapsed: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.add("sql", elapsed)
+
+
+def _do_orm_execute(orm_execute_state) -> None:
+    # Соединение сессия берет из пула при первом запросе транзакции
+    session = orm_execute_state.session
+    if _current.get() is not None and not session.in_transaction():
+        session.info["timing_pool_started"] = time.perf_counter()
+
+
+def _after_begin(session, transaction, connection) -> None:
+    started = session.info.pop("timing_pool_started", None)
+    timings = _current.get()
+    if timings is not None and started is not None:
+        timings.add("db_pool", time.perf_counter() - started)
+
+
+_sql_timing_installed = False
+
+
+def install_sql_timing() -> None:
+    """Подписаться на события SQLAlchemy для фаз sql и db_pool"""
+    global _sql_timing_installed
+    if _sql_timing_installed:
+        return
+    add_sql_hook(after=_after_sql)
+    event.listen(Session, "do_orm_execute", _do_orm_execute)
+    event.listen(Session, "after_begin", _after_begin)
+    _sql_timing_installed = True
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI-middleware: собирает фазы запроса (timed, события SQLAlchemy)
+    и добавляет заголовок Server-Timing; при log=True пишет их в лог.
+    """
+
+    def __init__(self, app: ASGIApp, log: bool = settings.SERVER_TIMING_LOG):
+        self.app = app
+        self.log = log
+        install_sql_timing()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        status_code = None
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    timings.header(time.perf_counter() - timings.started),
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if self.log:
+                logger.info(
+                    "request timing %s",
+                    json.dumps(
+                        {
+                            "method": scope["method"],
+                            "path": scope["path"],
+                            "status": status_code,
+                            **timings.as_dict(time.perf_counter() - timings.started),
+                        }
+                    ),
+                )
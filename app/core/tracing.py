@@ -0,0 +1,415 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy.engine import Row
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import route_template
+from app.core.sql_events import add_sql_hook
+
+logger = logging.getLogger(__name__)
+
+# Текущий span; None - трассировка выключена, запрос не попал в выборку или вне запроса
+_current: ContextVar[Optional["Span"]] = ContextVar("trace_span", default=None)
+
+# Длина SQL в атрибуте db.statement
+_STATEMENT_LENGTH = 1000
+
+# Виды span в терминах OTLP
+_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    """Участок трассы: имя, слой, время и атрибуты"""
+
+    __slots__ = (
+        "trace",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "name",
+        "kind",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "error",
+    )
+
+    def __init__(
+        self,
+        trace: List["Span"],
+        trace_id: str,
+        parent_id: Optional[str],
+        name: str,
+        kind: str = "internal",
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.trace = trace
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.error: Optional[str] = None
+
+    def child(self, name: str, kind: str = "internal", **attributes: Any) -> "Span":
+        return Span(self.trace, self.trace_id, self.span_id, name, kind, attributes)
+
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+        self.trace.append(self)
+
+    def as_json(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+    def as_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": _KINDS[self.kind],
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class FileSpanExporter:
+    """
+    Запись завершенных трасс в файл фоновым потоком.
+
+    jsonl - строка на span; otlp - строка на трассу в формате
+    ExportTraceServiceRequest (как у file exporter OpenTelemetry Collector).
+    Очередь на запись ограничена queue_size (лишние трассы отбрасываются,
+    счетчик dropped), файл больше max_bytes переименовывается в path.1.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.TRACING_FILE,
+        format: str = settings.TRACING_FORMAT,
+        max_bytes: int = settings.TRACING_MAX_BYTES,
+        queue_size: int = settings.TRACING_QUEUE_SIZE,
+    ):
+        self.path = path
+        self.format = format
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        # Трассы на запись или Event от flush()
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Дождаться записи всех переданных трасс"""
+        if self._thread is not None:
+            done = threading.Event()
+            self._queue.put(done, timeout=5)
+            done.wait(timeout=5)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            try:
+                self._write(item)
+            except OSError:
+                logger.exception("Не удалось записать трассу")
+
+    def _lines(self, spans: List[Span]) -> Iterator[str]:
+        if self.format == "otlp":
+            yield json.dumps(
+                {
+                    "resourceSpans": [
+                        {
+                            "resource": {
+                                "attributes": [
+                                    _otlp_attribute(
+                                        "service.name", settings.PROJECT_NAME
+                                    )
+                                ]
+                            },
+                            "scopeSpans": [
+                                {
+                                    "scope": {"name": "app"},
+                                    "spans": [span.as_otlp() for span in spans],
+                                }
+                            ],
+                        }
+                    ]
+                },
+                ensure_ascii=False,
+            )
+        else:
+            for span in spans:
+                yield json.dumps(span.as_json(), ensure_ascii=False)
+
+    def _write(self, spans: List[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as file:
+            for line in self._lines(spans):
+                file.write(line + "\n")
+            size = file.tell()
+        if size > self.max_bytes:
+            os.replace(self.path, f"{self.path}.1")
+
+
+# Глобальный экспортер трасс
+span_exporter = FileSpanExporter()
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+@contextmanager
+def start_span(
+    name: str, kind: str = "internal", **attributes: Any
+) -> Iterator[Optional[Span]]:
+    """
+    Дочерний span текущего; вне трассы - одно чтение ContextVar и None.
+    """
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    span = parent.child(name, kind, **attributes)
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.error = exc.__class__.__name__
+        raise
+    finally:
+        _current.reset(token)
+        span.end()
+
+
+def _rows(result: Any) -> Optional[int]:
+    """Число строк результата метода; None - результат не строки"""
+    if result is None:
+        return 0
+    if isinstance(result, Row):
+        return 1
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    if isinstance(result, (bool, int, float, str, dict)):
+        return None
+    return 1
+
+
+def instrument(obj: Any, layer: str) -> Any:
+    """
+    Обернуть публичные async-методы объекта в span слоя layer.
+
+    Обертки ставятся на экземпляр, поэтому вызовы через self (например,
+    create_user -> get_by_id_with_profile) тоже видны как вложенные span.
+    """
+    prefix = type(obj).__name__
+    for name in dir(obj):
+        if name.startswith("_"):
+            continue
+        method = getattr(obj, name, None)
+        if inspect.iscoroutinefunction(method):
+            setattr(obj, name, _traced(method, f"{prefix}.{name}", layer))
+    return obj
+
+
+def _traced(method, name: str, layer: str):
+    @functools.wraps(method)
+    async def traced(*args, **kwargs):
+        if _current.get() is None:
+            return await method(*args, **kwargs)
+        with start_span(name, layer=layer) as span:
+            result = await method(*args, **kwargs)
+            rows = _rows(result)
+            if rows is not None:
+                span.attributes["result.rows"] = rows
+            return result
+
+    return traced
+
+
+def _before_sql(conn, statement) -> None:
+    parent = _current.get()
+    if parent is not None:
+        span = parent.child(
+            "db.query",
+            "client",
+            layer="db",
+            **{
+                "db.system": conn.dialect.name,
+                "db.statement": " ".join(statement.split())[:_STATEMENT_LENGTH],
+            },
+        )
+        conn.info.setdefault("trace_spans", []).append(span)
+
+
+def _after_sql(conn, cursor, statement, elapsed: float) -> None:
+    stack = conn.info.get("trace_spans")
+    if _current.get() is not None and stack:
+        span = stack.pop()
+        # Для SELECT драйверы обычно не знают число строк до выборки (-1)
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            span.attributes["db.rowcount"] = cursor.rowcount
+        span.end()
+
+
+def _handle_error(exception_context) -> None:
+    conn = exception_context.connection
+    stack = conn.info.get("trace_spans") if conn is not None else None
+    if stack:
+        span = stack.pop()
+        span.error = exception_context.original_exception.__class__.__name__
+        span.end()
+
+
+def install_db_tracing() -> None:
+    """Подписаться на события SQLAlchemy для span слоя БД"""
+    add_sql_hook(before=_before_sql, after=_after_sql, error=_handle_error)
+
+
+def _parse_traceparent(scope: Scope):
+    """(trace_id, parent_id, sampled) входящего traceparent или None"""
+    for name, value in scope["headers"]:
+        if name == b"traceparent":
+            match = _TRACEPARENT.match(value.decode("latin-1"))
+            if match:
+                return match.group(1), match.group(2), int(match.group(3), 16) & 1
+    return None
+
+
+class TracingMiddleware:
+    """
+    ASGI-middleware: корневой span запроса (слой api) и экспорт трассы.
+
+    Решение о выборке принимается здесь: по флагу входящего traceparent от
+    доверенных адресов (trusted_peers), иначе с вероятностью sample_rate -
+    клиент не может включить трассировку каждого своего запроса. trace_id
+    входящего traceparent продолжается в любом случае. Запросы вне выборки
+    идут без span.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: float = settings.TRACING_SAMPLE_RATE,
+        exporter: FileSpanExporter = span_exporter,
+        trusted_peers: Sequence[str] = settings.TRACING_TRUSTED_PEERS,
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self.trusted_peers = frozenset(trusted_peers)
+        install_db_tracing()
+
+    def _trusted(self, scope: Scope) -> bool:
+        client = scope.get("client")
+        return client is not None and client[0] in self.trusted_peers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = _parse_traceparent(scope)
+        if incoming is not None:
+            trace_id, parent_id, sampled = incoming
+            if not self._trusted(scope):
+                sampled = random.random() < self.sample_rate
+        else:
+            trace_id, parent_id = os.urandom(16).hex(), None
+            sampled = random.random() < self.sample_rate
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        trace: List[Span] = []
+        root = Span(
+            trace,
+            trace_id,
+            parent_id,
+            scope["path"],
+            "server",
+            {
+                "layer": "api",
+                "http.method": scope["method"],
+                "http.target": scope["path"],
+            },
+        )
+
+        async def send_with_trace(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                MutableHeaders(scope=message).append(
+                    "traceparent", f"00-{trace_id}-{root.span_id}-01"
+                )
+            await send(message)
+
+        token = _current.set(root)
+        try:
+            await self.app(scope, receive, send_with_trace)
+        except BaseException as exc:
+            root.error = exc.__class__.__name__
+            raise
+        finally:
+            _current.reset(token)
+            route = route_template(scope)
+            root.name = f"{scope['method']} {route}"
+            root.attributes["http.route"] = route
+            root.end()
+            self.exporter.export(trace)
@@ -0,0 +1,177 @@
+import asyncio
+import gzip
+import json
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+from fastapi import FastAPI, Request, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.compression import negotiate_encoding
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.repositories import get_repository_manager
+
+logger = logging.getLogger(__name__)
+
+
+class PrecompressedDocument:
+    """JSON-документ, сериализованный и сжатый один раз"""
+
+    def __init__(self, content: dict):
+        self.body = json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, compresslevel=9)
+
+    def response(self, request: Request) -> Response:
+        headers = {"Vary": "Accept-Encoding"}
+        accept_encoding = request.headers.get("accept-encoding", "")
+        if negotiate_encoding(accept_encoding, ("gzip",)) == "gzip":
+            headers["Content-Encoding"] = "gzip"
+            return Response(
+                self.gzip_body, media_type="application/json", headers=headers
+            )
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+class Warmup:
+    """
+    Прогрев воркера после старта.
+
+    Открывает соединения пула, выполняет типовые запросы репозиториев
+    (компиляция SQL и подготовленные выражения) и строит сжатый OpenAPI.
+    Пока прогрев не закончен, эндпоинт готовности отвечает 503.
+
+    Шаги с БД повторяются с растущей задержкой, пока не пройдут: воркер без
+    базы не готов. Ошибка сборки OpenAPI готовность не блокирует - документ
+    построится при первом запросе.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine = engine,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        pool_connections: int = settings.WARMUP_POOL_CONNECTIONS,
+        retry_delay: float = settings.WARMUP_RETRY_DELAY,
+        retry_max_delay: float = settings.WARMUP_RETRY_MAX_DELAY,
+    ):
+        self.engine = engine
+        self.session_factory = session_factory
+        self.pool_connections = pool_connections
+        self.retry_delay = retry_delay
+        self.retry_max_delay = retry_max_delay
+        self.ready = False
+        self.duration: Optional[float] = None
+        self.errors: List[str] = []
+        self.openapi: Optional[PrecompressedDocument] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    async def run(self, app: FastAPI) -> None:
+        """Выполнить все шаги прогрева"""
+        started = time.perf_counter()
+
+        delay = self.retry_delay
+        while not (
+            await self._run_step("pool", self._open_connections)
+            and await self._run_step("queries", self._prime_queries)
+        ):
+            logger.warning("Повтор прогрева через %.1f с", delay)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            if self._stopping:
+                return
+            delay = min(delay * 2, self.retry_max_delay)
+            # В статусе - только ошибки последней попытки
+            self.errors = []
+
+        await self._run_step("openapi", lambda: self._build_openapi(app))
+
+        self.duration = time.perf_counter() - started
+        self.ready = True
+        logger.info("Прогрев завершен за %.3f с", self.duration)
+
+    async def _run_step(self, name: str, step) -> bool:
+        try:
+            await step()
+        except Exception as exc:
+            logger.exception("Шаг прогрева %s завершился ошибкой", name)
+            self.errors.append(f"{name}: {exc.__class__.__name__}")
+            return False
+        return True
+
+    async def _open_connections(self) -> None:
+        # Соединения держатся одновременно, чтобы пул действительно их создал
+        connections = []
+        try:
+            for _ in range(self.pool_connections):
+                connection = await self.engine.connect()
+                connections.append(connection)
+                await connection.execute(text("SELECT 1"))
+        finally:
+            for connection in connections:
+                await connection.close()
+
+    async def _prime_queries(self) -> None:
+        repos = get_repository_manager()
+        async with self.session_factory() as db:
+            await repos.users.get_by_id(db, 0)
+            await repos.users.get_by_email(db, "warmup@example.invalid")
+            await repos.users.get_by_id_with_profile(db, 0)
+            await repos.users.get_active_users(db, limit=1)
+            await repos.profiles.get_by_user_id(db, 0)
+            await repos.profiles.get_version_by_user_id(db, 0)
+
+    async def _build_openapi(self, app: FastAPI) -> None:
+        self.openapi = PrecompressedDocument(app.openapi())
+
+    def start(self, app: FastAPI) -> None:
+        """Запустить прогрев в фоне, не блокируя прием запросов"""
+        self.ready = False
+        self.errors = []
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self.run(app))
+
+    async def stop(self) -> None:
+        """
+        Остановить прогрев. Текущий шаг дорабатывает до конца: отмена посреди
+        запроса оставляет соединение пула в неопределенном состоянии.
+        """
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+        self._task = None
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "status": "ready" if self.ready else "warming_up",
+            "duration": round(self.duration, 3) if self.duration is not None else None,
+            "errors": self.errors,
+        }
+
+
+def install_precompressed_openapi(app: FastAPI) -> None:
+    """Заменить стандартный /openapi.json на отдачу заранее сжатого документа"""
+    app.router.routes = [
+        route
+        for route in app.router.routes
+        if getattr(route, "path", None) != app.openapi_url
+    ]
+
+    @app.get(app.openapi_url, include_in_schema=False)
+    async def openapi(request: Request) -> Response:
+        if warmup.openapi is None:
+            warmup.openapi = PrecompressedDocument(app.openapi())
+        return warmup.openapi.response(request)
+
+
+# Глобальное состояние прогрева
+warmup = Warmup()
@@ -1,11 +1,66 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.activity import activity_buffer
+from app.core.admission import AdmissionMiddleware
+from app.core.body_limit import BodySizeLimitMiddleware
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
-from app.api import auth, users, profiles
+from app.core.database import engine
+from app.core.email_filter import email_filter
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.metrics import MetricsMiddleware
+from app.core.invalidation import invalidation_bus
+from app.core.loop_monitor import loop_monitor
+from app.core.profiling import ProfilingMiddleware
+from app.core.purge import soft_delete_purger
+from app.core.query_counter import QueryCounterMiddleware
+from app.core.timing import ServerTimingMiddleware
+from app.core.tracing import TracingMiddleware, span_exporter
+from app.core.warmup import install_precompressed_openapi, warmup
+from app.api import auth, users, profiles, health, memory, metrics, profiling
+from app.services.avatar_service import avatar_storage
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Запуск и остановка фоновых задач приложения"""
+    try:
+        await email_filter.build()
+    except Exception:
+        # Без фильтра все email считаются "возможно существующими"
+        logger.exception("Не удалось построить фильтр email")
+
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    await invalidation_bus.start()
+    warmup.start(app)
+    activity_buffer.start()
+    soft_delete_purger.start()
+    try:
+        yield
+    finally:
+        await loop_monitor.stop()
+        await warmup.stop()
+        await soft_delete_purger.stop()
+        avatar_storage.shutdown()
+        # Дренируем буфер активности при штатной остановке
+        await activity_buffer.stop()
+        await invalidation_bus.stop()
+        await engine.dispose()
+        if settings.TRACING_ENABLED:
+            span_exporter.flush()
+
 
 # Создание экземпляра FastAPI
-app = FastAPI(title=settings.PROJECT_NAME, version=settings.PROJECT_VERSION)
+app = FastAPI(
+    title=settings.PROJECT_NAME, version=settings.PROJECT_VERSION, lifespan=lifespan
+)
 
 # Настройка CORS
 app.add_middleware(
@@ -16,10 +71,59 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Число SQL-запросов на запрос, бюджет и поиск N+1
+if settings.QUERY_COUNTER_ENABLED:
+    app.add_middleware(QueryCounterMiddleware)
+
+# Профилирование по выборке или подписанному заголовку (включается админом)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Лимиты по классам маршрутов: при перегрузке 503 до профилирования и работы с БД
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
+
+# Повторы регистрации и смены пароля по Idempotency-Key (снаружи лимитов:
+# повтор и ожидание первого запроса не занимают место в классе cpu)
+if settings.IDEMPOTENCY_ENABLED:
+    app.add_middleware(IdempotencyMiddleware)
+
+# Сжатие ответов (gzip / br / zstd по Accept-Encoding); снаружи идемпотентности,
+# чтобы повтор с другим Accept-Encoding получил сохраненный ответ в своем сжатии
+app.add_middleware(CompressionMiddleware)
+
+# Метрики запросов для /metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Лимит тела загрузок: 413 по Content-Length, до чтения файла
+app.add_middleware(BodySizeLimitMiddleware)
+
+# Трассировка по слоям с выборкой и записью в файл
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
+# Разбивка времени запроса по фазам (внешний слой, чтобы учесть и сжатие)
+if settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+
 # Включение маршрутов API
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(profiles.router, prefix="/api/profiles", tags=["profiles"])
+app.include_router(health.router, prefix="/health", tags=["health"])
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router, tags=["metrics"])
+if settings.PROFILING_ENABLED:
+    app.include_router(
+        profiling.router, prefix="/api/admin/profiling", tags=["profiling"]
+    )
+# Диагностика памяти подключается только явно: без нее нет и накладных расходов
+if settings.MEMORY_DIAGNOSTICS_ENABLED:
+    app.include_router(memory.router, prefix="/api/admin/memory", tags=["memory"])
+
+# OpenAPI строится при прогреве и отдается уже сжатым
+install_precompressed_openapi(app)
 
 
 @app.get("/")
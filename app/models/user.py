@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, SmallInteger, String, DateTime, event, false, true
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -13,10 +13,27 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
+    # Обновляются пакетно через app.core.activity, а не в пути запроса
+    last_login_at = Column(DateTime(timezone=True), nullable=True)
+    last_seen_at = Column(DateTime(timezone=True), nullable=True)
+    # Мягкое удаление: строки физически удаляет фоновая очистка
+    is_deleted = Column(Boolean, default=False, server_default=false(), nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
     
     # Отношение один-к-одному с профилем
     profile = relationship("Profile", uselist=False, back_populates="user", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Частичный индекс "надгробий" для фоновой очистки; поиск живых
+        # строк по email идет по уникальному индексу email
+        Index(
+            "ix_users_deleted_at",
+            "deleted_at",
+            postgresql_where=is_deleted == true(),
+            sqlite_where=is_deleted == true(),
+        ),
+    )
     
 class Profile(Base):
     __tablename__ = "profiles"
@@ -27,8 +44,31 @@ class Profile(Base):
     last_name = Column(String, nullable=True)
     bio = Column(String, nullable=True)
     avatar_url = Column(String, nullable=True)
+    # Процент заполненности, пересчитывается при каждой записи профиля
+    completeness_score = Column(
+        SmallInteger, default=0, server_default="0", nullable=False, index=True
+    )
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Обратное отношение к пользователю
-    user = relationship("User", back_populates="profile")
\ No newline at end of file
+    user = relationship("User", back_populates="profile")
+
+    def compute_completeness(self) -> int:
+        """Процент заполненных полей из PROFILE_COMPLETENESS_FIELDS"""
+        filled = sum(
+            1
+            for field in PROFILE_COMPLETENESS_FIELDS
+            if (getattr(self, field) or "").strip()
+        )
+        return filled * 100 // len(PROFILE_COMPLETENESS_FIELDS)
+
+
+# Поля профиля, учитываемые в completeness_score
+PROFILE_COMPLETENESS_FIELDS = ("first_name", "last_name", "bio", "avatar_url")
+
+
+@event.listens_for(Profile, "before_insert")
+@event.listens_for(Profile, "before_update")
+def _update_completeness_score(mapper, connection, target):
+    target.completeness_score = target.compute_completeness()
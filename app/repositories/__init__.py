@@ -3,6 +3,16 @@ from app.repositories.base import (
     CRUDRepository,
     MultiCollectionRepository,
 )
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.core.invalidation import invalidation_bus
+from app.core.tracing import instrument
+from app.repositories.cache import (
+    CachedProfileRepository,
+    CachedUserRepository,
+    create_cache_backend,
+)
 from app.repositories.user import UserRepository, ProfileRepository
 
 
@@ -11,9 +21,40 @@ class RepositoryManager(MultiCollectionRepository):
 
     def __init__(self):
         super().__init__()
-        # Инициализация всех репозиториев
-        self.add_repository("users", UserRepository())
-        self.add_repository("profiles", ProfileRepository())
+        # Инициализация всех репозиториев (с кешем, если он включен)
+        self.cache = create_cache_backend()
+        if self.cache is not None:
+            self.add_repository("users", CachedUserRepository(self.cache))
+            self.add_repository("profiles", CachedProfileRepository(self.cache))
+            invalidation_bus.subscribe(self.handle_invalidation, self.reset_cache)
+        else:
+            self.add_repository("users", UserRepository())
+            self.add_repository("profiles", ProfileRepository())
+
+        if settings.TRACING_ENABLED:
+            for repository in self._repositories.values():
+                instrument(repository, "repository")
+
+    async def handle_invalidation(self, events: Dict[str, List[int]]) -> None:
+        """Сбросить кеш сущностей, измененных в другом воркере"""
+        for user_id in events.get("user", []):
+            await self.users.forget_user(user_id)
+            await self.profiles.forget_user(user_id)
+        for profile_id in events.get("profile", []):
+            await self.profiles.forget_profile(profile_id)
+
+    async def reset_cache(self) -> None:
+        """Полностью очистить кеш (события могли быть потеряны)"""
+        if self.cache is not None:
+            await self.cache.clear()
+
+    def get_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Статистика попаданий кеша по репозиториям"""
+        return {
+            name: repository.stats.as_dict()
+            for name, repository in self._repositories.items()
+            if hasattr(repository, "stats")
+        }
 
     # Свойства для удобного доступа к репозиториям
     @property
@@ -12,11 +12,34 @@ from app.models.user import User, Profile
 class AdvancedUserRepository(
     CRUDRepository[User], FilterMixin, CountMixin, BulkOperationsMixin
 ):
-    """Расширенный репозиторий пользователей с дополнительными возможностями"""
+    """
+    Расширенный репозиторий пользователей с дополнительными возможностями.
+
+    Мягко удаленные пользователи (is_deleted) не возвращаются и не считаются.
+    """
 
     def __init__(self):
         super().__init__(User)
 
+    async def count_all(self, db: AsyncSession) -> int:
+        """Подсчет неудаленных пользователей"""
+        stmt = select(func.count(User.id)).where(User.is_deleted == False)
+        result = await db.execute(stmt)
+        return result.scalar()
+
+    async def count_by_field(
+        self, db: AsyncSession, field_name: str, field_value: Any
+    ) -> int:
+        """Подсчет неудаленных пользователей по значению поля"""
+        if not hasattr(User, field_name):
+            return 0
+
+        stmt = select(func.count(User.id)).where(
+            getattr(User, field_name) == field_value, User.is_deleted == False
+        )
+        result = await db.execute(stmt)
+        return result.scalar()
+
     async def get_users_with_profiles(
         self,
         db: AsyncSession,
@@ -25,7 +48,11 @@ class AdvancedUserRepository(
         include_inactive: bool = False,
     ) -> List[User]:
         """Получить пользователей с профилями"""
-        stmt = select(User).options(selectinload(User.profile))
+        stmt = (
+            select(User)
+            .options(selectinload(User.profile))
+            .where(User.is_deleted == False)
+        )
 
         if not include_inactive:
             stmt = stmt.where(User.is_active == True)
@@ -51,7 +78,7 @@ class AdvancedUserRepository(
         if not conditions:
             return []
 
-        stmt = select(User).where(or_(*conditions))
+        stmt = select(User).where(or_(*conditions), User.is_deleted == False)
         result = await db.execute(stmt)
         return result.scalars().all()
 
@@ -60,7 +87,8 @@ class AdvancedUserRepository(
     ) -> List[User]:
         """Получить пользователей, зарегистрированных в определенный период"""
         stmt = select(User).where(
-            and_(User.created_at >= start_date, User.created_at <= end_date)
+            and_(User.created_at >= start_date, User.created_at <= end_date),
+            User.is_deleted == False,
         )
         result = await db.execute(stmt)
         return result.scalars().all()
@@ -74,7 +102,7 @@ class AdvancedUserRepository(
         # Пользователи, зарегистрированные за последние 30 дней
         thirty_days_ago = datetime.utcnow() - timedelta(days=30)
         recent_users_stmt = select(func.count(User.id)).where(
-            User.created_at >= thirty_days_ago
+            User.created_at >= thirty_days_ago, User.is_deleted == False
         )
         result = await db.execute(recent_users_stmt)
         recent_users = result.scalar()
@@ -97,7 +125,7 @@ class AdvancedUserRepository(
         """Поиск пользователей по критериям профиля"""
         stmt = select(User).options(selectinload(User.profile)).join(Profile)
 
-        conditions = []
+        conditions = [User.is_deleted == False]
 
         if has_avatar is not None:
             if has_avatar:
@@ -118,8 +146,7 @@ class AdvancedUserRepository(
         if first_name:
             conditions.append(Profile.first_name.ilike(f"%{first_name}%"))
 
-        if conditions:
-            stmt = stmt.where(and_(*conditions))
+        stmt = stmt.where(and_(*conditions))
 
         result = await db.execute(stmt)
         return result.scalars().all()
@@ -0,0 +1,469 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+
+from app.core.config import settings
+from app.core.invalidation import invalidation_bus
+from app.core.timing import timed
+from app.models.user import User, Profile
+from app.repositories.mixins import BulkOperationsMixin
+from app.repositories.user import UserRepository, ProfileRepository
+
+
+class CacheBackend(ABC):
+    """Абстрактное хранилище кеша сущностей"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: Any) -> None:
+        pass
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        pass
+
+    @abstractmethod
+    async def clear(self) -> None:
+        pass
+
+
+class LRUCache(CacheBackend):
+    """Кеш в памяти процесса: LRU-вытеснение и TTL"""
+
+    def __init__(
+        self,
+        max_size: int = settings.CACHE_MAX_ENTRIES,
+        ttl: float = settings.CACHE_TTL_SECONDS,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def clear(self) -> None:
+        self._data.clear()
+
+
+class LocalSharedClient:
+    """
+    Локальная замена клиента общего кеша (подмножество API redis.asyncio).
+
+    Используется в тестах и при запуске без Redis.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[float, bytes]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return item[1]
+
+    async def set(self, key: str, value: bytes, ex: int) -> None:
+        self._data[key] = (time.monotonic() + ex, value)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def flushdb(self) -> None:
+        self._data.clear()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Значение {type(value).__name__} не сериализуется в кеш")
+
+
+class SharedCache(CacheBackend):
+    """
+    Общий для воркеров кеш поверх redis-совместимого клиента.
+
+    Значения хранятся в JSON, а не pickle: данные из общего хранилища не
+    должны исполняться при чтении. Даты пишутся строками ISO 8601 и
+    восстанавливаются в _restore.
+    """
+
+    def __init__(self, client: Any, ttl: float = settings.CACHE_TTL_SECONDS):
+        self.client = client
+        self.ttl = int(ttl)
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any) -> None:
+        await self.client.set(
+            key, json.dumps(value, default=_json_default).encode(), ex=self.ttl
+        )
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*keys)
+
+    async def clear(self) -> None:
+        await self.client.flushdb()
+
+
+class CacheStats:
+    """Счетчики попаданий кеша одного репозитория"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hit_ratio, 4),
+        }
+
+
+def _snapshot(obj: Any) -> Dict[str, Any]:
+    """Значения колонок ORM-объекта"""
+    return {
+        attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs
+    }
+
+
+def _restore(model: Any, data: Dict[str, Any]) -> Any:
+    """Восстановить detached-объект из снимка"""
+    values = dict(data)
+    for column in inspect(model).columns:
+        value = values.get(column.key)
+        # Снимок из общего кеша: даты пришли строками ISO 8601
+        if isinstance(value, str) and isinstance(column.type, DateTime):
+            values[column.key] = datetime.fromisoformat(value)
+    obj = model(**values)
+    make_transient_to_detached(obj)
+    return obj
+
+
+async def _attach(db: AsyncSession, model: Any, data: Dict[str, Any]) -> Optional[Any]:
+    """
+    Объект снимка в текущей сессии.
+
+    Экземпляр, уже загруженный в сессию (например, current_user), возвращается
+    как есть: снимок из кеша никогда не перезаписывает его значения. None -
+    экземпляр в сессии есть, но его колонки истекли, нужно читать из БД.
+    """
+    existing = db.identity_map.get(identity_key(model, data["id"]))
+    if existing is not None:
+        expired = inspect(existing).expired_attributes.intersection(data)
+        return None if expired else existing
+    return await db.merge(_restore(model, data), load=False)
+
+
+class CachedRepositoryMixin:
+    """
+    Read-through кеш поверх CRUDRepository.
+
+    В кеше лежат снимки колонок, а не ORM-объекты: при попадании объект
+    вливается в текущую сессию через merge(load=False) без обращения к БД,
+    если его там еще нет. Записи через репозиторий инвалидируют затронутые
+    ключи после коммита.
+    """
+
+    def __init__(self, backend: CacheBackend, namespace: str):
+        super().__init__()
+        self.cache = backend
+        self.namespace = namespace
+        self.stats = CacheStats()
+
+    def _key(self, *parts: Any) -> str:
+        return ":".join([self.namespace, *(str(part) for part in parts)])
+
+    async def _load(self, db: AsyncSession, key: str) -> Optional[Any]:
+        with timed("cache"):
+            data = await self.cache.get(key)
+        obj = None
+        if data is not None and self._is_visible(data):
+            obj = await _attach(db, self.model, data)
+        if obj is None:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        return obj
+
+    def _is_visible(self, data: Dict[str, Any]) -> bool:
+        """Вернул бы get_by_id этот объект (снимок мог прийти из get_by_field)"""
+        return True
+
+    def _invalidation_keys(self, obj: Any) -> List[str]:
+        return [self._key("id", obj.id)]
+
+    def _owner_user_id(self, obj: Any) -> Optional[int]:
+        """Пользователь, к которому относится объект (для шины инвалидации)"""
+        return obj.id
+
+    async def invalidate(self, obj: Any) -> None:
+        """Сбросить закешированные представления объекта во всех воркерах"""
+        if obj is None:
+            return
+
+        await self.cache.delete(*self._invalidation_keys(obj))
+
+        user_id = self._owner_user_id(obj)
+        if user_id is not None:
+            invalidation_bus.publish("user", user_id)
+
+    async def get_by_id(self, db: AsyncSession, id: Any) -> Optional[Any]:
+        key = self._key("id", id)
+        cached = await self._load(db, key)
+        if cached is not None:
+            return cached
+
+        db_obj = await super().get_by_id(db, id)
+        if db_obj is not None:
+            await self.cache.set(key, _snapshot(db_obj))
+        return db_obj
+
+    async def get_by_field(
+        self, db: AsyncSession, field_name: str, field_value: Any
+    ) -> Optional[Any]:
+        # Поле -> id; по id берется снимок и сверяется значение поля,
+        # так что устаревшее соответствие просто дает промах
+        field_key = self._key("field", field_name, field_value)
+        obj_id = await self.cache.get(field_key)
+
+        if obj_id is not None:
+            data = await self.cache.get(self._key("id", obj_id))
+            if data is not None and data.get(field_name) == field_value:
+                obj = await _attach(db, self.model, data)
+                if obj is not None:
+                    self.stats.hits += 1
+                    return obj
+
+        self.stats.misses += 1
+        db_obj = await super().get_by_field(db, field_name, field_value)
+        if db_obj is not None:
+            await self.cache.set(self._key("id", db_obj.id), _snapshot(db_obj))
+            await self.cache.set(field_key, db_obj.id)
+        return db_obj
+
+    async def create(self, db: AsyncSession, *, obj_in: Any) -> Any:
+        db_obj = await super().create(db, obj_in=obj_in)
+        await self.invalidate(db_obj)
+        return db_obj
+
+    async def update(self, db: AsyncSession, *, db_obj: Any, obj_in: Any) -> Any:
+        db_obj = await super().update(db, db_obj=db_obj, obj_in=obj_in)
+        await self.invalidate(db_obj)
+        return db_obj
+
+    async def remove(self, db: AsyncSession, *, id: Any) -> Optional[Any]:
+        db_obj = await super().remove(db, id=id)
+        await self.invalidate(db_obj)
+        return db_obj
+
+
+class CachedUserRepository(CachedRepositoryMixin, UserRepository, BulkOperationsMixin):
+    """Репозиторий пользователей с read-through кешем"""
+
+    def __init__(self, backend: CacheBackend):
+        super().__init__(backend, "users")
+
+    def _invalidation_keys(self, obj: Any) -> List[str]:
+        return [
+            self._key("id", obj.id),
+            self._key("with_profile", obj.id),
+            # Профиль удаленного пользователя не должен находиться по user_id
+            f"profiles:field:user_id:{obj.id}",
+        ]
+
+    def _is_visible(self, data: Dict[str, Any]) -> bool:
+        return not data.get("is_deleted")
+
+    async def forget_user(self, user_id: int) -> None:
+        """Сбросить локальный кеш пользователя по событию другого воркера"""
+        await self.cache.delete(*self._invalidation_keys(User(id=user_id)))
+
+    async def get_by_id_with_profile(self, db: AsyncSession, id: int) -> Optional[User]:
+        key = self._key("with_profile", id)
+        with timed("cache"):
+            data = await self.cache.get(key)
+
+        if data is not None and self._is_visible(data["user"]):
+            user = await self._attach_with_profile(db, data)
+            if user is not None:
+                self.stats.hits += 1
+                return user
+
+        self.stats.misses += 1
+        db_user = await super().get_by_id_with_profile(db, id)
+        if db_user is not None:
+            await self.cache.set(
+                key,
+                {
+                    "user": _snapshot(db_user),
+                    "profile": _snapshot(db_user.profile) if db_user.profile else None,
+                },
+            )
+        return db_user
+
+    async def _attach_with_profile(
+        self, db: AsyncSession, data: Dict[str, Any]
+    ) -> Optional[User]:
+        user = await _attach(db, User, data["user"])
+        if user is None or "profile" not in inspect(user).unloaded:
+            return user
+
+        profile = None
+        if data["profile"] is not None:
+            profile = await _attach(db, Profile, data["profile"])
+            if profile is None:
+                return None
+        # Связь без отметки об изменении: объект остается "чистым"
+        set_committed_value(user, "profile", profile)
+        return user
+
+    async def bulk_update(
+        self, db: AsyncSession, ids: List[Any], update_data: Dict[str, Any]
+    ) -> int:
+        count = await super().bulk_update(db, ids, update_data)
+        await self._invalidate_ids(db, ids)
+        return count
+
+    async def bulk_delete(self, db: AsyncSession, ids: List[Any]) -> int:
+        count = await super().bulk_delete(db, ids)
+        await self._invalidate_ids(db, ids)
+        return count
+
+    async def _invalidate_ids(self, db: AsyncSession, ids: List[Any]) -> None:
+        # Ключи пользователя строятся только по id - читать строки не нужно
+        for user_id in ids:
+            await self.invalidate(User(id=user_id))
+
+    async def update_user(
+        self, db: AsyncSession, db_user: User, user_update: Any
+    ) -> User:
+        db_user = await super().update_user(db, db_user, user_update)
+        await self.invalidate(db_user)
+        return db_user
+
+    async def deactivate_user(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        db_user = await super().deactivate_user(db, user_id)
+        await self.invalidate(db_user)
+        return db_user
+
+    async def soft_delete(self, db: AsyncSession, id: Any) -> Optional[User]:
+        db_user = await super().soft_delete(db, id)
+        await self.invalidate(db_user)
+        return db_user
+
+    async def restore(self, db: AsyncSession, id: Any) -> Optional[User]:
+        db_user = await super().restore(db, id)
+        await self.invalidate(db_user)
+        return db_user
+
+
+class CachedProfileRepository(CachedRepositoryMixin, ProfileRepository):
+    """Репозиторий профилей с read-through кешем"""
+
+    def __init__(self, backend: CacheBackend):
+        super().__init__(backend, "profiles")
+
+    def _invalidation_keys(self, obj: Any) -> List[str]:
+        keys = [self._key("id", obj.id)]
+        if getattr(obj, "user_id", None) is not None:
+            # Профиль входит в закешированного пользователя
+            keys.append(f"users:with_profile:{obj.user_id}")
+        return keys
+
+    def _owner_user_id(self, obj: Any) -> Optional[int]:
+        return getattr(obj, "user_id", None)
+
+    async def invalidate(self, obj: Any) -> None:
+        await super().invalidate(obj)
+        if obj is not None:
+            # Снимок по id другие воркеры сбрасывают по этому событию: их
+            # соответствие user_id -> id профиля могло быть уже вытеснено
+            invalidation_bus.publish("profile", obj.id)
+
+    async def forget_user(self, user_id: int) -> None:
+        """Сбросить локальный кеш профиля по событию другого воркера"""
+        await self.cache.delete(
+            self._key("field", "user_id", user_id), f"users:with_profile:{user_id}"
+        )
+
+    async def forget_profile(self, profile_id: int) -> None:
+        """Сбросить локальный снимок профиля по событию другого воркера"""
+        await self.cache.delete(self._key("id", profile_id))
+
+    async def create_profile(
+        self, db: AsyncSession, user_id: int, **profile_data
+    ) -> Profile:
+        profile = await super().create_profile(db, user_id, **profile_data)
+        await self.invalidate(profile)
+        return profile
+
+    async def update_profile(
+        self, db: AsyncSession, db_profile: Profile, **update_data
+    ) -> Profile:
+        profile = await super().update_profile(db, db_profile, **update_data)
+        await self.invalidate(profile)
+        return profile
+
+
+def create_cache_backend() -> Optional[CacheBackend]:
+    """Создать хранилище кеша согласно CACHE_BACKEND"""
+    if settings.CACHE_BACKEND == "memory":
+        return LRUCache()
+
+    if settings.CACHE_BACKEND == "shared":
+        if settings.CACHE_URL:
+            try:
+                import redis.asyncio as redis
+            except ImportError as exc:
+                raise RuntimeError(
+                    "CACHE_URL требует пакет redis: pip install 'api-user-system[redis]'"
+                ) from exc
+
+            return SharedCache(redis.from_url(settings.CACHE_URL))
+        return SharedCache(LocalSharedClient())
+
+    return None
@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Type
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_, update, delete
@@ -77,6 +78,8 @@ class SoftDeleteMixin:
         db_obj = await self.get_by_id(db, id)
         if db_obj:
             db_obj.is_deleted = True
+            if hasattr(self.model, "deleted_at"):
+                db_obj.deleted_at = datetime.now(timezone.utc)
             db.add(db_obj)
             await db.commit()
             await db.refresh(db_obj)
@@ -95,6 +98,8 @@ class SoftDeleteMixin:
 
         if db_obj:
             db_obj.is_deleted = False
+            if hasattr(self.model, "deleted_at"):
+                db_obj.deleted_at = None
             db.add(db_obj)
             await db.commit()
             await db.refresh(db_obj)
@@ -1,27 +1,71 @@
 # app/repositories/user.py
-from typing import Optional, List
+from datetime import datetime
+from typing import Any, Optional, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Row, select, delete, func
 from sqlalchemy.orm import selectinload
 
 from app.repositories.base import CRUDRepository
+from app.repositories.mixins import SoftDeleteMixin
 from app.models.user import User, Profile
 from app.schemas.user import UserCreate, UserUpdate
 
 
-class UserRepository(CRUDRepository[User]):
+class UserRepository(CRUDRepository[User], SoftDeleteMixin):
     """Репозиторий для работы с пользователями"""
 
     def __init__(self):
         super().__init__(User)
 
-    async def get_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
-        """Получить пользователя по email"""
-        return await self.get_by_field(db, "email", email)
+    async def get_by_id(self, db: AsyncSession, id: Any) -> Optional[User]:
+        """Получить неудаленного пользователя по ID"""
+        stmt = select(User).where(User.id == id, User.is_deleted == False)
+        result = await db.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        with_profile: bool = False,
+    ) -> List[User]:
+        """
+        Получить список неудаленных пользователей с пагинацией.
+
+        with_profile=True загружает профили одним дополнительным запросом
+        (selectinload); без него обращение к user.profile в async-коде
+        приведет к ошибке ленивой загрузки.
+        """
+        stmt = select(User).where(User.is_deleted == False).offset(skip).limit(limit)
+        if with_profile:
+            stmt = stmt.options(selectinload(User.profile))
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
+    async def get_by_email(
+        self, db: AsyncSession, email: str, include_deleted: bool = False
+    ) -> Optional[User]:
+        """
+        Получить пользователя по email.
+
+        include_deleted=True нужен для проверки уникальности: email удаленного
+        пользователя занят до физической очистки.
+        """
+        stmt = select(User).where(User.email == email)
+        if not include_deleted:
+            stmt = stmt.where(User.is_deleted == False)
+        result = await db.execute(stmt)
+        return result.scalar_one_or_none()
 
     async def get_by_id_with_profile(self, db: AsyncSession, id: int) -> Optional[User]:
         """Получить пользователя с профилем по ID"""
-        stmt = select(User).options(selectinload(User.profile)).where(User.id == id)
+        stmt = (
+            select(User)
+            .options(selectinload(User.profile))
+            .where(User.id == id, User.is_deleted == False)
+        )
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
 
@@ -30,7 +74,9 @@ class UserRepository(CRUDRepository[User]):
     ) -> Optional[User]:
         """Получить пользователя с профилем по email"""
         stmt = (
-            select(User).options(selectinload(User.profile)).where(User.email == email)
+            select(User)
+            .options(selectinload(User.profile))
+            .where(User.email == email, User.is_deleted == False)
         )
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
@@ -46,8 +92,9 @@ class UserRepository(CRUDRepository[User]):
             is_active=True,
         )
         db.add(db_user)
-        await db.commit()
-        await db.refresh(db_user)
+        # flush вместо отдельного commit + refresh: id нужен для профиля,
+        # а пользователь и профиль сохраняются одной транзакцией
+        await db.flush()
 
         # Создание профиля
         if user_in.profile:
@@ -83,13 +130,55 @@ class UserRepository(CRUDRepository[User]):
         return await self.get_by_id_with_profile(db, db_user.id)
 
     async def get_active_users(
-        self, db: AsyncSession, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        with_profile: bool = False,
     ) -> List[User]:
-        """Получить список активных пользователей"""
-        stmt = select(User).where(User.is_active == True).offset(skip).limit(limit)
+        """Получить список активных пользователей (профили - см. get_multi)"""
+        stmt = (
+            select(User)
+            .where(User.is_active == True, User.is_deleted == False)
+            .offset(skip)
+            .limit(limit)
+        )
+        if with_profile:
+            stmt = stmt.options(selectinload(User.profile))
         result = await db.execute(stmt)
         return result.scalars().all()
 
+    @staticmethod
+    def _rows_with_profile_stmt(columns: List[Any]):
+        # Профиль присоединяется, только если запрошены его колонки
+        stmt = select(*columns).select_from(User).where(User.is_deleted == False)
+        if any(getattr(column, "class_", None) is Profile for column in columns):
+            stmt = stmt.outerjoin(Profile, Profile.user_id == User.id)
+        return stmt
+
+    async def get_rows_with_profile(
+        self,
+        db: AsyncSession,
+        columns: List[Any],
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        active_only: bool = False,
+    ) -> List[Row]:
+        """
+        Получить плоские строки пользователей вместе с колонками профиля.
+
+        Выбираются только переданные колонки, одним запросом с внешним
+        соединением вместо ORM-объектов - для быстрой сериализации списков
+        (см. app.core.fast_json).
+        """
+        stmt = self._rows_with_profile_stmt(columns)
+        if active_only:
+            stmt = stmt.where(User.is_active == True)
+        stmt = stmt.order_by(User.id).offset(skip).limit(limit)
+        result = await db.execute(stmt)
+        return result.all()
+
     async def deactivate_user(self, db: AsyncSession, user_id: int) -> Optional[User]:
         """Деактивировать пользователя"""
         db_user = await self.get_by_id(db, user_id)
@@ -100,6 +189,34 @@ class UserRepository(CRUDRepository[User]):
             await db.refresh(db_user)
         return db_user
 
+    async def purge_deleted(
+        self, db: AsyncSession, deleted_before: datetime, limit: int = 500
+    ) -> int:
+        """
+        Физически удалить одну пачку мягко удаленных пользователей.
+
+        Пачка выбирается с SKIP LOCKED и удаляется в короткой транзакции,
+        поэтому блокировки не держатся долго.
+        """
+        ids_stmt = (
+            select(User.id)
+            .where(User.is_deleted == True, User.deleted_at < deleted_before)
+            .order_by(User.deleted_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        ids = (await db.execute(ids_stmt)).scalars().all()
+
+        if not ids:
+            await db.commit()
+            return 0
+
+        # Профили удаляем явно, не полагаясь на ORM-каскад
+        await db.execute(delete(Profile).where(Profile.user_id.in_(ids)))
+        await db.execute(delete(User).where(User.id.in_(ids)))
+        await db.commit()
+        return len(ids)
+
 
 class ProfileRepository(CRUDRepository[Profile]):
     """Репозиторий для работы с профилями"""
@@ -107,10 +224,68 @@ class ProfileRepository(CRUDRepository[Profile]):
     def __init__(self):
         super().__init__(Profile)
 
+    @staticmethod
+    def _live(stmt):
+        """Только профили неудаленных пользователей"""
+        return stmt.join(User, Profile.user_id == User.id).where(
+            User.is_deleted == False
+        )
+
+    async def get_by_field(
+        self, db: AsyncSession, field_name: str, field_value: Any
+    ) -> Optional[Profile]:
+        """Получить профиль неудаленного пользователя по значению поля"""
+        stmt = self._live(
+            select(Profile).where(getattr(Profile, field_name) == field_value)
+        )
+        result = await db.execute(stmt)
+        return result.scalar_one_or_none()
+
     async def get_by_user_id(self, db: AsyncSession, user_id: int) -> Optional[Profile]:
         """Получить профиль по ID пользователя"""
         return await self.get_by_field(db, "user_id", user_id)
 
+    async def get_version_by_user_id(
+        self, db: AsyncSession, user_id: int
+    ) -> Optional[Row]:
+        """Получить только id и отметки времени профиля (для ETag)"""
+        stmt = self._live(
+            select(Profile.id, Profile.created_at, Profile.updated_at).where(
+                Profile.user_id == user_id
+            )
+        )
+        result = await db.execute(stmt)
+        return result.one_or_none()
+
+    async def get_row_by_user_id(
+        self, db: AsyncSession, columns: List[Any], user_id: int
+    ) -> Optional[Row]:
+        """Получить плоскую строку профиля пользователя (только нужные колонки)"""
+        stmt = self._live(select(*columns).where(Profile.user_id == user_id))
+        result = await db.execute(stmt)
+        return result.one_or_none()
+
+    async def get_rows(
+        self, db: AsyncSession, columns: List[Any], *, skip: int = 0, limit: int = 100
+    ) -> List[Row]:
+        """Получить плоские строки профилей (для быстрой сериализации)"""
+        stmt = (
+            self._live(select(*columns))
+            .order_by(Profile.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        result = await db.execute(stmt)
+        return result.all()
+
+    async def get_row(
+        self, db: AsyncSession, columns: List[Any], id: int
+    ) -> Optional[Row]:
+        """Получить плоскую строку профиля (только нужные колонки)"""
+        stmt = select(*columns).where(Profile.id == id)
+        result = await db.execute(stmt)
+        return result.one_or_none()
+
     async def create_profile(
         self, db: AsyncSession, user_id: int, **profile_data
     ) -> Profile:
@@ -138,7 +313,7 @@ class ProfileRepository(CRUDRepository[Profile]):
         self, db: AsyncSession, first_name: str = None, last_name: str = None
     ) -> List[Profile]:
         """Поиск профилей по имени"""
-        stmt = select(Profile)
+        stmt = self._live(select(Profile))
 
         if first_name:
             stmt = stmt.where(Profile.first_name.ilike(f"%{first_name}%"))
@@ -147,3 +322,15 @@ class ProfileRepository(CRUDRepository[Profile]):
 
         result = await db.execute(stmt)
         return result.scalars().all()
+
+    async def get_completeness_distribution(
+        self, db: AsyncSession
+    ) -> List[Tuple[int, int]]:
+        """Количество профилей по каждому значению completeness_score"""
+        stmt = (
+            self._live(select(Profile.completeness_score, func.count()))
+            .group_by(Profile.completeness_score)
+            .order_by(Profile.completeness_score)
+        )
+        result = await db.execute(stmt)
+        return [tuple(row) for row in result.all()]
@@ -0,0 +1,26 @@
+
+from pydantic import BaseModel
+
+class MemoryStatus(BaseModel):
+    tracing: bool
+    frames: int
+    traced_bytes: int
+    traced_peak_bytes: int
+    rss_bytes: int
+    snapshots: list[str]
+
+class AllocationSite(BaseModel):
+    site: str
+    size: int
+    count: int
+
+class AllocationDiff(AllocationSite):
+    size_diff: int
+    count_diff: int
+
+class LiveObjects(BaseModel):
+    User: int
+    Profile: int
+    Session: int
+    AsyncSession: int
+    identity_map_entries: int
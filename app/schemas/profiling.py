@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+class ProfilingSettings(BaseModel):
+    sample_rate: float = Field(..., ge=0, le=1)
+    format: Literal["pstats", "collapsed"] = "pstats"
+
+class ProfilingStatus(ProfilingSettings):
+    active: bool
+    files: int
+    bytes: int
+    max_files: int
+    max_bytes: int
+
+class ProfileFile(BaseModel):
+    name: str
+    size: int
+    created_at: datetime
+
+class ProfilingToken(BaseModel):
+    header: str
+    token: str
+    expires_in: int
@@ -18,12 +18,21 @@ class ProfileUpdate(ProfileBase):
 class ProfileResponse(ProfileBase):
     id: int
     user_id: int
+    completeness_score: int = 0
     created_at: datetime
     updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class CompletenessBucket(BaseModel):
+    score: int
+    count: int
+
+class CompletenessDistribution(BaseModel):
+    total: int
+    distribution: list[CompletenessBucket]
+
 # Схемы для пользователя
 class UserBase(BaseModel):
     email: EmailStr
@@ -41,6 +50,8 @@ class UserResponse(UserBase):
     is_active: bool
     created_at: datetime
     updated_at: Optional[datetime] = None
+    last_login_at: Optional[datetime] = None
+    last_seen_at: Optional[datetime] = None
     profile: Optional[ProfileResponse] = None
     
     class Config:
@@ -136,9 +136,9 @@ class AuthService:
     ) -> bool:
         """Смена пароля пользователя"""
         # Проверка старого пароля
-        from app.core.security import verify_password
+        from app.core.security import verify_password_async
 
-        if not verify_password(old_password, user.hashed_password):
+        if not await verify_password_async(old_password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Неверный текущий пароль"
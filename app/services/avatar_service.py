@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.timing import timed
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow не установлен - миниатюры не создаются
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Публичный путь, по которому раздаются загруженные аватары
+AVATAR_URL_PREFIX = "/api/profiles/avatars/"
+
+CHUNK_SIZE = 64 * 1024
+
+# Сигнатуры поддерживаемых форматов: расширение -> (смещение, магические байты)
+_SIGNATURES = {
+    "png": (0, b"\x89PNG\r\n\x1a\n"),
+    "jpg": (0, b"\xff\xd8\xff"),
+    "gif": (0, b"GIF8"),
+    "webp": (8, b"WEBP"),
+}
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "gif": "image/gif",
+    "webp": "image/webp",
+}
+
+# <sha256>[.thumb].<ext>
+_FILENAME_RE = re.compile(
+    r"^(?P<digest>[0-9a-f]{64})(?P<thumb>\.thumb)?\.(?P<ext>png|jpg|gif|webp)$"
+)
+
+
+def _detect_extension(head: bytes) -> Optional[str]:
+    """Определить формат изображения по первым байтам"""
+    for extension, (offset, magic) in _SIGNATURES.items():
+        if head[offset : offset + len(magic)] == magic:
+            return extension
+    return None
+
+
+def _make_thumbnail(source: str, target: str, size: int) -> None:
+    """Создать миниатюру (выполняется в отдельном процессе)"""
+    with Image.open(source) as image:
+        image.thumbnail((size, size))
+        tmp_target = f"{target}.part"
+        image.save(tmp_target, format=image.format)
+        os.replace(tmp_target, target)
+
+
+class AvatarStorage:
+    """
+    Контентно-адресуемое хранилище аватаров на локальном диске.
+
+    Имя файла - sha256 содержимого, поэтому одинаковые изображения хранятся
+    один раз и никогда не меняются по одному и тому же адресу.
+    """
+
+    def __init__(
+        self,
+        root: str = settings.MEDIA_ROOT,
+        max_bytes: int = settings.AVATAR_MAX_BYTES,
+        thumbnail_size: int = settings.AVATAR_THUMBNAIL_SIZE,
+    ):
+        self.root = Path(root) / "avatars"
+        self.max_bytes = max_bytes
+        self.thumbnail_size = thumbnail_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def path_for(self, filename: str) -> Optional[Path]:
+        """Путь к файлу по имени или None, если имя некорректно"""
+        match = _FILENAME_RE.match(filename)
+        if not match:
+            return None
+        return self.root / match.group("digest")[:2] / filename
+
+    @staticmethod
+    def thumbnail_name(filename: str) -> str:
+        stem, extension = filename.rsplit(".", 1)
+        return f"{stem}.thumb.{extension}"
+
+    async def save(self, upload: UploadFile) -> str:
+        """
+        Потоково сохранить загруженный файл, вернуть его имя.
+
+        Тело запроса больше лимита отсекается раньше, в BodySizeLimitMiddleware;
+        запись на диск идет в пуле потоков.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        digest = hashlib.sha256()
+        head = b""
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while chunk := await upload.read(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="Файл аватара слишком большой",
+                        )
+                    if len(head) < 16:
+                        head += chunk[: 16 - len(head)]
+                    digest.update(chunk)
+                    await run_in_threadpool(out.write, chunk)
+
+            extension = _detect_extension(head)
+            if extension is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Неподдерживаемый формат изображения",
+                )
+
+            filename = f"{digest.hexdigest()}.{extension}"
+            target = self.path_for(filename)
+
+            if target.exists():
+                # Такое изображение уже хранится
+                os.unlink(tmp_path)
+            else:
+                target.parent.mkdir(exist_ok=True)
+                os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        await self._ensure_thumbnail(filename)
+        return filename
+
+    async def _ensure_thumbnail(self, filename: str) -> None:
+        if Image is None:
+            return
+
+        source = self.path_for(filename)
+        target = self.path_for(self.thumbnail_name(filename))
+        if target.exists():
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            with timed("thumbnail"):
+                await loop.run_in_executor(
+                    self._get_pool(),
+                    _make_thumbnail,
+                    str(source),
+                    str(target),
+                    self.thumbnail_size,
+                )
+        except Exception:
+            logger.warning(
+                "Не удалось создать миниатюру для %s", filename, exc_info=True
+            )
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.AVATAR_THUMBNAIL_WORKERS
+            )
+        return self._pool
+
+    def shutdown(self) -> None:
+        """Остановить пул процессов для миниатюр"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+# Глобальное хранилище аватаров
+avatar_storage = AvatarStorage()
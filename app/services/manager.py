@@ -1,3 +1,5 @@
+from app.core.config import settings
+from app.core.tracing import instrument
 from app.services.user_service import UserService
 from app.services.profile_service import ProfileService
 from app.services.auth_service import AuthService
@@ -16,6 +18,14 @@ class ServiceManager:
         self._profile_service = ProfileService(self.repo_manager.profiles)
         self._auth_service = AuthService(self._user_service)
 
+        if settings.TRACING_ENABLED:
+            for service in (
+                self._user_service,
+                self._profile_service,
+                self._auth_service,
+            ):
+                instrument(service, "service")
+
     @property
     def users(self) -> UserService:
         """Сервис пользователей"""
@@ -39,4 +49,4 @@ service_manager = ServiceManager()
 # Функция-зависимость для FastAPI
 def get_service_manager() -> ServiceManager:
     """Получить менеджер сервисов для использования в эндпоинтах"""
-    return service_manager
\ No newline at end of file
+    return service_manager
@@ -1,11 +1,12 @@
 from typing import Optional, List
-from fastapi import HTTPException, status
+from fastapi import HTTPException, UploadFile, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.services.base import CRUDService
 from app.repositories.user import ProfileRepository
-from app.models.user import Profile
+from app.models.user import PROFILE_COMPLETENESS_FIELDS, Profile
 from app.schemas.user import ProfileUpdate
+from app.services.avatar_service import AVATAR_URL_PREFIX, avatar_storage
 
 
 class ProfileService(CRUDService[Profile, ProfileRepository]):
@@ -100,32 +101,37 @@ class ProfileService(CRUDService[Profile, ProfileRepository]):
         if not profile:
             return {
                 "completion_percentage": 0,
-                "missing_fields": ["first_name", "last_name", "bio", "avatar_url"],
+                "missing_fields": list(PROFILE_COMPLETENESS_FIELDS),
                 "completed_fields": []
             }
 
-        total_fields = 4
         completed_fields = []
         missing_fields = []
 
-        # Проверяем заполненность полей
-        fields_to_check = ["first_name", "last_name", "bio", "avatar_url"]
-
-        for field in fields_to_check:
+        for field in PROFILE_COMPLETENESS_FIELDS:
             value = getattr(profile, field, None)
             if value and value.strip():
                 completed_fields.append(field)
             else:
                 missing_fields.append(field)
 
-        completion_percentage = (len(completed_fields) / total_fields) * 100
-
+        # Процент хранится в профиле и пересчитывается при записи
         return {
-            "completion_percentage": round(completion_percentage, 2),
+            "completion_percentage": profile.completeness_score,
             "missing_fields": missing_fields,
             "completed_fields": completed_fields
         }
 
+    async def get_completeness_distribution(self, db: AsyncSession) -> dict:
+        """Распределение профилей по проценту заполненности"""
+        buckets = await self.repository.get_completeness_distribution(db)
+        return {
+            "total": sum(count for _, count in buckets),
+            "distribution": [
+                {"score": score, "count": count} for score, count in buckets
+            ],
+        }
+
     async def update_avatar(
             self,
             db: AsyncSession,
@@ -133,8 +139,8 @@ class ProfileService(CRUDService[Profile, ProfileRepository]):
             avatar_url: str
     ) -> Profile:
         """Обновить аватар пользователя"""
-        # Валидация URL (базовая)
-        if not avatar_url.startswith(('http://', 'https://')):
+        # Валидация URL (базовая): внешняя ссылка или локально загруженный файл
+        if not avatar_url.startswith(('http://', 'https://', AVATAR_URL_PREFIX)):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Некорректный URL аватара"
@@ -145,6 +151,18 @@ class ProfileService(CRUDService[Profile, ProfileRepository]):
             db, profile, avatar_url=avatar_url
         )
 
+    async def upload_avatar(
+            self,
+            db: AsyncSession,
+            user_id: int,
+            upload: UploadFile
+    ) -> Profile:
+        """Загрузить аватар в локальное хранилище и привязать к профилю"""
+        filename = await avatar_storage.save(upload)
+        return await self.update_avatar(
+            db, user_id, f"{AVATAR_URL_PREFIX}{filename}"
+        )
+
     async def delete_avatar(
             self, db: AsyncSession, user_id: int
     ) -> Profile:
@@ -1,12 +1,20 @@
 from typing import Optional, List
 from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.services.base import CRUDService
 from app.repositories.user import UserRepository
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.activity import activity_buffer
+from app.core.email_filter import email_filter
+from app.core.timing import timed
+from app.core.security import (
+    dummy_verify_password_async,
+    get_password_hash_async,
+    verify_password_async,
+)
 
 
 class UserService(CRUDService[User, UserRepository]):
@@ -31,35 +39,62 @@ class UserService(CRUDService[User, UserRepository]):
             self, db: AsyncSession, user_in: UserCreate
     ) -> User:
         """Создать нового пользователя с валидацией"""
-        # Проверка существования пользователя
-        existing_user = await self.repository.get_by_email(db, user_in.email)
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email уже зарегистрирован в системе"
+        email_taken = HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email уже зарегистрирован в системе"
+        )
+
+        # Проверка существования пользователя (фильтр email отсекает
+        # заведомо новые адреса без запроса к БД)
+        with timed("email_filter"):
+            might_exist = await email_filter.might_exist(user_in.email)
+        if might_exist:
+            existing_user = await self.repository.get_by_email(
+                db, user_in.email, include_deleted=True
             )
+            if existing_user:
+                raise email_taken
 
         # Хеширование пароля
-        hashed_password = get_password_hash(user_in.password)
+        hashed_password = await get_password_hash_async(user_in.password)
 
-        # Создание пользователя через репозиторий
-        return await self.repository.create_user(db, user_in, hashed_password)
+        # Создание пользователя через репозиторий; уникальный индекс
+        # страхует от гонки с параллельной регистрацией
+        try:
+            user = await self.repository.create_user(db, user_in, hashed_password)
+        except IntegrityError:
+            await db.rollback()
+            raise email_taken
+
+        email_filter.add(user.email)
+        return user
 
     async def authenticate_user(
             self, db: AsyncSession, email: str, password: str
     ) -> Optional[User]:
         """Аутентификация пользователя"""
+        # Для неизвестных адресов БД не опрашивается, а фиктивная проверка
+        # пароля выравнивает время ответа
+        with timed("email_filter"):
+            might_exist = await email_filter.might_exist(email)
+        if not might_exist:
+            await dummy_verify_password_async(password)
+            return None
+
         user = await self.repository.get_by_email(db, email)
 
         if not user:
+            await dummy_verify_password_async(password)
             return None
 
-        if not verify_password(password, user.hashed_password):
+        if not await verify_password_async(password, user.hashed_password):
             return None
 
         if not user.is_active:
             return None
 
+        activity_buffer.record_login(user.id)
+
         return user
 
     async def update_user(
@@ -72,7 +107,9 @@ class UserService(CRUDService[User, UserRepository]):
 
         # Проверка email на уникальность
         if user_update.email and user_update.email != db_user.email:
-            existing_user = await self.repository.get_by_email(db, user_update.email)
+            existing_user = await self.repository.get_by_email(
+                db, user_update.email, include_deleted=True
+            )
             if existing_user:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -84,10 +121,16 @@ class UserService(CRUDService[User, UserRepository]):
 
         # Хеширование пароля если он был предоставлен
         if "password" in update_data:
-            update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+            update_data["hashed_password"] = await get_password_hash_async(
+                update_data.pop("password")
+            )
 
         # Обновление через репозиторий
-        return await self.repository.update(db, db_obj=db_user, obj_in=update_data)
+        updated_user = await self.repository.update(
+            db, db_obj=db_user, obj_in=update_data
+        )
+        email_filter.add(updated_user.email)
+        return updated_user
 
     async def deactivate_user(
             self, db: AsyncSession, user_id: int, current_user_id: int
@@ -101,11 +144,37 @@ class UserService(CRUDService[User, UserRepository]):
 
         return await self.repository.deactivate_user(db, user_id)
 
+    async def soft_delete_user(
+            self, db: AsyncSession, user_id: int, current_user_id: int
+    ) -> Optional[User]:
+        """Мягко удалить пользователя"""
+        if user_id == current_user_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Нельзя удалить свою учетную запись"
+            )
+
+        return await self.repository.soft_delete(db, user_id)
+
+    async def restore_user(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        """Восстановить мягко удаленного пользователя"""
+        db_user = await self.repository.restore(db, user_id)
+        if not db_user:
+            return None
+
+        return await self.repository.get_by_id_with_profile(db, db_user.id)
+
     async def get_active_users(
-            self, db: AsyncSession, skip: int = 0, limit: int = 100
+            self,
+            db: AsyncSession,
+            skip: int = 0,
+            limit: int = 100,
+            with_profile: bool = False,
     ) -> List[User]:
         """Получить список активных пользователей"""
-        return await self.repository.get_active_users(db, skip=skip, limit=limit)
+        return await self.repository.get_active_users(
+            db, skip=skip, limit=limit, with_profile=with_profile
+        )
 
     async def check_superuser_permissions(self, user: User) -> bool:
         """Проверить права суперпользователя"""
@@ -0,0 +1,278 @@
+"""
+Нагрузочные сценарии на httpx и asyncio с отчетом по перцентилям.
+
+Запуск:
+    python -m benchmarks.load mixed [--requests 2000] [--concurrency 50]
+    python -m benchmarks.load login_storm --base-url http://127.0.0.1:8000
+    python -m benchmarks.load me_flood --output results.json
+
+Без --base-url приложение вызывается в процессе через ASGI-транспорт на
+временном файле SQLite с тестовыми данными (как в benchmarks.suite). С --base-url
+нагрузка идет по сокету на запущенный сервер; пользователи для входа
+регистрируются через API перед прогоном.
+
+Прогон воспроизводим: число запросов фиксировано, выбор операций и
+пользователей определяется --seed. Отчет: пропускная способность и
+p50/p95/p99 задержки по каждой операции.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.suite import PASSWORD, Environment
+
+# Пароль регистрируемых пользователей (проходит проверки регистрации)
+REGISTER_PASSWORD = "LoadTest-Password1"
+
+# Перцентили отчета
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class LoadContext:
+    """Клиент и учетные данные, общие для всех воркеров прогона"""
+
+    client: httpx.AsyncClient
+    credentials: List[Tuple[str, str]]
+    headers: List[Dict[str, str]]
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    registered: int = 0
+
+
+Operation = Callable[[LoadContext, random.Random], Awaitable[httpx.Response]]
+
+
+async def login(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+    email, password = rng.choice(ctx.credentials)
+    return await ctx.client.post(
+        "/api/auth/login", data={"username": email, "password": password}
+    )
+
+
+async def read_me(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+    return await ctx.client.get("/api/users/me", headers=rng.choice(ctx.headers))
+
+
+async def read_profile(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+    return await ctx.client.get("/api/profiles/me", headers=rng.choice(ctx.headers))
+
+
+async def search_profiles(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+    return await ctx.client.get(
+        "/api/profiles/search",
+        params={"last_name": f"Фамилия{rng.randrange(10)}", "limit": 20},
+        headers=rng.choice(ctx.headers),
+    )
+
+
+async def register(ctx: LoadContext, rng: random.Random) -> httpx.Response:
+    ctx.registered += 1
+    return await ctx.client.post(
+        "/api/auth/register",
+        json={
+            "email": f"load-{ctx.run_id}-{ctx.registered}@example.com",
+            "password": REGISTER_PASSWORD,
+        },
+    )
+
+
+# Сценарий: операция -> вес (доля запросов)
+SCENARIOS: Dict[str, Dict[str, Tuple[Operation, int]]] = {
+    "login_storm": {"POST /api/auth/login": (login, 1)},
+    "me_flood": {"GET /api/users/me": (read_me, 1)},
+    "profile_search": {"GET /api/profiles/search": (search_profiles, 1)},
+    "registration_burst": {"POST /api/auth/register": (register, 1)},
+    "mixed": {
+        "GET /api/users/me": (read_me, 55),
+        "GET /api/profiles/me": (read_profile, 15),
+        "GET /api/profiles/search": (search_profiles, 15),
+        "POST /api/auth/login": (login, 10),
+        "POST /api/auth/register": (register, 5),
+    },
+}
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """Перцентиль по ближайшему рангу (samples отсортированы)"""
+    if not samples:
+        return 0.0
+    rank = max(1, round(p / 100 * len(samples) + 0.5))
+    return samples[min(rank, len(samples)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    summary: Dict[str, Any] = {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = round(percentile(latencies, p) * 1000, 3)
+    return summary
+
+
+async def run_scenario(
+    ctx: LoadContext,
+    scenario: str,
+    requests: int,
+    concurrency: int,
+    seed: int,
+) -> Dict[str, Any]:
+    """Выполнить requests запросов сценария в concurrency воркеров"""
+    operations = SCENARIOS[scenario]
+    names = list(operations)
+    weights = [operations[name][1] for name in names]
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+    statuses: Dict[str, int] = {}
+
+    # План запросов заранее: операции и их параметры зависят только от seed,
+    # а не от того, какой воркер освободился первым
+    plan_rng = random.Random(seed)
+    plan = [
+        (plan_rng.choices(names, weights)[0], plan_rng.getrandbits(32))
+        for _ in range(requests)
+    ]
+    plan.reverse()
+
+    async def worker() -> None:
+        while plan:
+            name, request_seed = plan.pop()
+            rng = random.Random(request_seed)
+            started = time.perf_counter()
+            try:
+                response = await operations[name][0](ctx, rng)
+                status = str(response.status_code)
+            except httpx.HTTPError as exc:
+                status = exc.__class__.__name__
+            latencies[name].append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            if not status.startswith("2"):
+                errors[name] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "scenario": scenario,
+        "requests": requests,
+        "concurrency": concurrency,
+        "seed": seed,
+        "elapsed_s": round(elapsed, 3),
+        "total": summarize(all_latencies, sum(errors.values()), elapsed),
+        "operations": {
+            name: summarize(latencies[name], errors[name], elapsed)
+            for name in names
+            if latencies[name]
+        },
+        "statuses": statuses,
+    }
+
+
+async def remote_context(base_url: str, users: int) -> LoadContext:
+    """Зарегистрировать пользователей на сервере и получить их токены"""
+    client = httpx.AsyncClient(base_url=base_url, timeout=30)
+    ctx = LoadContext(client=client, credentials=[], headers=[])
+    for i in range(users):
+        email = f"load-{ctx.run_id}-user{i}@example.com"
+        response = await client.post(
+            "/api/auth/register",
+            json={
+                "email": email,
+                "password": REGISTER_PASSWORD,
+                "profile": {"first_name": f"Имя{i}", "last_name": f"Фамилия{i % 10}"},
+            },
+        )
+        response.raise_for_status()
+        response = await client.post(
+            "/api/auth/login", data={"username": email, "password": REGISTER_PASSWORD}
+        )
+        response.raise_for_status()
+        ctx.credentials.append((email, REGISTER_PASSWORD))
+        ctx.headers.append(
+            {"Authorization": f"Bearer {response.json()['access_token']}"}
+        )
+    return ctx
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(
+        f"{result['scenario']}: {result['requests']} запросов, "
+        f"{result['concurrency']} воркеров, {result['elapsed_s']} с"
+    )
+    header = f"{'операция':32} {'запросов':>9} {'ошибок':>7} {'rps':>9}"
+    header += "".join(f" {f'p{p}, мс':>10}" for p in PERCENTILES)
+    print(header)
+    rows = list(result["operations"].items()) + [("всего", result["total"])]
+    for name, summary in rows:
+        line = (
+            f"{name:32} {summary['requests']:9} {summary['errors']:7} "
+            f"{summary['throughput_rps']:9.1f}"
+        )
+        line += "".join(f" {summary[f'p{p}_ms']:10.2f}" for p in PERCENTILES)
+        print(line)
+    print(f"статусы: {result['statuses']}")
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    env: Optional[Environment] = None
+    if args.base_url:
+        ctx = await remote_context(args.base_url, args.users)
+    else:
+        # Файл, а не память: в памяти все сессии делят одно соединение и
+        # транзакции конкурентных запросов перемешиваются
+        tmpdir = tempfile.TemporaryDirectory()
+        env = Environment(
+            "sqlite", f"sqlite+aiosqlite:///{tmpdir.name}/load.db", args.users
+        )
+        await env.setup()
+        credentials = [(user.email, PASSWORD) for user in env.seeded_users]
+        headers = [env.auth_headers(user) for user in env.seeded_users]
+        ctx = LoadContext(client=env.client, credentials=credentials, headers=headers)
+
+    try:
+        return await run_scenario(
+            ctx, args.scenario, args.requests, args.concurrency, args.seed
+        )
+    finally:
+        if env is not None:
+            await env.teardown()
+            tmpdir.cleanup()
+        else:
+            await ctx.client.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--base-url", help="Сервер вместо приложения в процессе")
+    parser.add_argument("--output", help="Записать результаты в JSON")
+    args = parser.parse_args()
+
+    result = asyncio.run(main_async(args))
+    print_report(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(result, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
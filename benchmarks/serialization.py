@@ -0,0 +1,94 @@
+"""
+Сравнение сериализации страницы списка пользователей.
+
+Запуск: python -m benchmarks.serialization [--rows 1000] [--repeat 50]
+
+Печатает стоимость одной строки для пути через response_model (валидация
+ORM-объектов + jsonable_encoder + json.dumps, как делает FastAPI) и для
+быстрого пути RowSerializer по плоским строкам.
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.api.users import user_rows
+from app.models.user import Profile, User
+from app.schemas.user import UserResponse
+
+
+def make_users(count: int) -> list:
+    now = datetime.now(timezone.utc)
+    users = []
+    for i in range(count):
+        user = User(
+            id=i,
+            email=f"user{i}@example.com",
+            is_active=True,
+            created_at=now,
+            updated_at=now,
+            last_login_at=now,
+            last_seen_at=now,
+        )
+        user.profile = Profile(
+            id=i,
+            user_id=i,
+            first_name="Имя",
+            last_name="Фамилия",
+            bio="bio " * 10,
+            avatar_url=None,
+            completeness_score=75,
+            created_at=now,
+            updated_at=None,
+        )
+        users.append(user)
+    return users
+
+
+def to_rows(users: list) -> list:
+    profile_fields = user_rows.nested["profile"].fields
+    return [
+        tuple(getattr(user, name) for name in user_rows.fields)
+        + tuple(getattr(user.profile, name) for name in profile_fields)
+        for user in users
+    ]
+
+
+def measure(fn, repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    users = make_users(args.rows)
+    rows = to_rows(users)
+    adapter = TypeAdapter(list[UserResponse])
+
+    def response_model_path() -> bytes:
+        validated = adapter.validate_python(users, from_attributes=True)
+        return json.dumps(jsonable_encoder(validated)).encode()
+
+    results = {
+        "response_model": measure(response_model_path, args.repeat),
+        "row_serializer": measure(lambda: user_rows.dumps(rows), args.repeat),
+    }
+
+    for name, seconds in results.items():
+        per_row = seconds / args.rows * 1e6
+        print(f"{name:16} {seconds * 1000:8.2f} мс/страница {per_row:7.2f} мкс/строка")
+
+
+if __name__ == "__main__":
+    main()
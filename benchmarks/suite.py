@@ -0,0 +1,420 @@
+"""
+Бенчмарки репозиториев, токенов, хеширования паролей и эндпоинтов.
+
+Запуск:
+    python -m benchmarks.suite [--users 200] [--repeat 50] [--only users]
+    python -m benchmarks.suite --save benchmarks/baseline.json
+    python -m benchmarks.suite --compare benchmarks/baseline.json [--threshold 0.2]
+
+Кейсы с БД выполняются на SQLite в памяти и на Postgres, только если он
+задан явно (--postgres-url или BENCHMARK_POSTGRES_URL): DATABASE_URL
+приложения не используется. На Postgres таблицы создаются в отдельной
+схеме benchmark, которая удаляется (DROP SCHEMA ... CASCADE) до и после
+прогона, поэтому указывайте отдельную базу для бенчмарков. Эндпоинты вызываются через ASGI-транспорт httpx
+со всеми middleware приложения, но без lifespan (фоновые задачи не
+запускаются). Сравнение идет по медиане: кейсы медленнее базовой линии
+больше чем на threshold считаются регрессией, код выхода 1.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from jose import jwt
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.api.users import user_rows
+from app.core.config import settings
+from app.core.database import Base, get_db
+from app.core.security import create_access_token, get_password_hash, verify_password
+from app.main import app
+from app.models.user import Profile, User
+from app.repositories import get_repository_manager
+from app.repositories.user import ProfileRepository, UserRepository
+
+# Схема Postgres для таблиц бенчмарка
+POSTGRES_SCHEMA = "benchmark"
+
+# Пароль всех пользователей тестовых данных
+PASSWORD = "benchmark-password"
+
+# Повторы медленных кейсов (bcrypt) не зависят от --repeat
+SLOW_REPEAT = 5
+
+
+@dataclass
+class Case:
+    group: str
+    name: str
+    fn: Callable[["Environment"], Awaitable[Any]]
+    uses_db: bool = True
+    repeat: Optional[int] = None
+
+    @property
+    def title(self) -> str:
+        return f"{self.group}.{self.name}"
+
+
+CASES: List[Case] = []
+
+
+def case(group: str, name: str, uses_db: bool = True, repeat: Optional[int] = None):
+    """Зарегистрировать кейс: async def fn(env) -> Any"""
+
+    def decorator(fn):
+        CASES.append(Case(group, name, fn, uses_db, repeat))
+        return fn
+
+    return decorator
+
+
+class Environment:
+    """БД с тестовыми данными и HTTP-клиент приложения для одного бэкенда"""
+
+    def __init__(self, backend: str, url: str, users: int):
+        self.backend = backend
+        self.url = url
+        self.users = users
+        self.user_repo = UserRepository()
+        self.profile_repo = ProfileRepository()
+
+    async def setup(self) -> None:
+        if self.backend == "sqlite" and ":memory:" in self.url:
+            # Одно соединение на всех: база в памяти живет, пока оно открыто
+            self.engine = create_async_engine(
+                self.url,
+                connect_args={"check_same_thread": False},
+                poolclass=StaticPool,
+            )
+        elif self.backend == "sqlite":
+            # Файл: у конкурентных запросов свои соединения и транзакции
+            self.engine = create_async_engine(self.url, connect_args={"timeout": 30})
+        else:
+            self.engine = create_async_engine(
+                self.url,
+                connect_args={"server_settings": {"search_path": POSTGRES_SCHEMA}},
+            )
+            async with self.engine.begin() as conn:
+                await conn.execute(
+                    text(f"DROP SCHEMA IF EXISTS {POSTGRES_SCHEMA} CASCADE")
+                )
+                await conn.execute(text(f"CREATE SCHEMA {POSTGRES_SCHEMA}"))
+
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.session_factory = async_sessionmaker(
+            bind=self.engine, class_=AsyncSession, expire_on_commit=False
+        )
+        await self._seed()
+
+        async def override_get_db():
+            async with self.session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        await get_repository_manager().reset_cache()
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://benchmark"
+        )
+
+    async def _seed(self) -> None:
+        hashed_password = get_password_hash(PASSWORD)
+        async with self.session_factory() as db:
+            users = [
+                User(
+                    email=f"user{i}@example.com",
+                    hashed_password=hashed_password,
+                    is_active=True,
+                    is_superuser=i == 0,
+                )
+                for i in range(self.users)
+            ]
+            db.add_all(users)
+            await db.flush()
+            db.add_all(
+                Profile(
+                    user_id=user.id,
+                    first_name=f"Имя{i}",
+                    last_name=f"Фамилия{i % 10}",
+                    bio="bio " * 10 if i % 2 else None,
+                )
+                for i, user in enumerate(users)
+            )
+            await db.commit()
+
+        self.seeded_users = users
+        self.admin = users[0]
+        self.user = users[-1]
+        self.user_headers = self.auth_headers(self.user)
+        self.admin_headers = self.auth_headers(self.admin)
+        self.token = create_access_token(
+            data={"sub": self.user.email, "user_id": self.user.id}
+        )
+
+    @staticmethod
+    def auth_headers(user: User) -> Dict[str, str]:
+        token = create_access_token(data={"sub": user.email, "user_id": user.id})
+        return {"Authorization": f"Bearer {token}"}
+
+    async def teardown(self) -> None:
+        await self.client.aclose()
+        app.dependency_overrides.pop(get_db, None)
+        await get_repository_manager().reset_cache()
+        if self.backend != "sqlite":
+            async with self.engine.begin() as conn:
+                await conn.execute(
+                    text(f"DROP SCHEMA IF EXISTS {POSTGRES_SCHEMA} CASCADE")
+                )
+        await self.engine.dispose()
+
+    async def get(self, url: str, headers: Dict[str, str]) -> httpx.Response:
+        response = await self.client.get(url, headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url}: {response.status_code} {response.text}")
+        return response
+
+
+# Репозитории: новая сессия на вызов, чтобы identity map не подменял запросы
+
+
+@case("repository", "users.get_by_id")
+async def _(env: Environment):
+    async with env.session_factory() as db:
+        await env.user_repo.get_by_id(db, env.user.id)
+
+
+@case("repository", "users.get_by_email")
+async def _(env: Environment):
+    async with env.session_factory() as db:
+        await env.user_repo.get_by_email(db, env.user.email)
+
+
+@case("repository", "users.get_by_id_with_profile")
+async def _(env: Environment):
+    async with env.session_factory() as db:
+        await env.user_repo.get_by_id_with_profile(db, env.user.id)
+
+
+@case("repository", "users.get_by_id_with_profile_cached")
+async def _(env: Environment):
+    async with env.session_factory() as db:
+        await get_repository_manager().users.get_by_id_with_profile(db, env.user.id)
+
+
+@case("repository", "users.get_multi_with_profile")
+async def _(env: Environment):
+    async with env.session_factory() as db:
+        await env.user_repo.get_multi(db, limit=100, with_profile=True)
+
+
+@case("repository", "users.get_rows_with_profile")
+async def _(env: Environment):
+    async with env.session_factory() as db:
+        await env.user_repo.get_rows_with_profile(db, user_rows.columns, limit=100)
+
+
+@case("repository", "profiles.get_profiles_by_name")
+async def _(env: Environment):
+    async with env.session_factory() as db:
+        await env.profile_repo.get_profiles_by_name(db, last_name="Фамилия1")
+
+
+@case("repository", "profiles.get_completeness_distribution")
+async def _(env: Environment):
+    async with env.session_factory() as db:
+        await env.profile_repo.get_completeness_distribution(db)
+
+
+# Токены и пароли
+
+
+@case("security", "create_access_token", uses_db=False)
+async def _(env: Environment):
+    create_access_token(data={"sub": "user@example.com", "user_id": 1})
+
+
+@case("security", "decode_access_token", uses_db=False)
+async def _(env: Environment):
+    jwt.decode(env.token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+
+@case("security", "get_password_hash", uses_db=False, repeat=SLOW_REPEAT)
+async def _(env: Environment):
+    get_password_hash(PASSWORD)
+
+
+@case("security", "verify_password", uses_db=False, repeat=SLOW_REPEAT)
+async def _(env: Environment):
+    verify_password(PASSWORD, env.user.hashed_password)
+
+
+# Эндпоинты целиком, через middleware приложения
+
+
+@case("endpoint", "POST /api/auth/login", repeat=SLOW_REPEAT)
+async def _(env: Environment):
+    response = await env.client.post(
+        "/api/auth/login", data={"username": env.user.email, "password": PASSWORD}
+    )
+    if response.status_code != 200:
+        raise RuntimeError(f"login: {response.status_code} {response.text}")
+
+
+@case("endpoint", "GET /api/users/me")
+async def _(env: Environment):
+    await env.get("/api/users/me", env.user_headers)
+
+
+@case("endpoint", "GET /api/users/")
+async def _(env: Environment):
+    await env.get("/api/users/?limit=100", env.admin_headers)
+
+
+@case("endpoint", "GET /api/users/?expand=profile")
+async def _(env: Environment):
+    await env.get("/api/users/?limit=100&expand=profile", env.admin_headers)
+
+
+@case("endpoint", "GET /api/profiles/me")
+async def _(env: Environment):
+    await env.get("/api/profiles/me", env.user_headers)
+
+
+@case("endpoint", "GET /api/profiles/")
+async def _(env: Environment):
+    await env.get("/api/profiles/?limit=100", env.admin_headers)
+
+
+async def measure(fn: Callable[[], Awaitable[Any]], repeat: int) -> Dict[str, float]:
+    """Медиана, p95 и минимум по repeat вызовам после одного прогревочного"""
+    await fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "runs": repeat,
+        "median_ms": round(samples[len(samples) // 2] * 1000, 4),
+        "p95_ms": round(samples[int((len(samples) - 1) * 0.95)] * 1000, 4),
+        "min_ms": round(samples[0] * 1000, 4),
+    }
+
+
+def postgres_url(explicit: Optional[str]) -> Optional[str]:
+    """URL Postgres для бенчмарков - только явно заданный"""
+    url = explicit or os.getenv("BENCHMARK_POSTGRES_URL")
+    if not url:
+        return None
+    return url.replace("postgresql://", "postgresql+asyncpg://")
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    backends = [("sqlite", "sqlite+aiosqlite:///:memory:")]
+    url = postgres_url(args.postgres_url)
+    if url:
+        backends.append(("postgres", url))
+
+    cases = [c for c in CASES if not args.only or args.only in c.title]
+    results: Dict[str, Dict[str, float]] = {}
+    for index, (backend, url) in enumerate(backends):
+        env = Environment(backend, url, args.users)
+        try:
+            await env.setup()
+        except Exception as exc:
+            print(f"{backend}: пропущен ({exc.__class__.__name__}: {exc})")
+            continue
+        try:
+            for item in cases:
+                # Кейсы без БД достаточно прогнать на первом бэкенде
+                if not item.uses_db and index > 0:
+                    continue
+                key = f"{backend}/{item.title}" if item.uses_db else item.title
+                repeat = min(args.repeat, item.repeat or args.repeat)
+                results[key] = await measure(lambda: item.fn(env), repeat)
+                print(f"{key:60} {results[key]['median_ms']:10.3f} мс")
+        finally:
+            await env.teardown()
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[str]:
+    """Напечатать сравнение с базовой линией и вернуть регрессии"""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            print(f"{key:60} новый")
+            continue
+        change = current["median_ms"] / previous["median_ms"] - 1
+        mark = ""
+        if change > threshold:
+            mark = "  РЕГРЕССИЯ"
+            regressions.append(key)
+        print(
+            f"{key:60} {previous['median_ms']:10.3f} -> "
+            f"{current['median_ms']:10.3f} мс {change:+7.1%}{mark}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--only", help="Только кейсы, в имени которых есть подстрока")
+    parser.add_argument(
+        "--postgres-url",
+        help="Отдельная база Postgres (схема benchmark в ней пересоздается)",
+    )
+    parser.add_argument("--save", help="Записать результаты как базовую линию (JSON)")
+    parser.add_argument("--compare", help="Сравнить с базовой линией (JSON)")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "users": args.users,
+                    "results": results,
+                },
+                file,
+                ensure_ascii=False,
+                indent=2,
+            )
+        print(f"Базовая линия записана в {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"Регрессии (> {args.threshold:.0%}): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,24 @@
+import os
+
+# Тесты идут в одном процессе: локальный кеш включаем, чтобы эндпоинты
+# проверялись вместе с ним (в настройках по умолчанию он выключен)
+os.environ.setdefault("CACHE_BACKEND", "memory")
+
 import pytest
 import pytest_asyncio
 from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import StaticPool
 import asyncio
+from contextlib import contextmanager
 from typing import AsyncGenerator, Generator
 
 from app.main import app
+from app.core.activity import activity_buffer
+from app.core.email_filter import email_filter
+from app.core.purge import soft_delete_purger
+from app.core.query_counter import capture_queries
+from app.core.warmup import warmup
 from app.core.database import get_db, Base
 from app.core.security import get_password_hash, create_access_token
 from app.models.user import User, Profile
@@ -26,6 +38,21 @@ TestAsyncSessionLocal = async_sessionmaker(
     bind=test_engine, class_=AsyncSession, expire_on_commit=False
 )
 
+# Фоновые задачи работают с тестовой базой
+activity_buffer.session_factory = TestAsyncSessionLocal
+soft_delete_purger.session_factory = TestAsyncSessionLocal
+email_filter.session_factory = TestAsyncSessionLocal
+warmup.engine = test_engine
+warmup.session_factory = TestAsyncSessionLocal
+# Пользователи в тестах создаются напрямую в БД, поэтому фильтр email
+# догружает новые адреса при каждом отрицательном ответе
+email_filter.max_staleness = 0
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Закрывает соединение StaticPool - иначе поток aiosqlite держит процесс"""
+    asyncio.run(test_engine.dispose())
+
 
 @pytest_asyncio.fixture
 async def db_session() -> AsyncGenerator[AsyncSession, None]:
@@ -33,6 +60,9 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
+    # id в новой БД повторяются - снимки прошлых тестов не должны попадать в кеш
+    await get_repository_manager().reset_cache()
+
     async with TestAsyncSessionLocal() as session:
         yield session
 
@@ -109,3 +139,22 @@ def admin_headers(test_superuser: User) -> dict:
         data={"sub": test_superuser.email, "user_id": test_superuser.id}
     )
     return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture
+def assert_max_queries():
+    """
+    Проверка числа SQL-запросов блока:
+
+        with assert_max_queries(3):
+            client.get(...)
+    """
+
+    @contextmanager
+    def check(limit: int):
+        with capture_queries() as stats:
+            yield stats
+        # Ноль запросов - скорее всего, счетчик не видит SQL блока
+        assert 0 < stats.count <= limit, stats.report()
+
+    return check
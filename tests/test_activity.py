@@ -0,0 +1,120 @@
+import asyncio
+
+from app.core.activity import ActivityBuffer
+from tests.conftest import TestAsyncSessionLocal
+
+
+async def test_activity_buffer_flushes_batch(db_session, test_user):
+    """Тест пакетной записи last_login_at / last_seen_at"""
+    buffer = ActivityBuffer(session_factory=TestAsyncSessionLocal)
+    buffer.record_login(test_user.id)
+    buffer.record_seen(test_user.id)
+
+    assert len(buffer) == 1
+    assert await buffer.flush() == 1
+    assert len(buffer) == 0
+
+    await db_session.refresh(test_user)
+    assert test_user.last_login_at is not None
+    assert test_user.last_seen_at is not None
+    assert test_user.updated_at is None
+
+
+async def test_activity_buffer_keeps_last_login(db_session, test_user):
+    """Тест: отметка активности не затирает время входа"""
+    buffer = ActivityBuffer(session_factory=TestAsyncSessionLocal)
+    buffer.record_login(test_user.id)
+    await buffer.flush()
+    await db_session.refresh(test_user)
+    last_login_at = test_user.last_login_at
+
+    buffer.record_seen(test_user.id)
+    await buffer.flush()
+    await db_session.refresh(test_user)
+
+    assert test_user.last_login_at == last_login_at
+    assert test_user.last_seen_at >= last_login_at
+
+
+def test_login_recorded_in_buffer(client, db_session, test_user):
+    """Тест: успешный вход записывает время входа после сброса буфера"""
+    from app.core.activity import activity_buffer
+
+    response = client.post(
+        "/api/auth/login",
+        data={"username": test_user.email, "password": "testpassword123"},
+    )
+
+    assert response.status_code == 200
+    assert client.portal.call(activity_buffer.flush) == 1
+    client.portal.call(db_session.refresh, test_user)
+    assert test_user.last_login_at is not None
+
+
+class FailingSession:
+    """Сессия, запись через которую всегда падает"""
+
+    async def __aenter__(self):
+        raise ConnectionError("БД недоступна")
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+async def test_activity_buffer_bounded_when_db_fails():
+    """Тест: при недоступной БД буфер не растет сверх max_size"""
+    buffer = ActivityBuffer(session_factory=FailingSession, max_size=3)
+    for user_id in range(5):
+        buffer.record_seen(user_id)
+    assert await buffer.flush() == 0
+
+    for user_id in range(5, 10):
+        buffer.record_seen(user_id)
+    await buffer.flush()
+
+    assert len(buffer) == 3
+    assert buffer.dropped == 7
+
+
+class SlowSession:
+    """Сессия, которая пишет долго и отмечает завершенные коммиты"""
+
+    def __init__(self, commits):
+        self.commits = commits
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, *args, **kwargs):
+        await asyncio.sleep(0.05)
+
+    async def commit(self):
+        self.commits.append(True)
+
+
+async def test_stop_drains_in_flight_flush(monkeypatch):
+    """Тест: остановка во время записи не теряет пакет"""
+    commits = []
+    buffer = ActivityBuffer(
+        session_factory=lambda: SlowSession(commits), flush_interval=0.01
+    )
+
+    async def write(db, rows):
+        written.extend(rows)
+        await db.execute()
+
+    written = []
+    monkeypatch.setattr(buffer, "_write", write)
+
+    buffer.start()
+    buffer.record_login(1)
+    await asyncio.sleep(0.02)  # фоновый сброс начал запись
+    buffer.record_seen(2)
+    await buffer.stop()
+
+    assert sorted(row[0] for row in written) == [1, 2]
+    assert len(commits) == 2
+    assert len(buffer) == 0
@@ -0,0 +1,132 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    AdmissionRejected,
+    ConcurrencyLimiter,
+    admission_rejected_total,
+)
+from app.core.metrics import registry
+
+
+async def test_limiter_queue_is_bounded_and_fifo():
+    """Тест: сверх лимита запросы ждут по очереди, сверх очереди - отказ"""
+    limiter = ConcurrencyLimiter(limit=1, queue_size=2, timeout=1)
+    order = []
+
+    await limiter.acquire()
+
+    async def waiter(name):
+        await limiter.acquire()
+        order.append(name)
+
+    tasks = [asyncio.create_task(waiter(name)) for name in ("first", "second")]
+    await asyncio.sleep(0)
+    assert limiter.queued == 2
+
+    with pytest.raises(AdmissionRejected) as exc:
+        await limiter.acquire()
+    assert exc.value.reason == "queue_full"
+
+    limiter.release()
+    limiter.release()
+    await asyncio.gather(*tasks)
+    assert order == ["first", "second"]
+    assert limiter.active == 1
+
+    limiter.release()
+    assert (limiter.active, limiter.queued) == (0, 0)
+
+
+async def test_limiter_wait_timeout():
+    """Тест: истекшее ожидание - отказ, место в очереди освобождается"""
+    limiter = ConcurrencyLimiter(limit=1, queue_size=1, timeout=0.01)
+    await limiter.acquire()
+
+    with pytest.raises(AdmissionRejected) as exc:
+        await limiter.acquire()
+
+    assert exc.value.reason == "timeout"
+    assert limiter.queued == 0
+    limiter.release()
+    assert limiter.active == 0
+
+
+def limited_app(controller: AdmissionController):
+    app = FastAPI()
+    release = asyncio.Event()
+    bodies = []
+
+    @app.post("/api/auth/login")
+    async def login():
+        await release.wait()
+        return {"ok": True}
+
+    @app.get("/api/users/me")
+    async def me():
+        return {"ok": True}
+
+    @app.put("/api/users/me")
+    async def update_me(data: dict):
+        bodies.append(data)
+        return data
+
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    return app, release, bodies
+
+
+async def test_cpu_overload_sheds_without_blocking_reads():
+    """Тест: переполненный класс cpu отвечает 503, чтения обслуживаются"""
+    controller = AdmissionController(
+        {"cpu": (1, 1), "default": (10, 10)}, timeout=5, retry_after=7
+    )
+    app, release, _ = limited_app(controller)
+    rejected = admission_rejected_total.value("cpu", "queue_full")
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        held = [asyncio.create_task(client.post("/api/auth/login")) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        response = await client.post("/api/auth/login")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "7"
+
+        response = await client.get("/api/users/me")
+        assert response.status_code == 200
+
+        release.set()
+        assert [r.status_code for r in await asyncio.gather(*held)] == [200, 200]
+
+    assert admission_rejected_total.value("cpu", "queue_full") == rejected + 1
+    assert controller.limiters["cpu"].active == 0
+
+
+async def test_password_update_is_cpu_class():
+    """Тест: PUT /me с паролем идет в класс cpu, тело доходит до обработчика"""
+    controller = AdmissionController({"cpu": (0, 0), "default": (10, 10)})
+    app, _, bodies = limited_app(controller)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.put("/api/users/me", json={"full_name": "Имя"})
+        assert response.status_code == 200
+
+        response = await client.put("/api/users/me", json={"password": "secret123"})
+        assert response.status_code == 503
+
+    assert bodies == [{"full_name": "Имя"}]
+
+
+def test_limits_are_exported():
+    """Тест: лимиты и очередь классов видны в /metrics"""
+    text = registry.render()
+    assert 'admission_requests{class="cpu",state="limit"}' in text
+    assert 'admission_requests{class="default",state="queued"}' in text
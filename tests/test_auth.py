@@ -46,11 +46,12 @@ def test_register_short_password(client: TestClient):
     assert response.status_code == 422
 
 
-def test_login_success(client: TestClient, test_user):
+def test_login_success(client: TestClient, test_user, assert_max_queries):
     """Тест успешной авторизации"""
     form_data = {"username": test_user.email, "password": "testpassword123"}
 
-    response = client.post("/api/auth/login", data=form_data)
+    with assert_max_queries(3):
+        response = client.post("/api/auth/login", data=form_data)
 
     assert response.status_code == 200
     data = response.json()
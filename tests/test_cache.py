@@ -0,0 +1,197 @@
+import json
+from datetime import datetime
+
+import pytest_asyncio
+from sqlalchemy import select, update
+
+from app.core.query_counter import capture_queries
+from app.models.user import User
+from app.repositories.cache import (
+    CachedProfileRepository,
+    CachedUserRepository,
+    LRUCache,
+    LocalSharedClient,
+    SharedCache,
+    _snapshot,
+)
+
+
+@pytest_asyncio.fixture(params=["memory", "shared"])
+async def cache_backend(request):
+    if request.param == "memory":
+        return LRUCache()
+    return SharedCache(LocalSharedClient())
+
+
+async def test_lru_cache_evicts_and_expires():
+    """Тест вытеснения по размеру и истечения TTL"""
+    cache = LRUCache(max_size=2, ttl=60)
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    await cache.get("a")
+    await cache.set("c", 3)
+
+    assert await cache.get("a") == 1
+    assert await cache.get("b") is None
+
+    expired = LRUCache(max_size=2, ttl=-1)
+    await expired.set("a", 1)
+    assert await expired.get("a") is None
+
+
+async def test_cached_user_repository_hits_and_invalidates(
+    db_session, test_user, cache_backend
+):
+    """Тест read-through кеша и инвалидации при записи"""
+    repo = CachedUserRepository(cache_backend)
+
+    await repo.get_by_id(db_session, test_user.id)
+    user = await repo.get_by_id(db_session, test_user.id)
+    assert user.id == test_user.id
+    assert repo.stats.hits == 1
+    assert repo.stats.misses == 1
+
+    await repo.update(db_session, db_obj=user, obj_in={"email": "cached@example.com"})
+    db_session.expunge_all()
+
+    user = await repo.get_by_id(db_session, test_user.id)
+    assert user.email == "cached@example.com"
+    assert repo.stats.misses == 2
+
+
+async def test_cached_profile_update_invalidates_user_with_profile(
+    db_session, test_user, cache_backend
+):
+    """Тест: изменение профиля сбрасывает закешированного пользователя"""
+    users = CachedUserRepository(cache_backend)
+    profiles = CachedProfileRepository(cache_backend)
+
+    user = await users.get_by_id_with_profile(db_session, test_user.id)
+    profile = await profiles.get_by_user_id(db_session, test_user.id)
+    await profiles.update_profile(db_session, profile, first_name="Cached")
+    db_session.expunge_all()
+
+    user = await users.get_by_id_with_profile(db_session, test_user.id)
+    assert user.profile.first_name == "Cached"
+    assert users.stats.hits == 0
+
+
+async def test_cached_user_repository_hides_soft_deleted(
+    db_session, test_user, cache_backend
+):
+    """Тест: снимок удаленного пользователя не отдается из get_by_id"""
+    repo = CachedUserRepository(cache_backend)
+    await repo.soft_delete(db_session, test_user.id)
+
+    # get_by_field видит удаленных и кладет снимок в кеш
+    assert await repo.get_by_field(db_session, "email", test_user.email)
+    assert await repo.get_by_id(db_session, test_user.id) is None
+
+
+async def test_cached_profile_hidden_after_user_soft_delete(
+    db_session, test_user, cache_backend
+):
+    """Тест: закешированный профиль удаленного пользователя не отдается"""
+    users = CachedUserRepository(cache_backend)
+    profiles = CachedProfileRepository(cache_backend)
+    assert await profiles.get_by_user_id(db_session, test_user.id)
+
+    await users.soft_delete(db_session, test_user.id)
+    assert await profiles.get_by_user_id(db_session, test_user.id) is None
+
+
+async def test_cache_hit_keeps_loaded_instance(db_session, test_user, cache_backend):
+    """Тест: попадание не перезаписывает уже загруженный в сессию объект"""
+    repo = CachedUserRepository(cache_backend)
+    await repo.get_by_id_with_profile(db_session, test_user.id)
+    await repo.get_by_id(db_session, test_user.id)
+
+    # Изменение в обход репозитория: кеш еще хранит старый снимок
+    await db_session.execute(
+        update(User)
+        .where(User.id == test_user.id)
+        .values(email="fresh@example.com", is_active=False)
+    )
+    db_session.expunge_all()
+    fresh = (
+        await db_session.execute(select(User).where(User.id == test_user.id))
+    ).scalar_one()
+
+    user = await repo.get_by_id_with_profile(db_session, test_user.id)
+    assert user is fresh
+    assert (user.email, user.is_active) == ("fresh@example.com", False)
+    assert user.profile is not None
+    assert await repo.get_by_id(db_session, test_user.id) is fresh
+    assert fresh.email == "fresh@example.com"
+    assert repo.stats.hits == 2
+
+
+async def test_cached_user_with_profile_hit(db_session, test_user, cache_backend):
+    """Тест: повторное чтение пользователя с профилем идет из кеша без SQL"""
+    repo = CachedUserRepository(cache_backend)
+    await repo.get_by_id_with_profile(db_session, test_user.id)
+    db_session.expunge_all()
+
+    with capture_queries() as stats:
+        user = await repo.get_by_id_with_profile(db_session, test_user.id)
+        assert user.email == test_user.email
+        assert user.profile.user_id == test_user.id
+
+    assert stats.count == 0
+    assert repo.stats.hits == 1
+    assert user in db_session and not db_session.dirty
+
+
+async def test_cached_user_with_profile_hides_soft_deleted(
+    db_session, test_user, cache_backend
+):
+    """Тест: снимок удаленного пользователя не отдается из get_by_id_with_profile"""
+    repo = CachedUserRepository(cache_backend)
+    await repo.get_by_id_with_profile(db_session, test_user.id)
+
+    # Удаление в обход репозитория - кеш не сброшен
+    await db_session.execute(
+        update(User).where(User.id == test_user.id).values(is_deleted=True)
+    )
+    await cache_backend.set(
+        f"users:with_profile:{test_user.id}",
+        {
+            "user": {**_snapshot(test_user), "is_deleted": True},
+            "profile": None,
+        },
+    )
+    db_session.expunge_all()
+
+    await repo.get_by_id_with_profile(db_session, test_user.id)
+    assert repo.stats.hits == 0
+
+
+async def test_cached_user_bulk_update_invalidates(
+    db_session, test_user, cache_backend
+):
+    """Тест: массовое обновление сбрасывает закешированных пользователей"""
+    repo = CachedUserRepository(cache_backend)
+    await repo.get_by_id(db_session, test_user.id)
+
+    assert await repo.bulk_update(db_session, [test_user.id], {"is_active": False}) == 1
+    db_session.expunge_all()
+
+    user = await repo.get_by_id(db_session, test_user.id)
+    assert user.is_active is False
+    assert repo.stats.hits == 0
+    assert not hasattr(CachedProfileRepository(cache_backend), "bulk_update")
+
+
+async def test_shared_cache_stores_json(db_session, test_user):
+    """Тест: общий кеш хранит JSON, даты восстанавливаются при попадании"""
+    client = LocalSharedClient()
+    repo = CachedUserRepository(SharedCache(client))
+    await repo.get_by_id(db_session, test_user.id)
+
+    raw = await client.get(f"users:id:{test_user.id}")
+    assert json.loads(raw)["email"] == test_user.email
+
+    db_session.expunge_all()
+    user = await repo.get_by_id(db_session, test_user.id)
+    assert repo.stats.hits == 1
+    assert isinstance(user.created_at, datetime)
@@ -0,0 +1,87 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+
+
+def _make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100, offload_size=1000)
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("x" * 10)
+
+    @app.get("/large")
+    async def large():
+        return PlainTextResponse("x" * 5000, headers={"ETag": '"v1"'})
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(5):
+                yield f"chunk-{i};".encode() * 100
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/encoded")
+    async def encoded():
+        body = gzip.compress(b"y" * 5000)
+        return PlainTextResponse(body, headers={"Content-Encoding": "gzip"})
+
+    return app
+
+
+def test_negotiate_encoding():
+    """Тест выбора кодировки по Accept-Encoding"""
+    assert negotiate_encoding("gzip, br", ["br", "gzip"]) == "br"
+    assert negotiate_encoding("gzip;q=1, br;q=0.5", ["br", "gzip"]) == "gzip"
+    assert negotiate_encoding("gzip;q=0", ["gzip"]) is None
+    assert negotiate_encoding("*", ["gzip"]) == "gzip"
+    assert negotiate_encoding("identity", ["gzip"]) is None
+
+
+def test_compresses_large_response():
+    """Тест сжатия ответа больше минимального размера"""
+    client = TestClient(_make_app())
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.headers["etag"] == 'W/"v1"'
+    assert response.text == "x" * 5000
+    assert int(response.headers["content-length"]) < 5000
+
+
+def test_skips_small_and_unaccepted_responses():
+    """Тест: маленькие ответы и клиенты без gzip получают тело как есть"""
+    client = TestClient(_make_app())
+
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.text == "x" * 5000
+
+
+def test_compresses_streaming_response():
+    """Тест сжатия потокового ответа по частям"""
+    client = TestClient(_make_app())
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == "".join(f"chunk-{i};" * 100 for i in range(5))
+
+
+def test_does_not_recompress_encoded_response():
+    """Тест: уже закодированный ответ не сжимается повторно"""
+    client = TestClient(_make_app())
+    response = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == b"y" * 5000
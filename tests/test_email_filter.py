@@ -0,0 +1,49 @@
+from app.core.email_filter import BloomFilter, EmailFilter
+from tests.conftest import TestAsyncSessionLocal
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Тест: добавленные элементы всегда находятся"""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"user{i}@example.com" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"other{i}@example.com" in bloom for i in range(1000))
+    assert false_positives < 50
+
+
+async def test_email_filter_build_and_catch_up(db_session, test_user):
+    """Тест построения фильтра и догрузки новых пользователей"""
+    from app.models.user import User
+
+    email_filter = EmailFilter(session_factory=TestAsyncSessionLocal, max_staleness=0)
+    assert await email_filter.might_exist("anything@example.com") is True
+
+    await email_filter.build()
+    assert email_filter.ready
+    assert await email_filter.might_exist(test_user.email.upper())
+    assert not await email_filter.might_exist("unknown@example.com")
+
+    # Пользователь, созданный в обход фильтра (например, другим воркером)
+    db_session.add(User(email="late@example.com", hashed_password="x"))
+    await db_session.commit()
+
+    assert await email_filter.might_exist("late@example.com")
+
+
+def test_login_unknown_email_skips_database(client, monkeypatch):
+    """Тест: вход с неизвестным email не обращается к репозиторию"""
+    from app.repositories import get_repository_manager
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("get_by_email не должен вызываться")
+
+    monkeypatch.setattr(get_repository_manager().users, "get_by_email", fail)
+
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "nobody@example.com", "password": "password123"},
+    )
+    assert response.status_code == 401
@@ -0,0 +1,100 @@
+import json
+from datetime import datetime, timezone
+
+from pydantic import TypeAdapter
+
+from app.core.fast_json import RowSerializer
+from app.models.user import Profile, User
+from app.schemas.user import ProfileResponse, UserResponse
+
+user_rows = RowSerializer(
+    UserResponse, User, profile=RowSerializer(ProfileResponse, Profile)
+)
+
+
+def _user(id: int, with_profile: bool) -> User:
+    created = datetime(2024, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc)
+    user = User(
+        id=id,
+        email=f"user{id}@example.com",
+        is_active=True,
+        created_at=created,
+        updated_at=None,
+        last_login_at=created,
+        last_seen_at=None,
+    )
+    user.profile = (
+        Profile(
+            id=id,
+            user_id=id,
+            first_name="Имя",
+            last_name=None,
+            bio="bio",
+            avatar_url=None,
+            completeness_score=50,
+            created_at=created,
+            updated_at=None,
+        )
+        if with_profile
+        else None
+    )
+    return user
+
+
+def _row(user: User) -> tuple:
+    values = [getattr(user, name) for name in user_rows.fields]
+    profile_rows = user_rows.nested["profile"]
+    values.append(user.profile.id if user.profile else None)
+    for name in profile_rows.fields:
+        values.append(getattr(user.profile, name) if user.profile else None)
+    return tuple(values)
+
+
+def test_row_serializer_matches_pydantic():
+    """Тест совпадения быстрого пути с сериализацией pydantic"""
+    users = [_user(1, True), _user(2, False)]
+    adapter = TypeAdapter(list[UserResponse])
+
+    expected = adapter.dump_json(adapter.validate_python(users, from_attributes=True))
+    actual = user_rows.dumps([_row(user) for user in users])
+
+    assert json.loads(actual) == json.loads(expected)
+    assert json.loads(actual)[1]["profile"] is None
+
+
+def test_row_serializer_columns_order():
+    """Тест порядка колонок: сначала поля схемы, затем ключ и поля вложенных"""
+    assert user_rows.width == len(user_rows.fields) + 1 + len(
+        user_rows.nested["profile"].fields
+    )
+    assert user_rows.columns[len(user_rows.fields)] is Profile.id
+    assert user_rows.columns[0] is getattr(User, user_rows.fields[0])
+    assert "profile" not in user_rows.fields
+
+
+def test_projection_narrows_columns():
+    """Тест: проекция выбирает только колонки запрошенных полей"""
+    projection = user_rows.project(["email", "profile.bio"])
+
+    assert projection.fields == ("email",)
+    assert projection.columns == [User.email, Profile.id, Profile.bio]
+    assert user_rows.project(["profile.bio", "email"]) is projection
+    assert user_rows.project(None) is user_rows
+
+
+def test_projection_nested_schema_absorbs_its_fields():
+    """Тест: profile вместе с profile.bio - вложенная схема целиком"""
+    for fields in (["profile", "profile.bio"], ["profile.bio", "profile"]):
+        projection = user_rows.project(["id", *fields])
+        assert projection.nested["profile"].fields == user_rows.nested["profile"].fields
+
+
+def test_projection_null_field_keeps_profile():
+    """Тест: пустое поле профиля не превращает профиль в null"""
+    projection = user_rows.project(["id", "profile.bio"])
+
+    with_profile = json.loads(projection.dumps([(1, 10, None)]))
+    without_profile = json.loads(projection.dumps([(2, None, None)]))
+
+    assert with_profile == [{"id": 1, "profile": {"bio": None}}]
+    assert without_profile == [{"id": 2, "profile": None}]
@@ -0,0 +1,83 @@
+import json
+import time
+
+import pytest
+from starlette.testclient import TestClient
+
+from app.core.warmup import Warmup, warmup
+
+
+def wait_until_ready(client: TestClient, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get("/health/ready")
+        if response.status_code == 200 or time.monotonic() > deadline:
+            return response
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def database_down(monkeypatch):
+    """Прогрев не может открыть соединения, пока state["down"] истинно"""
+    state = {"down": True}
+    original = Warmup._open_connections
+
+    async def open_connections(self):
+        if state["down"]:
+            raise ConnectionRefusedError("database is down")
+        await original(self)
+
+    monkeypatch.setattr(Warmup, "_open_connections", open_connections)
+    monkeypatch.setattr(warmup, "retry_delay", 0.01)
+    monkeypatch.setattr(warmup, "retry_max_delay", 0.05)
+    return state
+
+
+def test_liveness(client: TestClient):
+    """Тест проверки живости"""
+    response = client.get("/health/live")
+    assert response.status_code == 200
+
+
+def test_readiness_after_warmup(client: TestClient):
+    """Тест готовности после прогрева"""
+    response = wait_until_ready(client)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ready"
+    assert data["errors"] == []
+
+
+def test_openapi_is_precompressed(client: TestClient):
+    """Тест отдачи заранее сжатого OpenAPI"""
+    wait_until_ready(client)
+
+    response = client.get("/openapi.json", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert "/api/users/me" in response.json()["paths"]
+
+    raw = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert raw.headers["content-encoding"] == "gzip"
+    assert json.loads(raw.content) == response.json()
+
+    # gzip;q=0 - клиент отказывается от gzip
+    response = client.get("/openapi.json", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in response.headers
+
+
+
+def test_not_ready_while_database_unavailable(database_down, client: TestClient):
+    """Тест: без базы воркер не готов, после восстановления - готов"""
+    for _ in range(5):
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        time.sleep(0.02)
+    assert response.json()["status"] == "warming_up"
+    assert response.json()["errors"] == ["pool: ConnectionRefusedError"]
+
+    database_down["down"] = False
+
+    response = wait_until_ready(client)
+    assert response.status_code == 200
+    assert response.json()["errors"] == []
@@ -0,0 +1,200 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from app.core.compression import CompressionMiddleware
+from app.core.idempotency import IdempotencyMiddleware, IdempotencyStore
+
+
+def idempotent_app(store: IdempotencyStore, wait_timeout: float = 5):
+    app = FastAPI()
+    app.state.calls = []
+    app.state.release = asyncio.Event()
+    app.state.release.set()
+
+    @app.post("/api/auth/register")
+    async def register(data: dict):
+        app.state.calls.append(data)
+        await app.state.release.wait()
+        if data.get("fail"):
+            raise HTTPException(status_code=500, detail="Ошибка")
+        return {"id": len(app.state.calls), "email": data["email"]}
+
+    @app.post("/api/auth/change-password")
+    async def change_password(old_password: str, new_password: str):
+        app.state.calls.append(new_password)
+        return {"message": "Пароль успешно изменен"}
+
+    app.add_middleware(IdempotencyMiddleware, store=store, wait_timeout=wait_timeout)
+    return app
+
+
+def make_client(app: FastAPI) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+async def test_retry_gets_original_response():
+    """Тест: повтор с тем же ключом получает исходный ответ без повторной работы"""
+    app = idempotent_app(IdempotencyStore(ttl=60, max_entries=10))
+    headers = {"Idempotency-Key": "key-1"}
+
+    async with make_client(app) as client:
+        first = await client.post(
+            "/api/auth/register", json={"email": "a@example.com"}, headers=headers
+        )
+        retry = await client.post(
+            "/api/auth/register", json={"email": "a@example.com"}, headers=headers
+        )
+        other = await client.post(
+            "/api/auth/register",
+            json={"email": "a@example.com"},
+            headers={"Idempotency-Key": "key-2"},
+        )
+
+    assert retry.status_code == first.status_code == 200
+    assert retry.json() == first.json() == {"id": 1, "email": "a@example.com"}
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert other.json()["id"] == 2
+    assert len(app.state.calls) == 2
+
+
+async def test_retry_with_other_accept_encoding_is_replayed():
+    """Тест: повтор с другим Accept-Encoding получает сохраненный ответ"""
+    app = idempotent_app(IdempotencyStore(ttl=60, max_entries=10))
+    app.add_middleware(CompressionMiddleware, minimum_size=1)
+    email = "a" * 500 + "@example.com"
+
+    async with make_client(app) as client:
+        first = await client.post(
+            "/api/auth/register",
+            json={"email": email},
+            headers={"Idempotency-Key": "key-1", "Accept-Encoding": "gzip"},
+        )
+        retry = await client.post(
+            "/api/auth/register",
+            json={"email": email},
+            headers={"Idempotency-Key": "key-1", "Accept-Encoding": "identity"},
+        )
+
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in retry.headers
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json() == {"id": 1, "email": email}
+    assert len(app.state.calls) == 1
+
+
+async def test_concurrent_duplicates_wait_for_first():
+    """Тест: одновременные повторы ждут первый запрос и получают его ответ"""
+    app = idempotent_app(IdempotencyStore(ttl=60, max_entries=10))
+    app.state.release.clear()
+    headers = {"Idempotency-Key": "key-1"}
+
+    async with make_client(app) as client:
+        tasks = [
+            asyncio.create_task(
+                client.post(
+                    "/api/auth/register",
+                    json={"email": "a@example.com"},
+                    headers=headers,
+                )
+            )
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.05)
+        app.state.release.set()
+        responses = await asyncio.gather(*tasks)
+
+    assert len(app.state.calls) == 1
+    assert {response.json()["id"] for response in responses} == {1}
+    replayed = [r for r in responses if r.headers.get("Idempotent-Replayed")]
+    assert len(replayed) == 2
+
+
+async def test_key_reuse_with_other_request_and_wait_timeout():
+    """Тест: тот же ключ с другим телом - 422, долгий первый запрос - 409"""
+    app = idempotent_app(IdempotencyStore(ttl=60, max_entries=10), wait_timeout=0.05)
+    headers = {"Idempotency-Key": "key-1"}
+
+    async with make_client(app) as client:
+        await client.post(
+            "/api/auth/register", json={"email": "a@example.com"}, headers=headers
+        )
+        response = await client.post(
+            "/api/auth/register", json={"email": "b@example.com"}, headers=headers
+        )
+        assert response.status_code == 422
+
+        app.state.release.clear()
+        headers = {"Idempotency-Key": "key-2"}
+        first = asyncio.create_task(
+            client.post(
+                "/api/auth/register", json={"email": "c@example.com"}, headers=headers
+            )
+        )
+        await asyncio.sleep(0.01)
+        response = await client.post(
+            "/api/auth/register", json={"email": "c@example.com"}, headers=headers
+        )
+        assert response.status_code == 409
+        app.state.release.set()
+        assert (await first).status_code == 200
+
+
+async def test_server_error_is_not_stored():
+    """Тест: ответ 5xx не сохраняется, повтор выполняется заново"""
+    store = IdempotencyStore(ttl=60, max_entries=10)
+    app = idempotent_app(store)
+    headers = {"Idempotency-Key": "key-1"}
+
+    async with make_client(app) as client:
+        for _ in range(2):
+            response = await client.post(
+                "/api/auth/register",
+                json={"email": "a@example.com", "fail": True},
+                headers=headers,
+            )
+            assert response.status_code == 500
+
+    assert len(app.state.calls) == 2
+    assert len(store) == 0
+
+
+async def test_key_is_scoped_to_user_and_query():
+    """Тест: ключ смены пароля действует в пределах пользователя, параметры в отпечатке"""
+    app = idempotent_app(IdempotencyStore(ttl=60, max_entries=10))
+    params = {"old_password": "old", "new_password": "new"}
+
+    async with make_client(app) as client:
+        for token in ("user-1", "user-1", "user-2"):
+            response = await client.post(
+                "/api/auth/change-password",
+                params=params,
+                headers={"Idempotency-Key": "key", "Authorization": f"Bearer {token}"},
+            )
+            assert response.status_code == 200
+
+        response = await client.post(
+            "/api/auth/change-password",
+            params={"old_password": "old", "new_password": "other"},
+            headers={"Idempotency-Key": "key", "Authorization": "Bearer user-1"},
+        )
+        assert response.status_code == 422
+
+    assert app.state.calls == ["new", "new"]
+
+
+def test_store_expires_entries():
+    """Тест: записи истекают по TTL и вытесняются сверх лимита"""
+    store = IdempotencyStore(ttl=0, max_entries=2)
+    store.begin("a", "fp")
+    store.complete("a", None)
+    assert store.get("a") is None
+
+    for key in ("b", "c", "d"):
+        store.begin(key, "fp").done.set()
+    assert len(store) == 2
+    assert store.get("b") is None
@@ -0,0 +1,78 @@
+import asyncio
+
+from app.core.invalidation import InvalidationBus, UnixSocketTransport
+
+
+def make_bus(directory, received, resets):
+    bus = InvalidationBus(lambda: UnixSocketTransport(str(directory)), coalesce=0.01)
+
+    async def on_event(events):
+        received.append(events)
+
+    async def on_reset():
+        resets.append(True)
+
+    bus.subscribe(on_event, on_reset)
+    return bus
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("Событие не дошло")
+        await asyncio.sleep(0.01)
+
+
+async def test_unix_bus_coalesces_and_skips_own_messages(tmp_path):
+    """Тест рассылки событий между воркерами через unix-сокеты"""
+    first_events, second_events, resets = [], [], []
+    first = make_bus(tmp_path, first_events, resets)
+    second = make_bus(tmp_path, second_events, resets)
+    await first.start()
+    await second.start()
+
+    try:
+        await wait_for(lambda: len(resets) == 2)
+
+        first.publish("user", 1)
+        first.publish("user", 2)
+        first.publish("user", 1)
+
+        await wait_for(lambda: second_events)
+        assert second_events == [{"user": [1, 2]}]
+        assert first_events == []
+    finally:
+        await first.stop()
+        await second.stop()
+
+    assert list(tmp_path.glob("*.sock")) == []
+
+
+async def test_repository_manager_forgets_user_on_event(db_session, test_user):
+    """Тест: событие другого воркера сбрасывает кеш пользователя"""
+    from app.repositories import RepositoryManager
+
+    repos = RepositoryManager()
+    await repos.users.get_by_id_with_profile(db_session, test_user.id)
+    await repos.profiles.get_by_user_id(db_session, test_user.id)
+
+    await repos.handle_invalidation({"user": [test_user.id]})
+
+    await repos.users.get_by_id_with_profile(db_session, test_user.id)
+    await repos.profiles.get_by_user_id(db_session, test_user.id)
+    assert repos.users.stats.hits == 0
+    assert repos.profiles.stats.hits == 0
+
+
+async def test_repository_manager_forgets_profile_on_event(db_session, test_user):
+    """Тест: снимок профиля сбрасывается, даже если соответствие user_id вытеснено"""
+    from app.repositories import RepositoryManager
+
+    repos = RepositoryManager()
+    profile = await repos.profiles.get_by_user_id(db_session, test_user.id)
+    await repos.cache.delete(f"profiles:field:user_id:{test_user.id}")
+
+    await repos.handle_invalidation({"user": [test_user.id], "profile": [profile.id]})
+
+    assert await repos.cache.get(f"profiles:id:{profile.id}") is None
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import sys
+import time
+
+from app.core.loop_monitor import LoopLagMonitor, loop_monitor
+from app.core.metrics import registry
+
+
+def blocking_call():
+    time.sleep(0.3)
+
+
+async def test_blocking_call_is_reported_with_stack(caplog):
+    """Тест: блокировка цикла попадает в метрики и лог со стеком"""
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.1)
+
+    with caplog.at_level(logging.WARNING, logger="app.core.loop_monitor"):
+        monitor.start()
+        await asyncio.sleep(0.05)
+        blocking_call()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    assert monitor.max_lag >= 0.2
+    assert monitor.blocked == 1
+    messages = [record.getMessage() for record in caplog.records]
+    assert len(messages) == 1
+    assert "blocking_call" in messages[0]
+    assert "time.sleep(0.3)" in messages[0]
+
+
+async def test_repeated_blocking_logged_once_per_site(caplog):
+    """Тест: повторные блокировки в одном месте считаются, но в лог идут раз"""
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.1, log_interval=60)
+
+    with caplog.at_level(logging.WARNING, logger="app.core.loop_monitor"):
+        monitor.start()
+        for _ in range(2):
+            await asyncio.sleep(0.05)
+            blocking_call()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    assert monitor.blocked == 2
+    assert len(caplog.records) == 1
+
+
+async def test_no_report_without_blocking(caplog):
+    """Тест: обычная работа цикла не считается блокировкой"""
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.1)
+
+    with caplog.at_level(logging.WARNING, logger="app.core.loop_monitor"):
+        monitor.start()
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+        await monitor.stop()
+
+    assert monitor.max_lag < 0.1
+    assert not caplog.records
+
+
+def test_blocked_metric_reads_monitor_counter(monkeypatch):
+    """Тест: event_loop_blocked_total отдает счетчик глобального сторожа"""
+    monkeypatch.setattr(loop_monitor, "blocked", 3)
+    assert "event_loop_blocked_total 3" in registry.render()
+
+
+def test_logged_sites_expire(monkeypatch):
+    """Тест: места с истекшим интервалом удаляются из журнала"""
+    monitor = LoopLagMonitor(log_interval=60)
+    monitor._logged_at = {("old.py", 1): time.monotonic() - 120}
+    monkeypatch.setattr(
+        "sys._current_frames", lambda: {monitor._loop_thread_id: sys._getframe()}
+    )
+
+    monitor._report(1.0)
+
+    assert ("old.py", 1) not in monitor._logged_at
+    assert len(monitor._logged_at) == 1
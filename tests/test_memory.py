@@ -0,0 +1,83 @@
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from app.api import memory
+from app.core.memory import MemoryDiagnostics, live_object_counts
+from app.core.security import get_current_user
+from app.models.user import Profile, User
+
+
+def test_memory_endpoints_disabled_by_default(client: TestClient, admin_headers):
+    """Тест: без MEMORY_DIAGNOSTICS_ENABLED эндпоинты не подключаются"""
+    response = client.get("/api/admin/memory/", headers=admin_headers)
+    assert response.status_code == 404
+
+
+def test_snapshot_diff_shows_growth():
+    """Тест: разница снимков показывает место выделения памяти"""
+    diagnostics = MemoryDiagnostics(max_snapshots=2)
+    diagnostics.start()
+    try:
+        diagnostics.take_snapshot("before")
+        retained = [bytes(1024) for _ in range(1000)]
+        diagnostics.take_snapshot("after")
+
+        diff = diagnostics.diff("after", "before", limit=5)
+        assert diff[0]["size_diff"] >= 1000 * 1024
+        assert diff[0]["site"].startswith(__file__)
+
+        diagnostics.take_snapshot("third")
+        assert diagnostics.names() == ["after", "third"]
+    finally:
+        diagnostics.stop()
+    assert len(retained) == 1000
+    assert diagnostics.names() == []
+
+
+def test_live_object_counts():
+    """Тест подсчета живых ORM-объектов"""
+    users = [User(email=f"u{i}@example.com") for i in range(5)]
+    profiles = [Profile(user_id=i) for i in range(3)]
+
+    counts = live_object_counts()
+
+    assert counts["User"] >= len(users)
+    assert counts["Profile"] >= len(profiles)
+
+
+def test_memory_endpoints():
+    """Тест эндпоинтов диагностики памяти при включенной настройке"""
+    app = FastAPI()
+    app.include_router(memory.router, prefix="/api/admin/memory")
+    app.dependency_overrides[get_current_user] = lambda: User(is_superuser=True)
+    client = TestClient(app)
+
+    response = client.post("/api/admin/memory/snapshots/base")
+    assert response.status_code == 409
+
+    response = client.post("/api/admin/memory/start", params={"frames": 2})
+    assert response.json()["tracing"] is True
+    try:
+        client.post("/api/admin/memory/snapshots/base")
+        response = client.post("/api/admin/memory/snapshots/next")
+        assert response.json()["snapshots"] == ["base", "next"]
+
+        response = client.get("/api/admin/memory/snapshots/next", params={"limit": 3})
+        assert response.status_code == 200
+        assert len(response.json()) <= 3
+
+        response = client.get("/api/admin/memory/snapshots/next/diff/base")
+        assert response.status_code == 200
+
+        response = client.get("/api/admin/memory/snapshots/next/diff/missing")
+        assert response.status_code == 404
+        assert "missing" in response.json()["detail"]
+
+        response = client.get("/api/admin/memory/objects")
+        assert set(response.json()) >= {"User", "Profile", "identity_map_entries"}
+    finally:
+        response = client.post("/api/admin/memory/stop")
+    assert response.json()["tracing"] is False
+
+    app.dependency_overrides[get_current_user] = lambda: User(is_superuser=False)
+    assert client.get("/api/admin/memory/").status_code == 403
@@ -0,0 +1,67 @@
+from starlette.testclient import TestClient
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram, password_hash_duration_seconds
+
+
+def test_histogram_render_is_cumulative():
+    """Тест кумулятивных корзин гистограммы в формате Prometheus"""
+    histogram = Histogram("latency_seconds", "Задержка", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+
+
+def test_counter_escapes_labels():
+    """Тест экранирования значений меток"""
+    counter = Counter("events_total", "События", ("name",))
+    counter.inc('a"b')
+    assert 'events_total{name="a\\"b"} 1' in counter.render()
+
+
+def test_metrics_endpoint(client: TestClient, test_user, auth_headers, monkeypatch):
+    """Тест /metrics: маршруты по шаблону, пул, кеш, хеширование паролей"""
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-token")
+    verifications = password_hash_duration_seconds.count("verify")
+    client.post(
+        "/api/auth/login",
+        data={"username": test_user.email, "password": "testpassword123"},
+    )
+    client.get(f"/api/profiles/{test_user.id}", headers=auth_headers)
+
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert (
+        'http_requests_total{method="GET",route="/api/profiles/{user_id}",status="200"}'
+        in body
+    )
+    assert (
+        'http_request_duration_seconds_bucket{method="POST",route="/api/auth/login"'
+        in body
+    )
+    assert "http_requests_in_flight 1" in body
+    assert "db_pool_connections" in body
+    assert 'cache_hits_total{repository="users"}' in body
+    assert 'subsystem_state{name="warmup_ready"}' in body
+    assert 'password_hash_threads{state="busy"} 0' in body
+    assert password_hash_duration_seconds.count("verify") == verifications + 1
+
+
+def test_metrics_endpoint_requires_access(client: TestClient, monkeypatch):
+    """Тест: /metrics закрыт для адресов вне списка и без токена"""
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-token")
+    assert client.get("/metrics").status_code == 403
+    response = client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+    assert response.status_code == 403
+
+    monkeypatch.setattr(settings, "METRICS_ALLOWED_IPS", ["testclient"])
+    assert client.get("/metrics").status_code == 200
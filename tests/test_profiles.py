@@ -1,9 +1,12 @@
 from starlette.testclient import TestClient
 
 
-def test_get_current_user_profile(client: TestClient, test_user, auth_headers):
+def test_get_current_user_profile(
+    client: TestClient, test_user, auth_headers, assert_max_queries
+):
     """Тест получения профиля текущего пользователя"""
-    response = client.get("/api/profiles/me", headers=auth_headers)
+    with assert_max_queries(3):
+        response = client.get("/api/profiles/me", headers=auth_headers)
 
     assert response.status_code == 200
     data = response.json()
@@ -12,11 +15,16 @@ def test_get_current_user_profile(client: TestClient, test_user, auth_headers):
     assert data["last_name"] == "User"
 
 
-def test_update_current_user_profile(client: TestClient, auth_headers):
+def test_update_current_user_profile(
+    client: TestClient, auth_headers, assert_max_queries
+):
     """Тест обновления профиля текущего пользователя"""
     update_data = {"first_name": "Updated", "last_name": "Name", "bio": "Updated bio"}
 
-    response = client.put("/api/profiles/me", json=update_data, headers=auth_headers)
+    with assert_max_queries(4):
+        response = client.put(
+            "/api/profiles/me", json=update_data, headers=auth_headers
+        )
 
     assert response.status_code == 200
     data = response.json()
@@ -57,9 +65,12 @@ def test_get_nonexistent_profile(client: TestClient, auth_headers):
     assert response.status_code == 404
 
 
-def test_get_all_profiles_as_superuser(client: TestClient, admin_headers):
+def test_get_all_profiles_as_superuser(
+    client: TestClient, admin_headers, assert_max_queries
+):
     """Тест получения всех профилей суперпользователем"""
-    response = client.get("/api/profiles/", headers=admin_headers)
+    with assert_max_queries(2):
+        response = client.get("/api/profiles/", headers=admin_headers)
 
     assert response.status_code == 200
     data = response.json()
@@ -70,3 +81,197 @@ def test_get_all_profiles_as_regular_user(client: TestClient, auth_headers):
     """Тест получения всех профилей обычным пользователем"""
     response = client.get("/api/profiles/", headers=auth_headers)
     assert response.status_code == 403
+
+
+# PNG 1x1 пиксель
+PNG_PIXEL = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c63f8ffff3f0005fe02fea7d6a4bd00"
+    "00000049454e44ae426082"
+)
+
+
+def test_upload_avatar_deduplicates_content(
+    client: TestClient, auth_headers, tmp_path, monkeypatch
+):
+    """Тест загрузки аватара с дедупликацией по содержимому"""
+    from app.services.avatar_service import avatar_storage
+
+    monkeypatch.setattr(avatar_storage, "root", tmp_path / "avatars")
+    files = {"file": ("avatar.png", PNG_PIXEL, "image/png")}
+
+    first = client.post("/api/profiles/me/avatar", files=files, headers=auth_headers)
+    second = client.post("/api/profiles/me/avatar", files=files, headers=auth_headers)
+
+    assert first.status_code == 200
+    avatar_url = first.json()["avatar_url"]
+    assert avatar_url == second.json()["avatar_url"]
+    assert len(list((tmp_path / "avatars").glob("*/*.png"))) >= 1
+
+    response = client.get(avatar_url)
+    assert response.status_code == 200
+    assert response.content == PNG_PIXEL
+    assert "immutable" in response.headers["cache-control"]
+
+    etag = response.headers["etag"]
+    response = client.get(avatar_url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_upload_avatar_rejects_non_image(
+    client: TestClient, auth_headers, tmp_path, monkeypatch
+):
+    """Тест загрузки файла, не являющегося изображением"""
+    from app.services.avatar_service import avatar_storage
+
+    monkeypatch.setattr(avatar_storage, "root", tmp_path / "avatars")
+    files = {"file": ("avatar.txt", b"not an image", "text/plain")}
+
+    response = client.post("/api/profiles/me/avatar", files=files, headers=auth_headers)
+
+    assert response.status_code == 400
+    assert list((tmp_path / "avatars").glob("**/*.part")) == []
+
+
+def test_get_profile_conditional_etag(client: TestClient, auth_headers):
+    """Тест условного GET профиля по ETag"""
+    response = client.get("/api/profiles/me", headers=auth_headers)
+    etag = response.headers["etag"]
+    assert "last-modified" in response.headers
+
+    response = client.get(
+        "/api/profiles/me", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+
+    client.put("/api/profiles/me", json={"bio": "Changed"}, headers=auth_headers)
+
+    response = client.get(
+        "/api/profiles/me", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_get_profile_conditional_last_modified(
+    client: TestClient, test_user, auth_headers
+):
+    """Тест условного GET профиля по If-Modified-Since"""
+    response = client.get(f"/api/profiles/{test_user.id}", headers=auth_headers)
+    last_modified = response.headers["last-modified"]
+
+    response = client.get(
+        f"/api/profiles/{test_user.id}",
+        headers={**auth_headers, "If-Modified-Since": last_modified},
+    )
+    assert response.status_code == 304
+
+
+def test_completeness_score_updated_on_write(client: TestClient, auth_headers):
+    """Тест пересчета completeness_score при обновлении профиля"""
+    response = client.get("/api/profiles/me", headers=auth_headers)
+    assert response.json()["completeness_score"] == 75
+
+    response = client.put("/api/profiles/me", json={"bio": ""}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["completeness_score"] == 50
+
+
+def test_completeness_distribution(
+    client: TestClient, test_user, admin_headers, auth_headers
+):
+    """Тест распределения профилей по заполненности"""
+    response = client.get(
+        "/api/profiles/completeness/distribution", headers=admin_headers
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == sum(bucket["count"] for bucket in data["distribution"])
+    assert {"score": 75, "count": 1} in data["distribution"]
+
+    response = client.get(
+        "/api/profiles/completeness/distribution", headers=auth_headers
+    )
+    assert response.status_code == 403
+
+
+def test_get_profile_sparse_fields(client: TestClient, test_user, auth_headers):
+    """Тест fields= на профиле по ID"""
+    response = client.get(
+        f"/api/profiles/{test_user.id}?fields=first_name,last_name",
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"first_name": "Test", "last_name": "User"}
+    assert "etag" in response.headers
+
+
+def test_get_all_profiles_sparse_fields(client: TestClient, test_user, admin_headers):
+    """Тест fields= на списке профилей"""
+    response = client.get("/api/profiles/?fields=user_id", headers=admin_headers)
+
+    assert response.status_code == 200
+    assert {"user_id": test_user.id} in response.json()
+
+
+def test_body_size_limit_before_upload_is_read():
+    """Тест: загрузка больше лимита отклоняется с 413 до вызова обработчика"""
+    from fastapi import FastAPI, File, UploadFile
+
+    from app.core.body_limit import BodySizeLimitMiddleware
+
+    test_app = FastAPI()
+    received = []
+
+    @test_app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        received.append(file.filename)
+        return {}
+
+    test_app.add_middleware(BodySizeLimitMiddleware, limits={"/upload": 1024})
+    client = TestClient(test_app)
+
+    files = {"file": ("avatar.png", PNG_PIXEL, "image/png")}
+    assert client.post("/upload", files=files).status_code == 200
+
+    files = {"file": ("avatar.png", PNG_PIXEL + b"\0" * 2048, "image/png")}
+    response = client.post("/upload", files=files)
+    assert response.status_code == 413
+
+    # Без Content-Length тело считается по мере чтения
+    def chunks():
+        yield b"x" * 1000
+        yield b"x" * 1000
+
+    response = client.post(
+        "/upload",
+        content=chunks(),
+        headers={"Content-Type": "multipart/form-data; boundary=b"},
+    )
+    assert response.status_code == 413
+    assert received == ["avatar.png"]
+
+
+def test_avatar_if_none_match_list(
+    client: TestClient, auth_headers, tmp_path, monkeypatch
+):
+    """Тест: If-None-Match разбирается как список ETag с W/ и *"""
+    from app.services.avatar_service import avatar_storage
+
+    monkeypatch.setattr(avatar_storage, "root", tmp_path / "avatars")
+    files = {"file": ("avatar.png", PNG_PIXEL, "image/png")}
+    avatar_url = client.post(
+        "/api/profiles/me/avatar", files=files, headers=auth_headers
+    ).json()["avatar_url"]
+    etag = client.get(avatar_url).headers["etag"]
+
+    for header, expected in (
+        (f'"other", W/{etag}', 304),
+        ("*", 304),
+        (etag[:-2] + '"', 200),
+    ):
+        response = client.get(avatar_url, headers={"If-None-Match": header})
+        assert response.status_code == expected, header
@@ -0,0 +1,118 @@
+import os
+import pstats
+import time
+
+import pytest
+from starlette.testclient import TestClient
+
+from app.core.profiling import (
+    RequestProfiler,
+    issue_token,
+    request_profiler,
+    verify_token,
+)
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    """Глобальный профилировщик с временным каталогом и исходными настройками"""
+    saved = (
+        request_profiler.directory,
+        request_profiler.sample_rate,
+        request_profiler.format,
+    )
+    request_profiler.directory = str(tmp_path)
+    yield request_profiler
+    (
+        request_profiler.directory,
+        request_profiler.sample_rate,
+        request_profiler.format,
+    ) = saved
+
+
+def test_profile_token_signature():
+    """Тест подписанного токена: подделанный и просроченный отклоняются"""
+    token = issue_token(60)
+    assert verify_token(token)
+
+    expires, _, signature = token.partition(".")
+    assert not verify_token(f"{int(expires) + 1}.{signature}")
+    assert not verify_token(f"{expires}.{'0' * len(signature)}")
+    assert not verify_token(issue_token(-1))
+    assert not verify_token("garbage")
+
+
+def test_rotation_keeps_newest_files(tmp_path):
+    """Тест ротации: старые профили удаляются сверх лимита числа файлов"""
+    profiler = RequestProfiler(directory=str(tmp_path), max_files=2)
+    for i in range(4):
+        path = tmp_path / f"20260101T00000{i}-GET-api-{i}.pstats"
+        path.write_bytes(b"x")
+        stamp = time.time() - 10 + i
+        os.utime(path, (stamp, stamp))
+
+    profiler.rotate()
+
+    names = [item["name"] for item in profiler.list()]
+    assert names == [
+        "20260101T000003-GET-api-3.pstats",
+        "20260101T000002-GET-api-2.pstats",
+    ]
+
+
+def test_profiling_requires_superuser(client: TestClient, auth_headers):
+    """Тест: управление профилированием доступно только суперпользователю"""
+    response = client.get("/api/admin/profiling/", headers=auth_headers)
+    assert response.status_code == 403
+
+
+def test_signed_header_profiles_request(
+    client: TestClient, profiler, admin_headers, auth_headers
+):
+    """Тест: запрос с подписанным заголовком профилируется и профиль скачивается"""
+    response = client.post("/api/admin/profiling/token", headers=admin_headers)
+    assert response.status_code == 200
+    token = response.json()
+
+    response = client.get(
+        "/api/users/me", headers={**auth_headers, token["header"]: token["token"]}
+    )
+    assert response.status_code == 200
+    filename = response.headers["X-Profile"]
+    assert "api_users_me" in filename
+
+    # Без заголовка и с нулевой долей запрос не профилируется
+    assert "X-Profile" not in client.get("/api/users/me", headers=auth_headers).headers
+
+    response = client.get(
+        "/api/admin/profiling/profiles",
+        params={"route": "users_me"},
+        headers=admin_headers,
+    )
+    assert [item["name"] for item in response.json()] == [filename]
+
+    response = client.get(
+        f"/api/admin/profiling/profiles/{filename}", headers=admin_headers
+    )
+    assert response.status_code == 200
+    path = profiler.path(filename)
+    assert pstats.Stats(path).total_calls > 0
+
+
+def test_sample_rate_and_collapsed_format(client: TestClient, profiler, admin_headers):
+    """Тест: доля запросов и формат collapsed задаются через админский эндпоинт"""
+    response = client.put(
+        "/api/admin/profiling/",
+        json={"sample_rate": 1, "format": "collapsed"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["sample_rate"] == 1
+
+    response = client.get("/health/live")
+    assert response.headers["X-Profile"].endswith(".collapsed")
+
+    response = client.get(
+        "/api/admin/profiling/profiles/..%2F..%2Fetc%2Fpasswd", headers=admin_headers
+    )
+    assert response.status_code == 404
@@ -0,0 +1,55 @@
+import logging
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from starlette.testclient import TestClient
+
+from app.core.query_counter import QueryCounterMiddleware, QueryStats, capture_queries
+from tests.conftest import TestAsyncSessionLocal
+
+
+def test_query_stats_repeated_shapes():
+    """Тест группировки запросов по форме"""
+    stats = QueryStats()
+    for _ in range(3):
+        stats.record("SELECT *\n  FROM users WHERE id = ?", 0.001)
+    stats.record("SELECT 1", 0.001)
+
+    assert stats.count == 4
+    assert stats.repeated(3) == [("SELECT * FROM users WHERE id = ?", 3)]
+
+
+def test_middleware_logs_budget_and_n_plus_one(caplog):
+    """Тест: запрос сверх бюджета и с повторами логируется"""
+    test_app = FastAPI()
+    test_app.add_middleware(QueryCounterMiddleware, budget=2, repeat_threshold=3)
+
+    @test_app.get("/n-plus-one")
+    async def n_plus_one():
+        async with TestAsyncSessionLocal() as db:
+            for user_id in range(4):
+                await db.execute(text("SELECT :id"), {"id": user_id})
+        return {}
+
+    with caplog.at_level(logging.WARNING, logger="app.core.query_counter"):
+        TestClient(test_app).get("/n-plus-one")
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("N+1" in message and "4x SELECT ?" in message for message in messages)
+    assert any("превысил бюджет запросов (2)" in message for message in messages)
+
+
+def test_capture_queries_without_middleware():
+    """Тест: capture_queries считает запросы и без QueryCounterMiddleware"""
+    test_app = FastAPI()
+
+    @test_app.get("/query")
+    async def query():
+        async with TestAsyncSessionLocal() as db:
+            await db.execute(text("SELECT 1"))
+        return {}
+
+    with capture_queries() as stats:
+        TestClient(test_app).get("/query")
+
+    assert stats.count == 1
@@ -83,3 +83,61 @@ async def test_profile_repository_search_by_name(db_session, profile_repo):
     assert all(
         "Test" in profile.first_name for profile in profiles if profile.first_name
     )
+
+
+async def test_user_repository_soft_delete_hides_user(db_session, user_repo, test_user):
+    """Тест: мягко удаленный пользователь не виден в обычных запросах"""
+    deleted_user = await user_repo.soft_delete(db_session, test_user.id)
+
+    assert deleted_user.is_deleted is True
+    assert deleted_user.deleted_at is not None
+    assert await user_repo.get_by_id(db_session, test_user.id) is None
+    assert await user_repo.get_by_email(db_session, test_user.email) is None
+    assert (
+        await user_repo.get_by_email(db_session, test_user.email, include_deleted=True)
+        is not None
+    )
+
+
+async def test_profile_repository_hides_deleted_users(
+    db_session, user_repo, profile_repo, test_user
+):
+    """Тест: профиль мягко удаленного пользователя не находится"""
+    await user_repo.soft_delete(db_session, test_user.id)
+
+    assert await profile_repo.get_by_user_id(db_session, test_user.id) is None
+    assert await profile_repo.get_version_by_user_id(db_session, test_user.id) is None
+    assert await profile_repo.get_profiles_by_name(db_session, first_name="Test") == []
+
+
+async def test_completeness_distribution_skips_deleted_users(
+    db_session, user_repo, profile_repo, test_user
+):
+    """Тест: профили мягко удаленных пользователей не входят в распределение"""
+    assert await profile_repo.get_completeness_distribution(db_session) == [(75, 1)]
+
+    await user_repo.soft_delete(db_session, test_user.id)
+
+    assert await profile_repo.get_completeness_distribution(db_session) == []
+
+
+async def test_user_repository_purge_deleted(db_session, user_repo, test_user):
+    """Тест физической очистки мягко удаленных пользователей"""
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import select
+    from app.models.user import User, Profile
+
+    await user_repo.soft_delete(db_session, test_user.id)
+
+    # Срок хранения еще не истек
+    past = datetime.now(timezone.utc) - timedelta(days=1)
+    assert await user_repo.purge_deleted(db_session, past) == 0
+
+    future = datetime.now(timezone.utc) + timedelta(days=1)
+    assert await user_repo.purge_deleted(db_session, future, limit=10) == 1
+
+    db_session.expunge_all()
+    users = (await db_session.execute(select(User))).scalars().all()
+    profiles = (await db_session.execute(select(Profile))).scalars().all()
+    assert users == []
+    assert profiles == []
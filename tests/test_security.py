@@ -1,4 +1,15 @@
-from app.core.security import verify_password, get_password_hash, create_access_token
+import asyncio
+import threading
+
+from app.core.security import (
+    create_access_token,
+    get_password_hash,
+    get_password_hash_async,
+    pwd_context,
+    verify_password,
+    verify_password_async,
+)
+from app.core.metrics import password_hash_duration_seconds
 from jose import jwt
 from app.core.config import settings
 
@@ -25,3 +36,45 @@ def test_create_access_token():
     assert payload["sub"] == "test@example.com"
     assert payload["user_id"] == 1
     assert "exp" in payload
+
+
+async def test_password_hashing_async():
+    """Тест хеширования и проверки пароля в потоках bcrypt"""
+    hashed = await get_password_hash_async("testpassword123")
+
+    assert await verify_password_async("testpassword123", hashed) is True
+    assert await verify_password_async("wrongpassword", hashed) is False
+
+
+async def test_password_hashing_off_event_loop(monkeypatch):
+    """Тест: пока идет bcrypt, цикл событий продолжает выполнять задачи"""
+    ticked = threading.Event()
+
+    def slow_hash(password):
+        # В потоке цикла событий тикер не смог бы выполниться - ожидание
+        # завершилось бы по таймауту
+        return "hashed" if ticked.wait(timeout=5) else "loop blocked"
+
+    async def ticker():
+        for _ in range(10):
+            await asyncio.sleep(0)
+        ticked.set()
+
+    monkeypatch.setattr(pwd_context, "hash", slow_hash)
+    hashed, _ = await asyncio.gather(get_password_hash_async("password"), ticker())
+
+    assert hashed == "hashed"
+
+
+async def test_password_hash_metrics_updated_on_loop_thread(monkeypatch):
+    """Тест: гистограмма bcrypt обновляется из потока цикла событий"""
+    threads = []
+    monkeypatch.setattr(
+        password_hash_duration_seconds,
+        "observe",
+        lambda value, *labels: threads.append(threading.get_ident()),
+    )
+
+    await get_password_hash_async("password")
+
+    assert threads == [threading.get_ident()]
@@ -0,0 +1,61 @@
+import pytest
+
+from app.core import server
+from app.core.config import settings
+
+
+def test_worker_count_follows_cpus_and_limits(monkeypatch):
+    """Тест: по умолчанию воркер на CPU, но не больше SERVER_MAX_WORKERS"""
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 0)
+    monkeypatch.setattr(settings, "SERVER_MAX_WORKERS", 4)
+
+    monkeypatch.setattr(server, "available_cpus", lambda: 2)
+    assert server.worker_count() == 2
+
+    monkeypatch.setattr(server, "available_cpus", lambda: 16)
+    assert server.worker_count() == 4
+
+
+def test_worker_count_explicit(monkeypatch):
+    """Тест: явное число воркеров важнее автоматического"""
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 3)
+    assert server.worker_count() == 3
+    assert server.worker_count(6) == 6
+
+
+def test_server_options_prefer_fast_loop_and_parser(monkeypatch):
+    """Тест: uvloop и httptools выбираются, только если установлены"""
+    monkeypatch.setattr(server, "_installed", lambda module: True)
+    options = server.server_options(port=9000, workers=2)
+    assert options["loop"] == "uvloop"
+    assert options["http"] == "httptools"
+    assert options["port"] == 9000
+    assert options["workers"] == 2
+    assert options["backlog"] == settings.SERVER_BACKLOG
+    assert options["timeout_graceful_shutdown"] == settings.SERVER_GRACEFUL_TIMEOUT
+
+    monkeypatch.setattr(server, "_installed", lambda module: False)
+    options = server.server_options()
+    assert (options["loop"], options["http"]) == ("asyncio", "h11")
+
+
+def test_memory_cache_needs_invalidation_with_workers(monkeypatch):
+    """Тест: локальный кеш без шины инвалидации нельзя запускать в нескольких воркерах"""
+    monkeypatch.setattr(settings, "CACHE_BACKEND", "memory")
+    monkeypatch.setattr(settings, "INVALIDATION_TRANSPORT", "none")
+    monkeypatch.setattr(settings, "IDEMPOTENCY_ENABLED", False)
+    server.check_workers_config(1)
+    with pytest.raises(RuntimeError):
+        server.check_workers_config(2)
+
+    monkeypatch.setattr(settings, "INVALIDATION_TRANSPORT", "unix")
+    server.check_workers_config(2)
+
+
+def test_idempotency_needs_single_worker(monkeypatch):
+    """Тест: ключи идемпотентности в памяти процесса - только с одним воркером"""
+    monkeypatch.setattr(settings, "CACHE_BACKEND", "none")
+    monkeypatch.setattr(settings, "IDEMPOTENCY_ENABLED", True)
+    server.check_workers_config(1)
+    with pytest.raises(RuntimeError):
+        server.check_workers_config(2)
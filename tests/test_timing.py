@@ -0,0 +1,63 @@
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from app.core.timing import RequestTimings, ServerTimingMiddleware, timed
+from app.main import app
+
+
+def _phases(header: str) -> dict:
+    return {
+        part.split(";")[0].strip(): part for part in header.split(",") if part.strip()
+    }
+
+
+def test_timed_without_request_is_noop():
+    """Тест: вне запроса замер ничего не записывает"""
+    with timed("bcrypt") as context:
+        pass
+    assert context.timings is None
+
+
+def test_request_timings_header():
+    """Тест формата заголовка Server-Timing"""
+    timings = RequestTimings()
+    timings.add("sql", 0.002)
+    timings.add("sql", 0.001)
+
+    header = timings.header(0.010)
+    assert 'sql;dur=3.00;desc="x2"' in header
+    assert "total;dur=10.00" in header
+
+
+def test_server_timing_on_login(client: TestClient, test_user):
+    """Тест разбивки /api/auth/login по фазам"""
+    # Фикстура client уже подменила БД; оборачиваем приложение middleware
+    timing_client = TestClient(ServerTimingMiddleware(app, log=True))
+    response = timing_client.post(
+        "/api/auth/login",
+        data={"username": test_user.email, "password": "testpassword123"},
+    )
+
+    assert response.status_code == 200
+    phases = _phases(response.headers["server-timing"])
+    assert {"bcrypt", "jwt", "sql", "total"} <= set(phases)
+
+
+def test_server_timing_middleware_isolated():
+    """Тест: фазы одного запроса не попадают в другой"""
+    test_app = FastAPI()
+    test_app.add_middleware(ServerTimingMiddleware, log=False)
+
+    @test_app.get("/work")
+    async def work():
+        with timed("work"):
+            pass
+        return {}
+
+    @test_app.get("/idle")
+    async def idle():
+        return {}
+
+    client = TestClient(test_app)
+    assert "work" in _phases(client.get("/work").headers["server-timing"])
+    assert "work" not in _phases(client.get("/idle").headers["server-timing"])
@@ -0,0 +1,164 @@
+import json
+
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from app.core.tracing import (
+    FileSpanExporter,
+    TracingMiddleware,
+    _current,
+    instrument,
+    start_span,
+)
+from app.repositories.user import UserRepository
+from tests.conftest import TestAsyncSessionLocal
+
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class Service:
+    def __init__(self):
+        self.repository = instrument(UserRepository(), "repository")
+
+    async def load(self, db, user_id):
+        return await self.repository.get_by_id(db, user_id)
+
+
+def traced_app(
+    exporter: FileSpanExporter, sample_rate: float = 1.0, trusted_peers=()
+) -> FastAPI:
+    app = FastAPI()
+    service = instrument(Service(), "service")
+
+    @app.get("/items/{user_id}")
+    async def get_item(user_id: int):
+        async with TestAsyncSessionLocal() as db:
+            user = await service.load(db, user_id)
+        return {"found": user is not None}
+
+    app.add_middleware(
+        TracingMiddleware,
+        sample_rate=sample_rate,
+        exporter=exporter,
+        trusted_peers=trusted_peers,
+    )
+    return app
+
+
+def test_spans_cover_every_layer(db_session, test_user, tmp_path):
+    """Тест: span api -> service -> repository -> db с SQL и числом строк"""
+    exporter = FileSpanExporter(str(tmp_path / "traces.jsonl"), "jsonl")
+    client = TestClient(traced_app(exporter))
+
+    response = client.get(f"/items/{test_user.id}")
+    exporter.flush()
+
+    assert response.json() == {"found": True}
+    spans = {
+        span["attributes"]["layer"]: span
+        for span in read_lines(tmp_path / "traces.jsonl")
+    }
+    api, service, repository, db = (
+        spans["api"],
+        spans["service"],
+        spans["repository"],
+        spans["db"],
+    )
+    assert api["name"] == "GET /items/{user_id}"
+    assert api["attributes"]["http.status_code"] == 200
+    assert service["name"] == "Service.load"
+    assert repository["name"] == "UserRepository.get_by_id"
+    assert repository["attributes"]["result.rows"] == 1
+    assert db["attributes"]["db.statement"].startswith("SELECT users.id")
+    assert db["kind"] == "client"
+
+    # Цепочка родителей и общий trace_id
+    assert service["parent_id"] == api["span_id"]
+    assert repository["parent_id"] == service["span_id"]
+    assert db["parent_id"] == repository["span_id"]
+    assert len({span["trace_id"] for span in spans.values()}) == 1
+    assert (
+        response.headers["traceparent"] == f"00-{api['trace_id']}-{api['span_id']}-01"
+    )
+
+
+def test_sampling_and_incoming_traceparent(db_session, tmp_path):
+    """Тест: вне выборки трасса не пишется, флаг доверенного traceparent ее включает"""
+    path = tmp_path / "traces.jsonl"
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    traceparent = {"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"}
+
+    exporter = FileSpanExporter(str(path), "jsonl")
+    client = TestClient(traced_app(exporter, sample_rate=0))
+    response = client.get("/items/1")
+    assert "traceparent" not in response.headers
+    # Флаг выборки от клиента не из доверенных адресов не учитывается
+    response = client.get("/items/1", headers=traceparent)
+    assert "traceparent" not in response.headers
+
+    client = TestClient(
+        traced_app(exporter, sample_rate=0, trusted_peers=("testclient",))
+    )
+    client.get("/items/1", headers=traceparent)
+    exporter.flush()
+
+    spans = read_lines(path)
+    assert {span["trace_id"] for span in spans} == {trace_id}
+    root = next(span for span in spans if span["attributes"]["layer"] == "api")
+    assert root["parent_id"] == "00f067aa0ba902b7"
+
+
+def test_otlp_format(db_session, tmp_path):
+    """Тест: формат otlp - строка ExportTraceServiceRequest на трассу"""
+    path = tmp_path / "traces.otlp.json"
+    exporter = FileSpanExporter(str(path), "otlp")
+    client = TestClient(traced_app(exporter))
+
+    client.get("/items/1")
+    client.get("/items/2")
+    exporter.flush()
+
+    lines = read_lines(path)
+    assert len(lines) == 2
+    spans = lines[0]["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    root = next(span for span in spans if "parentSpanId" not in span)
+    assert root["kind"] == 2
+    assert {"key": "http.status_code", "value": {"intValue": "200"}} in root[
+        "attributes"
+    ]
+
+
+def test_exporter_bounds_queue_and_file(db_session, tmp_path):
+    """Тест: ротация файла трасс по размеру и отбрасывание при полной очереди"""
+    path = tmp_path / "traces.jsonl"
+    exporter = FileSpanExporter(str(path), "jsonl", max_bytes=1)
+    client = TestClient(traced_app(exporter))
+
+    client.get("/items/1")
+    exporter.flush()
+    assert not path.exists()
+    assert read_lines(tmp_path / "traces.jsonl.1")
+
+    exporter = FileSpanExporter(str(path), "jsonl", queue_size=1)
+    exporter._thread = object()  # поток записи не запущен - очередь не разбирается
+    exporter.export([])
+    exporter.export([])
+    assert exporter.dropped == 1
+
+
+async def test_no_spans_outside_trace():
+    """Тест: вне трассы обертки и start_span ничего не создают"""
+
+    class Repository:
+        async def get(self, value):
+            return [value]
+
+    repository = instrument(Repository(), "repository")
+
+    assert _current.get() is None
+    with start_span("noop") as span:
+        assert span is None
+    assert await repository.get(1) == [1]
+    assert _current.get() is None
@@ -1,9 +1,16 @@
+import pytest_asyncio
 from starlette.testclient import TestClient
 
+from app.core.query_counter import capture_queries
+from app.models.user import Profile, User
 
-def test_get_current_user_info(client: TestClient, test_user, auth_headers):
+
+def test_get_current_user_info(
+    client: TestClient, test_user, auth_headers, assert_max_queries
+):
     """Тест получения информации о текущем пользователе"""
-    response = client.get("/api/users/me", headers=auth_headers)
+    with assert_max_queries(4):
+        response = client.get("/api/users/me", headers=auth_headers)
 
     assert response.status_code == 200
     data = response.json()
@@ -82,3 +89,178 @@ def test_deactivate_self(client: TestClient, test_superuser, admin_headers):
         f"/api/users/{test_superuser.id}/deactivate", headers=admin_headers
     )
     assert response.status_code == 400
+
+
+def test_soft_delete_user_as_superuser(client: TestClient, test_user, admin_headers):
+    """Тест мягкого удаления и восстановления пользователя"""
+    response = client.delete(f"/api/users/{test_user.id}", headers=admin_headers)
+    assert response.status_code == 204
+
+    # Повторное удаление: пользователь уже не виден
+    response = client.delete(f"/api/users/{test_user.id}", headers=admin_headers)
+    assert response.status_code == 404
+
+    response = client.post(
+        f"/api/users/{test_user.id}/restore", headers=admin_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["id"] == test_user.id
+
+
+def test_soft_deleted_user_cannot_login(client: TestClient, test_user, admin_headers):
+    """Тест: удаленный пользователь не может войти"""
+    client.delete(f"/api/users/{test_user.id}", headers=admin_headers)
+
+    form_data = {"username": test_user.email, "password": "testpassword123"}
+    response = client.post("/api/auth/login", data=form_data)
+    assert response.status_code == 401
+
+
+def test_get_current_user_info_not_modified(client: TestClient, auth_headers):
+    """Тест условного GET текущего пользователя"""
+    response = client.get("/api/users/me", headers=auth_headers)
+    assert response.status_code == 200
+
+    response = client.get(
+        "/api/users/me",
+        headers={**auth_headers, "If-None-Match": response.headers["etag"]},
+    )
+    assert response.status_code == 304
+
+
+def test_current_user_etag_ignores_activity(
+    client: TestClient, db_session, auth_headers
+):
+    """Тест: отметки активности от самих запросов не меняют ETag /me"""
+    from app.core.activity import activity_buffer
+
+    etag = client.get("/api/users/me", headers=auth_headers).headers["etag"]
+    # Запрос отметил last_seen_at - сбрасываем буфер в БД и перечитываем
+    assert client.portal.call(activity_buffer.flush) == 1
+    db_session.expire_all()
+
+    response = client.get(
+        "/api/users/me", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+
+def test_get_users_includes_profiles(
+    client: TestClient, test_user, admin_headers, assert_max_queries
+):
+    """Тест списка пользователей с профилями через быстрый путь сериализации"""
+    with assert_max_queries(2):
+        response = client.get(
+            "/api/users/?active_only=false&expand=profile", headers=admin_headers
+        )
+
+    assert response.status_code == 200
+    users = {item["id"]: item for item in response.json()}
+    assert users[test_user.id]["email"] == test_user.email
+    assert users[test_user.id]["profile"]["first_name"] == "Test"
+    assert all("hashed_password" not in item for item in users.values())
+
+
+def test_get_users_sparse_fields(client: TestClient, test_user, admin_headers):
+    """Тест списка пользователей с fields="""
+    response = client.get(
+        "/api/users/?fields=id,email,profile.first_name&expand=profile",
+        headers=admin_headers,
+    )
+
+    assert response.status_code == 200
+    users = {item["id"]: item for item in response.json()}
+    assert users[test_user.id] == {
+        "id": test_user.id,
+        "email": test_user.email,
+        "profile": {"first_name": "Test"},
+    }
+
+
+def test_get_users_unknown_field(client: TestClient, admin_headers):
+    """Тест: неизвестное или скрытое поле в fields= дает 400"""
+    response = client.get("/api/users/?fields=id,hashed_password", headers=admin_headers)
+    assert response.status_code == 400
+
+
+def test_get_current_user_sparse_fields(client: TestClient, test_user, auth_headers):
+    """Тест fields= на /me и отдельного ETag для проекции"""
+    full = client.get("/api/users/me", headers=auth_headers)
+    response = client.get("/api/users/me?fields=email", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json() == {"email": test_user.email}
+    assert response.headers["etag"] != full.headers["etag"]
+
+    response = client.get(
+        "/api/users/me?fields=email",
+        headers={**auth_headers, "If-None-Match": response.headers["etag"]},
+    )
+    assert response.status_code == 304
+
+
+def test_get_current_user_fields_null_profile_column(
+    client: TestClient, test_user, auth_headers
+):
+    """Тест: пустая колонка профиля в fields= не превращает профиль в null"""
+    response = client.get(
+        "/api/users/me?fields=id,profile.avatar_url,profile",
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["profile"]["first_name"] == "Test"
+
+    response = client.get(
+        "/api/users/me?fields=id,profile.avatar_url", headers=auth_headers
+    )
+    assert response.json() == {"id": test_user.id, "profile": {"avatar_url": None}}
+
+
+def test_get_users_without_expand(client: TestClient, test_user, admin_headers):
+    """Тест: без expand=profile профиль не загружается"""
+    response = client.get("/api/users/", headers=admin_headers)
+
+    assert response.status_code == 200
+    assert all(item["profile"] is None for item in response.json())
+
+    response = client.get(
+        "/api/users/?fields=profile.first_name", headers=admin_headers
+    )
+    assert response.status_code == 400
+
+    response = client.get("/api/users/?expand=orders", headers=admin_headers)
+    assert response.status_code == 400
+
+
+@pytest_asyncio.fixture
+async def page_users(db_session):
+    """
+    Десять пользователей с профилями для проверки пагинации.
+
+    Запрашивается раньше client: запись идет до старта фоновых задач
+    приложения, которые делят с тестом одно соединение SQLite.
+    """
+    for i in range(10):
+        user = User(email=f"page{i}@example.com", hashed_password="x")
+        user.profile = Profile(first_name=f"Name{i}")
+        db_session.add(user)
+    await db_session.commit()
+
+
+def test_get_users_expand_query_count(page_users, client: TestClient, admin_headers):
+    """Тест: число запросов к БД не зависит от размера страницы"""
+    counts = []
+    for limit in (1, 10):
+        with capture_queries() as stats:
+            response = client.get(
+                f"/api/users/?expand=profile&limit={limit}", headers=admin_headers
+            )
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) == limit
+        assert all(
+            item["profile"] for item in page if item["email"].startswith("page")
+        )
+        counts.append(stats.count)
+
+    assert counts[0] == counts[1]